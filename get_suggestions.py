@@ -4,7 +4,6 @@
 """
 
 import json
-import time
 from datetime import datetime
 from charts_scraper import get_suggestions_for_keywords
 
@@ -52,9 +51,6 @@ def get_suggestions_for_app():
         # Показываем краткую сводку
         total_suggestions = sum(len(suggestions) for suggestions in country_results.values())
         print(f"📊 Всего подсказок для страны {country}: {total_suggestions}")
-        
-        # Пауза между странами
-        time.sleep(5)
     
     # Сохраняем результаты
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -6,34 +6,53 @@
 import sys
 import os
 import argparse
-import requests
 
 # Добавляем путь к src
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
-TELEGRAM_TOKEN = os.environ.get('TELEGRAM_TOKEN')
-TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
-
 def send_telegram_message(message):
-    if TELEGRAM_TOKEN and TELEGRAM_CHAT_ID:
-        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-        data = {"chat_id": TELEGRAM_CHAT_ID, "text": message}
-        try:
-            requests.post(url, data=data)
-        except Exception as e:
-            print(f"Ошибка отправки в Telegram: {e}")
+    """Отправляет сообщение через общий клиент Telegram (лимиты запросов и повтор после 429)"""
+    from src.utils.telegram_utils import get_telegram_client
+    client = get_telegram_client()
+    if not client.is_configured():
+        return
+    try:
+        client.send_message(message)
+    except Exception as e:
+        print(f"Ошибка отправки в Telegram: {e}")
 
 def main():
     parser = argparse.ArgumentParser(description="App Store Monitor - Главный скрипт")
-    parser.add_argument("command", choices=["search", "check", "charts", "suggestions", "test"], 
+    parser.add_argument("command", choices=["search", "check", "worker", "charts", "suggestions", "expand", "test"], 
                        help="Команда для выполнения")
     parser.add_argument("--bundle-id", default=os.environ.get('BUNDLE_ID', "com.kotiuzhynskyi.CameraTranslator"),
                        help="Bundle ID приложения")
     parser.add_argument("--country", default="us", help="Код страны")
     parser.add_argument("--limit", type=int, default=250, help="Лимит результатов")
+    parser.add_argument("--backend", choices=["node", "python"], default=os.environ.get('APPSTORE_BACKEND', "node"),
+                       help="Бэкенд поиска: node (app-store-scraper) или python (прямые HTTP запросы)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Количество одновременных запросов")
+    parser.add_argument("--rate", type=float, default=0.5, help="Запросов в секунду к одной стране")
+    parser.add_argument("--cache-ttl", type=int, default=None, help="TTL кэша ответов в секундах для всех запросов")
+    parser.add_argument("--no-cache", action="store_true", help="Не использовать кэш ответов")
+    parser.add_argument("--min-interval", type=int, default=600, help="Минимальный интервал проверки пары в секундах (команда search)")
+    parser.add_argument("--max-interval", type=int, default=6 * 3600, help="Максимальный интервал проверки пары в секундах (команда search)")
+    parser.add_argument("--requests-per-hour", type=int, default=None, help="Бюджет запросов в час (команда search, по умолчанию — число пар)")
+    parser.add_argument("--queue", nargs="?", const=os.path.join(os.path.dirname(__file__), "data", "results", "work_queue.db"),
+                       default=None, help="Проверять пары через очередь воркеров (файл SQLite, общий с main.py worker)")
+    parser.add_argument("--lease-size", type=int, default=10, help="Пар в одной аренде очереди")
+    parser.add_argument("--lease-seconds", type=int, default=120, help="Срок аренды без продления (команда worker)")
+    parser.add_argument("--max-idle", type=int, default=None, help="Завершить воркер после стольких секунд без заданий")
+    parser.add_argument("--resume", action="store_true", help="Продолжить прерванную проверку с контрольной точки (команда check)")
+    parser.add_argument("--depth", type=int, default=2, help="Глубина раскрытия подсказок (команда expand)")
+    parser.add_argument("--budget", type=int, default=200, help="Лимит запросов подсказок на страну (команда expand)")
+    parser.add_argument("--top", type=int, default=20, help="Сколько кандидатов на страну выводить в keywords.json (команда expand)")
     
     args = parser.parse_args()
     
+    from src.utils.response_cache import configure_cache
+    configure_cache(enabled=not args.no_cache, ttl=args.cache_ttl)
+    
     if args.command == "search":
         from src.scrapers.search_appStore import main_loop
         import json
@@ -53,10 +72,14 @@ def main():
         print(f"📱 Bundle ID: {args.bundle_id}")
         print(f"📄 Файл ключевых слов: {keywords_file}")
         print(f"🔍 Максимальное количество результатов: {args.limit}")
+        print(f"⚙️ Бэкенд поиска: {args.backend}")
         print(f"📊 Количество ключевых слов: {len(search_terms)}")
         print("-" * 50)
         send_telegram_message(f"🚀 Запуск мониторинга App Store для {args.bundle_id} с {len(search_terms)} ключевыми словами")
-        main_loop(args.bundle_id, search_terms, args.limit, keywords_file=keywords_file)
+        main_loop(args.bundle_id, search_terms, args.limit, keywords_file=keywords_file, backend=args.backend,
+                  concurrency=args.concurrency, country_rate=args.rate, min_interval=args.min_interval,
+                  max_interval=args.max_interval, requests_per_hour=args.requests_per_hour,
+                  queue_path=args.queue, lease_size=args.lease_size)
     
     elif args.command == "check":
         from src.scrapers.search_appStore import single_check
@@ -77,9 +100,18 @@ def main():
         print(f"📱 Bundle ID: {args.bundle_id}")
         print(f"📄 Файл ключевых слов: {keywords_file}")
         print(f"🔍 Максимальное количество результатов: {args.limit}")
+        print(f"⚙️ Бэкенд поиска: {args.backend}")
         print(f"📊 Количество ключевых слов: {len(search_terms)}")
         print("-" * 50)
-        single_check(args.bundle_id, search_terms, args.limit, keywords_file=keywords_file)
+        single_check(args.bundle_id, search_terms, args.limit, keywords_file=keywords_file, backend=args.backend,
+                     concurrency=args.concurrency, country_rate=args.rate, queue_path=args.queue,
+                     lease_size=args.lease_size, resume=args.resume)
+    
+    elif args.command == "worker":
+        from src.scrapers.worker import run_worker
+        from src.utils.work_queue import WORK_QUEUE_DB
+        run_worker(args.queue or WORK_QUEUE_DB, backend=args.backend, concurrency=args.concurrency,
+                   country_rate=args.rate, lease_seconds=args.lease_seconds, max_idle=args.max_idle)
     
     elif args.command == "charts":
         from src.scrapers.charts_scraper import get_app_charts
@@ -90,6 +122,10 @@ def main():
         from src.analyzers.get_suggestions import get_suggestions_for_app
         get_suggestions_for_app()
     
+    elif args.command == "expand":
+        from src.analyzers.keyword_expander import expand_keywords_for_app
+        expand_keywords_for_app(depth=args.depth, budget=args.budget, top=args.top)
+    
     elif args.command == "test":
         print("Запуск тестов...")
         # Можно добавить запуск тестов
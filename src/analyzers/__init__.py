@@ -1,3 +1,5 @@
 # Analyzers Package
  
-from .get_suggestions import * 
\ No newline at end of file
+from .pattern_matcher import *
+from .get_suggestions import * 
+from .keyword_expander import *
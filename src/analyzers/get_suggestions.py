@@ -4,7 +4,6 @@
 """
 
 import json
-import time
 import sys
 import os
 from datetime import datetime
@@ -12,7 +11,11 @@ from datetime import datetime
 # Добавляем путь к корневой папке проекта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from src.scrapers.charts_scraper import get_suggestions_for_keywords
+from src.scrapers.charts_scraper import iter_suggestions
+from src.analyzers.pattern_matcher import PatternMatcher, DEFAULT_PATTERNS, MAX_EXAMPLES, load_suggestion_patterns, iter_suggestion_rows, count_pattern_hits
+
+# Шаблон, все совпадения которого попадают в отчет как translator_mentions
+TRANSLATOR_PATTERN = "translator"
 
 def load_keywords_and_countries():
     """Загружает ключевые слова и список стран из файла"""
@@ -47,70 +50,71 @@ def get_suggestions_for_app():
     print(f"📝 Найдено {len(keywords)} ключевых слов: {keywords}")
     print(f"🌍 Будут использоваться только страны из keywords.json: {countries}")
     
-    all_results = {}
-    
-    for country in countries:
-        print(f"\n🌍 Анализ страны: {country}")
-        print("=" * 40)
-        
-        country_results = get_suggestions_for_keywords(keywords, country)
-        all_results[country] = country_results
-        
-        # Показываем краткую сводку
-        total_suggestions = sum(len(suggestions) for suggestions in country_results.values())
-        print(f"📊 Всего подсказок для страны {country}: {total_suggestions}")
-        
-        # Пауза между странами
-        time.sleep(5)
-    
-    # Сохраняем результаты
+    # Подсказки записываются в файл (JSON Lines) и анализируются по мере
+    # получения, в памяти остаются только счетчики
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"suggestions_app_{timestamp}.json"
-    
+    filename = f"suggestions_app_{timestamp}.jsonl"
+    totals = {}
+
+    def rows(f):
+        for country, keyword, suggestions in iter_suggestions(keywords, countries, memoize=False):
+            f.write(json.dumps({"country": country, "keyword": keyword, "suggestions": suggestions}, ensure_ascii=False) + "\n")
+            totals[country] = totals.get(country, 0) + len(suggestions)
+            yield from iter_suggestion_rows({country: {keyword: suggestions}})
+
     with open(filename, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-    
+        summary = analyze_suggestions(rows(f), keywords)
+
+    for country in countries:
+        # Показываем краткую сводку
+        print(f"📊 Всего подсказок для страны {country}: {totals.get(country, 0)}")
+
     print(f"\n💾 Результаты сохранены в {filename}")
-    
-    # Анализируем результаты
-    analyze_suggestions(all_results, keywords)
+    return summary
 
-def analyze_suggestions(results, keywords):
-    """Анализирует полученные подсказки"""
+def analyze_suggestions(results, keywords, patterns=None):
+    """
+    Считает упоминания шаблонов (брендов, функций) в подсказках по странам
+
+    Args:
+        results: {страна: {ключевое слово: подсказки}} или поток
+            (страна, ключевое слово, подсказка)
+        keywords: Список ключевых слов
+        patterns: Шаблоны {название: [подстроки]} (по умолчанию из suggestion_patterns.json)
+    """
     print(f"\n📊 АНАЛИЗ РЕЗУЛЬТАТОВ")
     print("=" * 50)
     
-    # Ищем упоминания "translator" или "translation"
-    translator_mentions = {}
-    
-    for country, country_results in results.items():
-        translator_mentions[country] = []
-        
-        for keyword, suggestions in country_results.items():
-            for suggestion in suggestions:
-                term = suggestion.get("term", "").lower()
-                if "translator" in term or "translation" in term:
-                    translator_mentions[country].append({
-                        "keyword": keyword,
-                        "suggestion": suggestion["term"]
-                    })
+    patterns = dict(patterns or load_suggestion_patterns())
+    patterns.setdefault(TRANSLATOR_PATTERN, DEFAULT_PATTERNS[TRANSLATOR_PATTERN])
+    matcher = PatternMatcher(patterns)
+    rows = iter_suggestion_rows(results) if isinstance(results, dict) else results
+    pattern_hits, examples, total = count_pattern_hits(rows, matcher, keep_all=(TRANSLATOR_PATTERN,))
     
     # Показываем результаты
-    print("🎯 Найдены подсказки с упоминанием 'translator' или 'translation':")
+    print(f"🎯 Совпадения шаблонов ({', '.join(patterns)}) в {total} подсказках:")
     
-    for country, mentions in translator_mentions.items():
-        if mentions:
+    for country, counts in pattern_hits.items():
+        if counts:
             print(f"\n🌍 {country}:")
-            for mention in mentions:
-                print(f"  • '{mention['keyword']}' → '{mention['suggestion']}'")
+            for name, count in sorted(counts.items(), key=lambda item: -item[1]):
+                print(f"  • {name}: {count}")
+                for example in examples[country][name][:MAX_EXAMPLES]:
+                    print(f"      '{example['keyword']}' → '{example['suggestion']}'")
         else:
             print(f"\n🌍 {country}: Нет упоминаний")
     
     # Создаем сводный отчет
     summary = {
-        "total_countries": len(results),
+        "total_countries": len(pattern_hits),
         "total_keywords": len(keywords),
-        "translator_mentions": translator_mentions,
+        "total_suggestions": total,
+        "translator_mentions": {country: examples.get(country, {}).get(TRANSLATOR_PATTERN, []) for country in pattern_hits},
+        "pattern_hits": pattern_hits,
+        "examples": {
+            country: {name: items[:MAX_EXAMPLES] for name, items in country_examples.items()}
+            for country, country_examples in examples.items()
+        },
         "timestamp": datetime.now().isoformat()
     }
     
@@ -119,6 +123,7 @@ def analyze_suggestions(results, keywords):
         json.dump(summary, f, ensure_ascii=False, indent=2)
     
     print(f"\n💾 Сводный отчет сохранен в {summary_filename}")
+    return summary
 
 if __name__ == "__main__":
     print("🚀 Запуск анализа поисковых подсказок для приложения")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Поиск новых ключевых слов через дерево автодополнения App Store.
+
+Обход в ширину: для каждого термина запрашиваются подсказки для самого
+термина и для "термин a".."термин z", а найденные подсказки становятся
+терминами следующего уровня. Префиксное дерево запоминает уже запрошенные
+префиксы, а также префиксы, для которых подсказок пришло меньше полной
+страницы: все их продолжения уже известны, поэтому запрашивать их не нужно.
+Префиксы, запрос которых завершился ошибкой, не отмечаются и повторяются
+на следующем уровне.
+"""
+
+import json
+import os
+import string
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.scrapers.charts_scraper import crawl_suggestions, normalize_term, SUGGESTIONS_CONCURRENCY, SUGGESTIONS_COUNTRY_RATE
+from src.analyzers.get_suggestions import load_keywords_and_countries
+
+# Глубина обхода и лимит запросов на одну страну
+DEFAULT_DEPTH = 2
+DEFAULT_BUDGET = 200
+
+# Суффиксы, которые добавляются к термину при раскрытии
+DEFAULT_ALPHABET = string.ascii_lowercase
+
+# Сколько подсказок App Store возвращает на один запрос
+SUGGESTIONS_PAGE_SIZE = 10
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "results")
+
+class PrefixTrie:
+    """Префиксное дерево запрошенных терминов"""
+
+    # Служебные ключи узла (длиннее одного символа, поэтому не пересекаются с буквами)
+    QUERIED = "#queried"
+    COMPLETE = "#complete"
+
+    def __init__(self):
+        self.root = {}
+
+    def _node(self, prefix, create=False):
+        node = self.root
+        for char in prefix:
+            if char not in node:
+                if not create:
+                    return None
+                node[char] = {}
+            node = node[char]
+        return node
+
+    def mark(self, prefix, complete=False):
+        """Отмечает префикс как запрошенный (complete — все продолжения уже получены)"""
+        node = self._node(prefix, create=True)
+        node[self.QUERIED] = True
+        if complete:
+            node[self.COMPLETE] = True
+
+    def is_covered(self, prefix):
+        """Проверяет, покрыт ли префикс уже выполненными запросами"""
+        node = self.root
+        for char in prefix:
+            if self.COMPLETE in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return self.QUERIED in node or self.COMPLETE in node
+
+def suggestion_terms(suggestions):
+    """Извлекает нормализованные термины из ответа suggest"""
+    terms = []
+    for suggestion in suggestions or []:
+        term = suggestion.get("term") if isinstance(suggestion, dict) else suggestion
+        if term:
+            terms.append(normalize_term(term))
+    return terms
+
+def child_queries(term, alphabet=DEFAULT_ALPHABET):
+    """Запросы для раскрытия термина: "термин a".."термин z" """
+    return [f"{term} {char}" for char in alphabet]
+
+def expand_keywords(seeds, country="us", depth=DEFAULT_DEPTH, budget=DEFAULT_BUDGET, alphabet=DEFAULT_ALPHABET,
+                    concurrency=SUGGESTIONS_CONCURRENCY, country_rate=SUGGESTIONS_COUNTRY_RATE):
+    """
+    Раскрывает ключевые слова в ширину по подсказкам App Store
+
+    Args:
+        seeds: Исходные ключевые слова
+        country: Код страны
+        depth: Глубина обхода (0 — только сами ключевые слова)
+        budget: Максимальное количество запросов подсказок
+        alphabet: Символы, добавляемые к термину при раскрытии
+        concurrency: Количество одновременных запросов
+        country_rate: Запросов в секунду к витрине
+
+    Returns:
+        list: Кандидаты [{"term", "score", "hits", "depth"}], по убыванию score
+    """
+    trie = PrefixTrie()
+    seed_terms = {normalize_term(seed) for seed in seeds}
+    candidates = {}
+    expanded = set(seed_terms)
+    requests_made = 0
+
+    level = list(dict.fromkeys(normalize_term(seed) for seed in seeds))
+    for current_depth in range(depth + 1):
+        queries = [q for q in level if not trie.is_covered(q)][:max(0, budget - requests_made)]
+        if not queries:
+            break
+
+        print(f"🌳 {country.upper()}: уровень {current_depth}, запросов {len(queries)}")
+        results = crawl_suggestions(queries, [country], concurrency, country_rate, none_on_error=True)[country]
+        requests_made += len(queries)
+
+        next_level = []
+        failed = [query for query in queries if results[query] is None]
+        if failed:
+            # Сбой — не пустой ответ: префикс не отмечается, иначе его поддерево было бы отброшено
+            print(f"⚠️ {country.upper()}: запросов с ошибкой {len(failed)} (префиксы не отмечены, повтор на следующем уровне)")
+            next_level.extend(failed)
+
+        for query in queries:
+            if results[query] is None:
+                continue
+            terms = suggestion_terms(results[query])
+            trie.mark(query, complete=len(terms) < SUGGESTIONS_PAGE_SIZE)
+
+            for position, term in enumerate(terms):
+                # Выше в списке и ближе к исходному слову — ценнее
+                weight = 1 / (position + 1) / (current_depth + 1)
+                entry = candidates.setdefault(term, {"term": term, "score": 0.0, "hits": 0, "depth": current_depth})
+                entry["score"] += weight
+                entry["hits"] += 1
+
+                if term not in expanded:
+                    expanded.add(term)
+                    next_level.append(term)
+
+            if query in expanded:
+                next_level.extend(child_queries(query, alphabet))
+
+        level = next_level
+
+    print(f"📊 {country.upper()}: запросов {requests_made}, кандидатов {len(candidates)}")
+
+    ranked = [c for term, c in candidates.items() if term not in seed_terms]
+    for entry in ranked:
+        entry["score"] = round(entry["score"], 4)
+    return sorted(ranked, key=lambda c: (-c["score"], -c["hits"], c["term"]))
+
+def to_keywords_config(candidates_by_country, top=20):
+    """Переводит кандидатов в формат keywords.json: {ключевое слово: [страны]}"""
+    config = defaultdict(list)
+    for country, candidates in candidates_by_country.items():
+        for candidate in candidates[:top]:
+            config[candidate["term"]].append(country)
+    return dict(config)
+
+def expand_keywords_for_app(depth=DEFAULT_DEPTH, budget=DEFAULT_BUDGET, top=20):
+    """Раскрывает ключевые слова из keywords.json по всем странам и сохраняет кандидатов"""
+    keywords, countries = load_keywords_and_countries()
+    if not keywords or not countries:
+        print("❌ Ключевые слова или страны не найдены в keywords.json")
+        return {}
+
+    print(f"📝 Исходные ключевые слова: {keywords}")
+    print(f"🌍 Страны: {countries}")
+
+    candidates_by_country = {}
+    for country in countries:
+        candidates_by_country[country] = expand_keywords(keywords, country, depth, budget)
+        for candidate in candidates_by_country[country][:10]:
+            print(f"  • {candidate['term']} (score {candidate['score']}, hits {candidate['hits']})")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    filename = os.path.join(RESULTS_DIR, f"keyword_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump({
+            "candidates": candidates_by_country,
+            "keywords": to_keywords_config(candidates_by_country, top)
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"\n💾 Кандидаты сохранены в {filename}")
+    return candidates_by_country
+
+if __name__ == "__main__":
+    print("🚀 Поиск новых ключевых слов через автодополнение")
+    print("=" * 50)
+    expand_keywords_for_app()
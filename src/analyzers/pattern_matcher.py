@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Подсчет упоминаний брендов и функций в поисковых подсказках.
+
+Все шаблоны из data/config/suggestion_patterns.json компилируются в одно
+регулярное выражение, поэтому каждая подсказка просматривается один раз
+независимо от количества шаблонов. Подсказки обрабатываются потоком:
+в памяти остаются только счетчики и несколько примеров на шаблон.
+"""
+
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+PATTERNS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "config", "suggestion_patterns.json")
+
+# Шаблоны по умолчанию: название → список подстрок
+DEFAULT_PATTERNS = {
+    "translator": ["translator", "translation"]
+}
+
+# Сколько примеров подсказок сохранять на шаблон в каждой стране
+MAX_EXAMPLES = 5
+
+def load_suggestion_patterns(path=PATTERNS_FILE):
+    """Загружает шаблоны из suggestion_patterns.json: {название: [подстроки]}"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            patterns = json.load(f)
+        return {name: [needles] if isinstance(needles, str) else list(needles) for name, needles in patterns.items()}
+    except FileNotFoundError:
+        return dict(DEFAULT_PATTERNS)
+    except Exception as e:
+        print(f"❌ Ошибка загрузки шаблонов подсказок: {e}")
+        return dict(DEFAULT_PATTERNS)
+
+class PatternMatcher:
+    """Поиск всех шаблонов в строке за один проход регулярного выражения"""
+
+    def __init__(self, patterns):
+        # Подстрока → шаблоны, в которые она входит
+        self.needles = defaultdict(set)
+        for name, needles in patterns.items():
+            for needle in needles:
+                if needle:
+                    self.needles[needle.lower()].add(name)
+
+        # В каждой позиции совпадает самая длинная подстрока, поэтому
+        # заранее добавляем к ней шаблоны всех подстрок, являющихся ее префиксом
+        self.implied = {
+            needle: set().union(*(names for other, names in self.needles.items() if needle.startswith(other)))
+            for needle in self.needles
+        }
+
+        alternatives = "|".join(re.escape(n) for n in sorted(self.needles, key=len, reverse=True))
+        # Lookahead позволяет находить пересекающиеся совпадения
+        self.regex = re.compile(f"(?=({alternatives}))") if alternatives else None
+
+    def match(self, text):
+        """Возвращает множество шаблонов, найденных в тексте"""
+        if self.regex is None or not text:
+            return set()
+        found = set()
+        for m in self.regex.finditer(text.lower()):
+            found |= self.implied[m.group(1)]
+        return found
+
+def iter_suggestion_rows(results):
+    """Разворачивает {страна: {ключевое слово: подсказки}} в поток (страна, ключевое слово, подсказка)"""
+    for country, country_results in results.items():
+        for keyword, suggestions in country_results.items():
+            for suggestion in suggestions or []:
+                term = suggestion.get("term", "") if isinstance(suggestion, dict) else suggestion
+                yield country, keyword, term
+
+def count_pattern_hits(rows, matcher, max_examples=MAX_EXAMPLES, keep_all=()):
+    """
+    Считает совпадения шаблонов в потоке подсказок
+
+    Args:
+        rows: Итерируемый поток (страна, ключевое слово, подсказка)
+        matcher: PatternMatcher
+        max_examples: Сколько примеров сохранять на шаблон и страну
+        keep_all: Шаблоны, для которых сохраняются все совпадения
+
+    Returns:
+        tuple: ({страна: {шаблон: число}}, {страна: {шаблон: [примеры]}}, всего подсказок)
+    """
+    hits = defaultdict(lambda: defaultdict(int))
+    examples = defaultdict(lambda: defaultdict(list))
+    total = 0
+
+    for country, keyword, term in rows:
+        total += 1
+        hits[country]  # страна попадает в отчет даже без совпадений
+        for name in matcher.match(term):
+            hits[country][name] += 1
+            if name in keep_all or len(examples[country][name]) < max_examples:
+                examples[country][name].append({"keyword": keyword, "suggestion": term})
+
+    return (
+        {country: dict(counts) for country, counts in hits.items()},
+        {country: dict(items) for country, items in examples.items()},
+        total
+    )
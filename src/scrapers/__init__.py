@@ -1,5 +1,10 @@
 # App Store Scrapers Package
  
+from .node_worker import *
+from .itunes_client import *
 from .appstore_scraper import *
 from .charts_scraper import *
-from .search_appStore import * 
\ No newline at end of file
+from .sweep import *
+from .scheduler import *
+from .worker import *
+from .search_appStore import *
\ No newline at end of file
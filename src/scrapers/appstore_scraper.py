@@ -1,60 +1,262 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import subprocess
 import json
 import sys
 import os
+import threading
+import requests
 
 # Добавляем путь к корневой папке проекта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from src.utils.country_utils import get_country_name
+from src.scrapers.node_worker import call_node, NodeWorkerError
+from src.scrapers import itunes_client
+from src.utils.atomic_store import atomic_write_json
 
-def get_rank(search_term: str, target_bundle_id: str, country: str = "us", max_results: int = 250):
-    """Получает позицию приложения в App Store по ключевому слову"""
+# Бэкенд поиска: "node" (app-store-scraper) или "python" (itunes_client)
+BACKENDS = ("node", "python")
+DEFAULT_BACKEND = os.environ.get("APPSTORE_BACKEND", "node")
+
+# Прогрессивная проверка выдачи: начальное окно и множитель расширения
+MIN_PROBE_WINDOW = 10
+PROBE_GROWTH = 3
+
+# Последние найденные позиции (term, country, bundleId) → позиция
+_last_ranks = {}
+
+# Постоянный кэш bundleId → trackId (trackId одинаков во всех витринах)
+TRACK_IDS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "cache", "track_ids.json")
+
+_track_ids = None
+_track_ids_lock = threading.Lock()
+
+def load_track_ids():
+    """Загружает кэш bundleId → trackId из файла"""
+    try:
+        with open(TRACK_IDS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"❌ Ошибка загрузки кэша trackId: {e}")
+        return {}
+
+def save_track_ids(track_ids):
+    """Сохраняет кэш bundleId → trackId в файл (атомарно: воркеры и потоки пишут его одновременно)"""
+    try:
+        atomic_write_json(TRACK_IDS_FILE, track_ids)
+    except Exception as e:
+        print(f"❌ Ошибка сохранения кэша trackId: {e}")
+
+def cached_track_ids(bundle_ids: list):
+    """
+    Возвращает trackId приложений из кэша, без запросов
+
+    Returns:
+        dict: bundleId → trackId (None, если trackId еще не известен)
+    """
+    global _track_ids
+    with _track_ids_lock:
+        if _track_ids is None:
+            _track_ids = load_track_ids()
+        return {bundle_id: _track_ids.get(bundle_id) for bundle_id in bundle_ids}
+
+def resolve_track_ids(bundle_ids: list, country: str = "us", backend: str = None):
+    """
+    Получает числовые trackId приложений по bundleId (с кэшированием)
+
+    Неизвестные bundleId запрашиваются одним пакетным lookup.
+
+    Returns:
+        dict: bundleId → trackId (None, если приложение не найдено)
+    """
+    result = cached_track_ids(bundle_ids)
+    missing = [bundle_id for bundle_id, track_id in result.items() if track_id is None]
+    if not missing:
+        return result
+
+    found = {}
+    for app in lookup_apps(missing, "bundleId", country, backend):
+        if app.get("appId") in result and app.get("id") is not None:
+            found[app["appId"]] = int(app["id"])
+    if not found:
+        return result
+
+    with _track_ids_lock:
+        _track_ids.update(found)
+        save_track_ids(_track_ids)
+    result.update(found)
+    return result
+
+def resolve_track_id(bundle_id: str, country: str = "us", backend: str = None):
+    """
+    Получает числовой trackId приложения по bundleId (с кэшированием)
+
+    Returns:
+        int: trackId или None, если приложение не найдено
+    """
+    return resolve_track_ids([bundle_id], country, backend)[bundle_id]
+
+def search_ids(search_term: str, country: str = "us", max_results: int = 250, backend: str = None):
+    """Получает только trackId результатов поиска, без запроса метаданных"""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "python":
+        return itunes_client.search_ids(search_term, country, max_results)
+    if backend == "node":
+        ids = call_node("search", {
+            "term": search_term,
+            "country": country,
+            "num": max_results,
+            "idsOnly": True
+        })
+        return [int(i) for i in ids]
+    raise ValueError(f"Неизвестный бэкенд: {backend}")
+
+def lookup_apps(ids: list, id_field: str = "id", country: str = "us", backend: str = None):
+    """Получает метаданные приложений по списку trackId/bundleId пакетными запросами"""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "python":
+        return itunes_client.lookup(ids, id_field, country)
+    if backend == "node":
+        apps = []
+        for start in range(0, len(ids), itunes_client.LOOKUP_BATCH_SIZE):
+            apps.extend(call_node("lookup", {
+                "ids": ids[start:start + itunes_client.LOOKUP_BATCH_SIZE],
+                "idField": id_field,
+                "country": country
+            }))
+        return apps
+    raise ValueError(f"Неизвестный бэкенд: {backend}")
+
+def probe_windows(max_results: int, last_rank: int = None):
+    """
+    Размеры окон прогрессивной проверки выдачи
+
+    Первое окно выбирается так, чтобы в него попадала прошлая позиция
+    (с запасом), дальше окно растет в PROBE_GROWTH раз до max_results.
+    """
+    window = MIN_PROBE_WINDOW
+    if last_rank:
+        while window < last_rank * 2:
+            window *= PROBE_GROWTH
+    windows = []
+    while window < max_results:
+        windows.append(window)
+        window *= PROBE_GROWTH
+    windows.append(max_results)
+    return windows
+
+def search_apps(search_term: str, country: str = "us", max_results: int = 250, backend: str = None):
+    """Ищет приложения через выбранный бэкенд, возвращает список в формате app-store-scraper"""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "python":
+        return itunes_client.search(search_term, country, max_results)
+    if backend == "node":
+        return call_node("search", {
+            "term": search_term,
+            "country": country,
+            "num": max_results
+        })
+    raise ValueError(f"Неизвестный бэкенд: {backend}")
+
+def get_ranks(search_term: str, bundle_ids: list, country: str = "us", max_results: int = 250, backend: str = None, ids_only: bool = True, last_rank: int = None, raise_errors: bool = False):
+    """
+    Получает позиции нескольких приложений из одного поискового запроса
+
+    Первое приложение в bundle_ids считается основным (для него печатается
+    результат), остальные — конкуренты.
+
+    Если trackId известны, позиции считаются по списку ID выдачи без
+    загрузки метаданных. Иначе метаданные загружаются прогрессивно: сначала
+    небольшое окно (по прошлой позиции last_rank), затем шире, пока все
+    приложения не найдены или не достигнут max_results.
+
+    Args:
+        raise_errors: Пробрасывать ошибку запроса, чтобы отличить ее от
+            "не найдено" (по умолчанию — вернуть None для всех приложений)
+
+    Returns:
+        dict: bundleId → позиция (None, если не найдено или произошла ошибка)
+    """
+    ranks = {bundle_id: None for bundle_id in bundle_ids}
     try:
         country_name = get_country_name(country)
         print(f"🔍 Проверка: '{search_term}' | Страна: {country_name}...")
 
-        node_code = f"""
-        import store from 'app-store-scraper';
-        store.search({{
-            term: {json.dumps(search_term)},
-            country: "{country}",
-            num: {max_results}
-        }}).then(results => {{
-            console.log(JSON.stringify(results));
-        }}).catch(err => {{
-            console.error("ERR", err.message);
-            process.exit(1);
-        }});
-        """
-
-        result = subprocess.run(
-            ["node", "--input-type=module", "-e", node_code],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-
-        apps = json.loads(result.stdout)
-
-        for idx, app in enumerate(apps):
-            if app.get("appId") == target_bundle_id:
-                print(f"✅ Найдено! Позиция: #{idx + 1}")
-                return idx + 1
-
-        print("❌ Не найдено в результатах")
-        return None
-
-    except subprocess.CalledProcessError as e:
-        print("❌ Ошибка Node.js:", e.stderr)
-        return None
+        track_ids = {}
+        if ids_only:
+            try:
+                track_ids = resolve_track_ids(bundle_ids, country, backend)
+            except Exception as e:
+                # Без lookup: известные trackId берем из кэша, остальные ищем по метаданным выдачи
+                print("⚠️ Не удалось получить trackId, поиск по bundleId:", e)
+                track_ids = cached_track_ids(bundle_ids)
+
+        ids = search_ids(search_term, country, max_results, backend)
+        positions = {}
+        for idx, track_id in enumerate(ids):
+            positions.setdefault(track_id, idx + 1)
+
+        # Приложения с известным trackId находим прямо в списке ID
+        unresolved = set()
+        for bundle_id in ranks:
+            if track_ids.get(bundle_id) is not None:
+                ranks[bundle_id] = positions.get(track_ids[bundle_id])
+            else:
+                unresolved.add(bundle_id)
+
+        # Остальные ищем по bundleId в метаданных, расширяя окно
+        if unresolved:
+            if last_rank is None:
+                last_rank = _last_ranks.get((search_term, country, bundle_ids[0]))
+
+            start = 0
+            for end in probe_windows(len(ids), last_rank):
+                for app in lookup_apps(ids[start:end], "id", country, backend):
+                    bundle_id = app.get("appId")
+                    if bundle_id in unresolved:
+                        unresolved.discard(bundle_id)
+                        ranks[bundle_id] = positions.get(int(app.get("id")))
+                if not unresolved:
+                    break
+                start = end
+
+        target_rank = ranks[bundle_ids[0]]
+        _last_ranks[(search_term, country, bundle_ids[0])] = target_rank
+        if target_rank:
+            print(f"✅ Найдено! Позиция: #{target_rank}")
+        else:
+            print("❌ Не найдено в результатах")
+        return ranks
+
+    except NodeWorkerError as e:
+        print("❌ Ошибка Node.js:", e)
+        if raise_errors:
+            raise
+        return ranks
+    except requests.RequestException as e:
+        print("❌ Ошибка HTTP:", e)
+        if raise_errors:
+            raise
+        return ranks
     except Exception as e:
         print("❌ Ошибка Python:", str(e))
-        return None
+        if raise_errors:
+            raise
+        return ranks
+
+def get_rank(search_term: str, target_bundle_id: str, country: str = "us", max_results: int = 250, backend: str = None, ids_only: bool = True, last_rank: int = None):
+    """
+    Получает позицию приложения в App Store по ключевому слову
+
+    В режиме ids_only сравнивается trackId приложения со списком ID выдачи,
+    без загрузки метаданных всех найденных приложений. Если trackId получить
+    не удалось, используется полный поиск по bundleId.
+    """
+    return get_ranks(search_term, [target_bundle_id], country, max_results, backend, ids_only, last_rank)[target_bundle_id]
 
-def search_app_in_store(search_term: str, bundle_id: str, country: str = "us", max_results: int = 250):
+def search_app_in_store(search_term: str, bundle_id: str, country: str = "us", max_results: int = 250, backend: str = None):
     """Алиас для get_rank для обратной совместимости"""
-    return get_rank(search_term, bundle_id, country, max_results) 
\ No newline at end of file
+    return get_rank(search_term, bundle_id, country, max_results, backend) 
\ No newline at end of file
@@ -1,16 +1,77 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import subprocess
-import json
 import sys
 import os
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Добавляем путь к корневой папке проекта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from src.utils.country_utils import get_country_name
+from src.scrapers.node_worker import call_node, NodeWorkerError
+from src.scrapers.appstore_scraper import lookup_apps
+from src.scrapers.itunes_client import LOOKUP_BATCH_SIZE, store_id
+from src.utils.rate_limiter import KeyedRateLimiter
+
+# Кэш чартов на время запуска: (country, collection, category) → (apps, {bundleId: позиция})
+_chart_cache = {}
+_chart_locks = {}
+_chart_cache_lock = threading.Lock()
+
+def get_chart(country: str = "us", collection: str = "topfreeapplications", category: int = 0):
+    """
+    Получает чарт (до 200 приложений) один раз за запуск
+
+    Args:
+        country: Код страны
+        collection: Тип чарта
+        category: ID категории (0 = все категории)
+
+    Returns:
+        tuple: (список приложений, словарь bundleId → позиция)
+    """
+    key = (country.lower(), collection, category)
+    with _chart_cache_lock:
+        if key in _chart_cache:
+            return _chart_cache[key]
+        key_lock = _chart_locks.setdefault(key, threading.Lock())
+
+    # Один и тот же чарт загружается только одним потоком
+    with key_lock:
+        with _chart_cache_lock:
+            if key in _chart_cache:
+                return _chart_cache[key]
+
+        apps = call_node("list", {
+            "country": country,
+            "category": category,
+            "collection": collection,
+            "num": 200
+        })
+        index = {}
+        for idx, app in enumerate(apps):
+            index.setdefault(app.get("appId"), idx + 1)
+
+        with _chart_cache_lock:
+            _chart_cache[key] = (apps, index)
+        return apps, index
+
+def clear_chart_cache():
+    """Очищает кэш чартов (например, между итерациями мониторинга)"""
+    with _chart_cache_lock:
+        _chart_cache.clear()
+
+def get_chart_positions(bundle_ids: list, country: str = "us", collection: str = "topfreeapplications", category: int = 0):
+    """
+    Получает позиции нескольких приложений в одном чарте без повторных запросов
+
+    Returns:
+        dict: bundleId → позиция (None, если приложения нет в чарте)
+    """
+    _, index = get_chart(country, collection, category)
+    return {bundle_id: index.get(bundle_id) for bundle_id in bundle_ids}
 
 def get_app_charts(bundle_id: str, country: str = "us", chart_type: str = "topfreeapplications"):
     """
@@ -28,52 +89,30 @@ def get_app_charts(bundle_id: str, country: str = "us", chart_type: str = "topfr
         country_name = get_country_name(country)
         print(f"📊 Проверка чарта {chart_type} | Страна: {country_name}...")
 
-        node_code = f"""
-        import store from 'app-store-scraper';
-        
-        store.list({{
-            country: "{country}",
-            category: 0,  // Все категории
-            collection: "{chart_type}",
-            num: 200
-        }}).then(results => {{
-            console.log(JSON.stringify(results));
-        }}).catch(err => {{
-            console.error("ERR", err.message);
-            process.exit(1);
-        }});
-        """
-
-        result = subprocess.run(
-            ["node", "--input-type=module", "-e", node_code],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-
-        apps = json.loads(result.stdout)
+        apps, index = get_chart(country, chart_type, 0)  # Все категории
 
-        for idx, app in enumerate(apps):
-            if app.get("appId") == bundle_id:
-                print(f"✅ Найдено в чарте {chart_type}! Позиция: #{idx + 1}")
-                return {
-                    "position": idx + 1,
-                    "chart_type": chart_type,
-                    "country": country,
-                    "total_apps": len(apps),
-                    "app_info": {
-                        "name": app.get("title", ""),
-                        "rating": app.get("score", 0),
-                        "reviews": app.get("reviews", 0),
-                        "price": app.get("price", "Free")
-                    }
+        position = index.get(bundle_id)
+        if position:
+            app = apps[position - 1]
+            print(f"✅ Найдено в чарте {chart_type}! Позиция: #{position}")
+            return {
+                "position": position,
+                "chart_type": chart_type,
+                "country": country,
+                "total_apps": len(apps),
+                "app_info": {
+                    "name": app.get("title", ""),
+                    "rating": app.get("score", 0),
+                    "reviews": app.get("reviews", 0),
+                    "price": app.get("price", "Free")
                 }
+            }
 
         print(f"❌ Не найдено в чарте {chart_type}")
         return None
 
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Ошибка Node.js при получении чарта {chart_type}:", e.stderr)
+    except NodeWorkerError as e:
+        print(f"❌ Ошибка Node.js при получении чарта {chart_type}:", e)
         return None
     except Exception as e:
         print(f"❌ Ошибка Python при получении чарта {chart_type}:", str(e))
@@ -126,51 +165,29 @@ def get_category_charts(bundle_id: str, country: str = "us", category_id: int =
         country_name = get_country_name(country)
         print(f"📊 Проверка категории {category_id} | Страна: {country_name}...")
 
-        node_code = f"""
-        import store from 'app-store-scraper';
-        
-        store.list({{
-            country: "{country}",
-            category: {category_id},
-            collection: "topfreeapplications",
-            num: 200
-        }}).then(results => {{
-            console.log(JSON.stringify(results));
-        }}).catch(err => {{
-            console.error("ERR", err.message);
-            process.exit(1);
-        }});
-        """
-
-        result = subprocess.run(
-            ["node", "--input-type=module", "-e", node_code],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-
-        apps = json.loads(result.stdout)
+        apps, index = get_chart(country, "topfreeapplications", category_id)
 
-        for idx, app in enumerate(apps):
-            if app.get("appId") == bundle_id:
-                print(f"✅ Найдено в категории! Позиция: #{idx + 1}")
-                return {
-                    "position": idx + 1,
-                    "category_id": category_id,
-                    "country": country,
-                    "total_apps": len(apps),
-                    "app_info": {
-                        "name": app.get("title", ""),
-                        "rating": app.get("score", 0),
-                        "reviews": app.get("reviews", 0)
-                    }
+        position = index.get(bundle_id)
+        if position:
+            app = apps[position - 1]
+            print(f"✅ Найдено в категории! Позиция: #{position}")
+            return {
+                "position": position,
+                "category_id": category_id,
+                "country": country,
+                "total_apps": len(apps),
+                "app_info": {
+                    "name": app.get("title", ""),
+                    "rating": app.get("score", 0),
+                    "reviews": app.get("reviews", 0)
                 }
+            }
 
         print(f"❌ Не найдено в категории {category_id}")
         return None
 
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Ошибка Node.js при получении категории {category_id}:", e.stderr)
+    except NodeWorkerError as e:
+        print(f"❌ Ошибка Node.js при получении категории {category_id}:", e)
         return None
     except Exception as e:
         print(f"❌ Ошибка Python при получении категории {category_id}:", str(e))
@@ -235,6 +252,22 @@ def get_category_name(category_id: int):
     """Получает название категории по ID"""
     return CATEGORIES.get(category_id, f"Category {category_id}")
 
+def format_app_info(app_data: dict):
+    """Приводит метаданные приложения к краткому формату get_app_info"""
+    description = app_data.get("description") or ""
+    return {
+        "title": app_data.get("title", ""),
+        "developer": app_data.get("developer", ""),
+        "category": app_data.get("category", app_data.get("primaryGenre", "")),
+        "rating": app_data.get("score", 0),
+        "reviews": app_data.get("reviews", 0),
+        "price": app_data.get("price", "Free"),
+        "version": app_data.get("version", ""),
+        "size": app_data.get("size", ""),
+        "updated": app_data.get("updated", ""),
+        "description": description[:200] + "..." if len(description) > 200 else description
+    }
+
 def get_app_info(bundle_id: str, country: str = "us"):
     """
     Получает детальную информацию о приложении
@@ -250,91 +283,96 @@ def get_app_info(bundle_id: str, country: str = "us"):
         country_name = get_country_name(country)
         print(f"📱 Получение информации о приложении | Страна: {country_name}...")
 
-        node_code = f"""
-        import store from 'app-store-scraper';
-        
-        store.app({{
-            id: "{bundle_id}",
-            country: "{country}"
-        }}).then(result => {{
-            console.log(JSON.stringify(result));
-        }}).catch(err => {{
-            console.error("ERR", err.message);
-            process.exit(1);
-        }});
-        """
-
-        result = subprocess.run(
-            ["node", "--input-type=module", "-e", node_code],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-
-        app_data = json.loads(result.stdout)
+        app_data = call_node("app", {
+            "appId": bundle_id,
+            "country": country
+        })
         
         if app_data:
             print(f"✅ Информация получена: {app_data.get('title', 'Unknown')}")
-            return {
-                "title": app_data.get("title", ""),
-                "developer": app_data.get("developer", ""),
-                "category": app_data.get("category", ""),
-                "rating": app_data.get("score", 0),
-                "reviews": app_data.get("reviews", 0),
-                "price": app_data.get("price", "Free"),
-                "version": app_data.get("version", ""),
-                "size": app_data.get("size", ""),
-                "updated": app_data.get("updated", ""),
-                "description": app_data.get("description", "")[:200] + "..." if len(app_data.get("description", "")) > 200 else app_data.get("description", "")
-            }
+            return format_app_info(app_data)
         else:
             print("❌ Информация о приложении не найдена")
             return None
 
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Ошибка Node.js при получении информации о приложении:", e.stderr)
+    except NodeWorkerError as e:
+        print(f"❌ Ошибка Node.js при получении информации о приложении:", e)
         return None
     except Exception as e:
         print(f"❌ Ошибка Python при получении информации о приложении:", str(e))
         return None 
 
-def get_search_suggestions(query: str, country: str = "us"):
+def get_apps_info(bundle_ids: list, country: str = "us", backend: str = None, max_workers: int = 4):
+    """
+    Получает информацию о многих приложениях пакетными lookup запросами
+
+    ID делятся на пакеты по LOOKUP_BATCH_SIZE, пакеты запрашиваются
+    параллельно.
+
+    Args:
+        bundle_ids: Список bundleId
+        country: Код страны
+        backend: Бэкенд запросов (node или python)
+        max_workers: Количество параллельных запросов
+
+    Returns:
+        dict: bundleId → информация о приложении (None, если не найдено)
+    """
+    country_name = get_country_name(country)
+    bundle_ids = list(dict.fromkeys(bundle_ids))
+    print(f"📱 Получение информации о {len(bundle_ids)} приложениях | Страна: {country_name}...")
+
+    results = {bundle_id: None for bundle_id in bundle_ids}
+    chunks = [bundle_ids[i:i + LOOKUP_BATCH_SIZE] for i in range(0, len(bundle_ids), LOOKUP_BATCH_SIZE)]
+
+    def fetch(chunk):
+        try:
+            return lookup_apps(chunk, "bundleId", country, backend)
+        except Exception as e:
+            print(f"❌ Ошибка при получении информации о приложениях:", e)
+            return []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for apps in pool.map(fetch, chunks):
+            for app_data in apps:
+                if app_data.get("appId") in results:
+                    results[app_data["appId"]] = format_app_info(app_data)
+
+    found = sum(1 for info in results.values() if info)
+    print(f"✅ Информация получена: {found}/{len(bundle_ids)}")
+    return results
+
+# Подсказки, полученные за время запуска: (термин, ID витрины) → список
+_suggestions_memo = {}
+_suggestions_memo_lock = threading.Lock()
+
+# Параметры краулера подсказок
+SUGGESTIONS_CONCURRENCY = 4
+SUGGESTIONS_COUNTRY_RATE = 1.0
+
+def normalize_term(term: str):
+    """Нормализует поисковый термин (регистр и пробелы) для дедупликации"""
+    return " ".join(term.lower().split())
+
+def get_search_suggestions(query: str, country: str = "us", memoize: bool = True, none_on_error: bool = False):
     """
     Получает поисковые подсказки для запроса
     
     Args:
         query: Поисковый запрос
         country: Код страны
+        memoize: Запоминать ответ до конца запуска
+        none_on_error: При ошибке запроса вернуть None, а не пустой список
+            (чтобы отличить сбой от пустого ответа)
     
     Returns:
-        list: Список подсказок
+        list | None: Список подсказок
     """
     try:
         country_name = get_country_name(country)
         print(f"🔍 Поиск подсказок для '{query}' | Страна: {country_name}...")
 
-        node_code = f"""
-        import store from 'app-store-scraper';
-        
-        store.suggest({{
-            term: "{query}",
-            country: "{country}"
-        }}).then(results => {{
-            console.log(JSON.stringify(results));
-        }}).catch(err => {{
-            console.error("ERR", err.message);
-            process.exit(1);
-        }});
-        """
-
-        result = subprocess.run(
-            ["node", "--input-type=module", "-e", node_code],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-
-        suggestions = json.loads(result.stdout)
+        suggestions = fetch_suggestions(query, country, memoize)
         
         if suggestions:
             print(f"✅ Найдено {len(suggestions)} подсказок")
@@ -343,12 +381,99 @@ def get_search_suggestions(query: str, country: str = "us"):
             print("❌ Подсказки не найдены")
             return []
 
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Ошибка Node.js при получении подсказок:", e.stderr)
-        return []
+    except NodeWorkerError as e:
+        print(f"❌ Ошибка Node.js при получении подсказок:", e)
+        return None if none_on_error else []
     except Exception as e:
         print(f"❌ Ошибка Python при получении подсказок:", str(e))
-        return []
+        return None if none_on_error else []
+
+def fetch_suggestions(query: str, country: str = "us", memoize: bool = True):
+    """
+    Получает подсказки с мемоизацией (ошибки пробрасываются и не кэшируются)
+
+    Одинаковые после нормализации запросы к одной витрине выполняются
+    один раз за запуск; между запусками ответы хранит дисковый кэш.
+    С memoize=False ответ не запоминается (однократный обход, который
+    не должен держать все ответы в памяти).
+    """
+    key = (normalize_term(query), store_id(country))
+    with _suggestions_memo_lock:
+        if key in _suggestions_memo:
+            return _suggestions_memo[key]
+
+    suggestions = call_node("suggest", {
+        "term": key[0],
+        "country": country
+    }) or []
+
+    if memoize:
+        with _suggestions_memo_lock:
+            _suggestions_memo[key] = suggestions
+    return suggestions
+
+def iter_suggestions(keywords: list, countries: list, concurrency: int = SUGGESTIONS_CONCURRENCY, country_rate: float = SUGGESTIONS_COUNTRY_RATE, memoize: bool = True, none_on_error: bool = False):
+    """
+    Получает подсказки для всех пар (ключевое слово, страна) параллельно
+    и отдает их по мере получения
+
+    Запросы дедуплицируются по нормализованному термину и витрине, темп
+    запросов к каждой витрине ограничивается token bucket. Ответ на
+    запрос отдается сразу для всех пар, которые к нему сводятся, и
+    больше не хранится.
+
+    Args:
+        keywords: Список ключевых слов
+        countries: Список кодов стран
+        concurrency: Количество одновременных запросов
+        country_rate: Запросов в секунду к одной витрине
+        memoize: Запоминать ответы до конца запуска (см. fetch_suggestions)
+        none_on_error: Для неудачных запросов отдавать None вместо пустого списка
+
+    Yields:
+        tuple: (страна, ключевое слово, подсказки)
+    """
+    limiter = KeyedRateLimiter(country_rate)
+
+    # Уникальные запросы: (термин, витрина) → пары (ключевое слово, страна)
+    tasks = {}
+    for country in countries:
+        for keyword in keywords:
+            tasks.setdefault((normalize_term(keyword), store_id(country)), []).append((keyword, country))
+
+    print(f"🔍 Запросов подсказок: {len(tasks)} (пар ключевое слово/страна: {len(keywords) * len(countries)})")
+
+    def fetch(task):
+        (term, _), pairs = task
+        country = pairs[0][1]
+        limiter.acquire(store_id(country))
+        return get_search_suggestions(term, country, memoize, none_on_error)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(fetch, task): task[1] for task in tasks.items()}
+        for future in as_completed(futures):
+            suggestions = future.result()
+            for keyword, country in futures.pop(future):
+                yield country, keyword, suggestions
+
+def crawl_suggestions(keywords: list, countries: list, concurrency: int = SUGGESTIONS_CONCURRENCY, country_rate: float = SUGGESTIONS_COUNTRY_RATE, none_on_error: bool = False):
+    """
+    Получает подсказки для всех пар (ключевое слово, страна) параллельно
+
+    Args:
+        keywords: Список ключевых слов
+        countries: Список кодов стран
+        concurrency: Количество одновременных запросов
+        country_rate: Запросов в секунду к одной витрине
+        none_on_error: Подсказки неудачных запросов — None вместо пустого списка
+
+    Returns:
+        dict: {страна: {ключевое слово: подсказки}}
+    """
+    results = {country: {} for country in countries}
+    for country, keyword, suggestions in iter_suggestions(keywords, countries, concurrency, country_rate, none_on_error=none_on_error):
+        results[country][keyword] = suggestions
+    return {country: {keyword: results[country][keyword] for keyword in keywords} for country in countries}
 
 def get_suggestions_for_keywords(keywords: list, country: str = "us"):
     """
@@ -361,14 +486,4 @@ def get_suggestions_for_keywords(keywords: list, country: str = "us"):
     Returns:
         dict: Словарь с подсказками для каждого ключевого слова
     """
-    results = {}
-    
-    for keyword in keywords:
-        print(f"\n📝 Обработка ключевого слова: '{keyword}'")
-        suggestions = get_search_suggestions(keyword, country)
-        results[keyword] = suggestions
-        
-        # Пауза между запросами
-        time.sleep(3)
-    
-    return results 
\ No newline at end of file
+    return crawl_suggestions(keywords, [country])[country]
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Клиент App Store на чистом Python (без Node.js).
+
+Использует те же эндпоинты, что и app-store-scraper: поиск через
+search.itunes.apple.com с заголовком X-Apple-Store-Front и пакетный
+lookup через itunes.apple.com/lookup. Все запросы идут через одну
+requests.Session, поэтому TCP/TLS соединение переиспользуется.
+"""
+
+import sys
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils.rate_limiter import throttled_call
+from src.utils.response_cache import cached_call
+
+SEARCH_URL = "https://search.itunes.apple.com/WebObjects/MZStore.woa/wa/search"
+LOOKUP_URL = "https://itunes.apple.com/lookup"
+
+# Максимальное количество ID в одном lookup запросе
+LOOKUP_BATCH_SIZE = 200
+
+# Таймаут HTTP запросов (секунды)
+REQUEST_TIMEOUT = 30
+
+# ID витрин App Store (аналог common.storeId / constants.markets в app-store-scraper)
+DEFAULT_STORE_ID = "143441"
+STORE_IDS = {
+    "DZ": "143563",
+    "AO": "143564",
+    "AI": "143538",
+    "AR": "143505",
+    "AM": "143524",
+    "AU": "143460",
+    "AT": "143445",
+    "AZ": "143568",
+    "BH": "143559",
+    "BB": "143541",
+    "BY": "143565",
+    "BE": "143446",
+    "BZ": "143555",
+    "BM": "143542",
+    "BO": "143556",
+    "BW": "143525",
+    "BR": "143503",
+    "VG": "143543",
+    "BN": "143560",
+    "BG": "143526",
+    "CA": "143455",
+    "KY": "143544",
+    "CL": "143483",
+    "CN": "143465",
+    "CO": "143501",
+    "CR": "143495",
+    "HR": "143494",
+    "CY": "143557",
+    "CZ": "143489",
+    "DK": "143458",
+    "DM": "143545",
+    "EC": "143509",
+    "EG": "143516",
+    "SV": "143506",
+    "EE": "143518",
+    "FI": "143447",
+    "FR": "143442",
+    "DE": "143443",
+    "GB": "143444",
+    "GH": "143573",
+    "GR": "143448",
+    "GD": "143546",
+    "GT": "143504",
+    "GY": "143553",
+    "HN": "143510",
+    "HK": "143463",
+    "HU": "143482",
+    "IS": "143558",
+    "IN": "143467",
+    "ID": "143476",
+    "IE": "143449",
+    "IL": "143491",
+    "IT": "143450",
+    "JM": "143511",
+    "JP": "143462",
+    "JO": "143528",
+    "KE": "143529",
+    "KR": "143466",
+    "KW": "143493",
+    "LV": "143519",
+    "LB": "143497",
+    "LT": "143520",
+    "LU": "143451",
+    "MO": "143515",
+    "MK": "143530",
+    "MG": "143531",
+    "MY": "143473",
+    "ML": "143532",
+    "MT": "143521",
+    "MU": "143533",
+    "MX": "143468",
+    "MS": "143547",
+    "NP": "143484",
+    "NL": "143452",
+    "NZ": "143461",
+    "NI": "143512",
+    "NE": "143534",
+    "NG": "143561",
+    "NO": "143457",
+    "OM": "143562",
+    "PK": "143477",
+    "PA": "143485",
+    "PY": "143513",
+    "PE": "143507",
+    "PH": "143474",
+    "PL": "143478",
+    "PT": "143453",
+    "QA": "143498",
+    "RO": "143487",
+    "RU": "143469",
+    "SA": "143479",
+    "SN": "143535",
+    "SG": "143464",
+    "SK": "143496",
+    "SI": "143499",
+    "ZA": "143472",
+    "ES": "143454",
+    "LK": "143486",
+    "SR": "143554",
+    "SE": "143456",
+    "CH": "143459",
+    "TW": "143470",
+    "TZ": "143572",
+    "TH": "143475",
+    "TN": "143536",
+    "TR": "143480",
+    "UG": "143537",
+    "UA": "143492",
+    "AE": "143481",
+    "US": "143441",
+    "UY": "143514",
+    "UZ": "143566",
+    "VE": "143502",
+    "VN": "143471",
+    "YE": "143571"
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Возвращает общую HTTP сессию с keep-alive и пулом соединений"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def store_id(country: str):
+    """Получает ID витрины по коду страны (по умолчанию US)"""
+    return (country and STORE_IDS.get(country.upper())) or DEFAULT_STORE_ID
+
+def clean_app(app: dict):
+    """Приводит ответ lookup к формату app-store-scraper"""
+    return {
+        "id": app.get("trackId"),
+        "appId": app.get("bundleId"),
+        "title": app.get("trackName"),
+        "url": app.get("trackViewUrl"),
+        "description": app.get("description"),
+        "icon": app.get("artworkUrl512") or app.get("artworkUrl100") or app.get("artworkUrl60"),
+        "genres": app.get("genres"),
+        "genreIds": app.get("genreIds"),
+        "primaryGenre": app.get("primaryGenreName"),
+        "primaryGenreId": app.get("primaryGenreId"),
+        "contentRating": app.get("contentAdvisoryRating"),
+        "languages": app.get("languageCodesISO2A"),
+        "size": app.get("fileSizeBytes"),
+        "requiredOsVersion": app.get("minimumOsVersion"),
+        "released": app.get("releaseDate"),
+        "updated": app.get("currentVersionReleaseDate") or app.get("releaseDate"),
+        "releaseNotes": app.get("releaseNotes"),
+        "version": app.get("version"),
+        "price": app.get("price"),
+        "currency": app.get("currency"),
+        "free": app.get("price") == 0,
+        "developerId": app.get("artistId"),
+        "developer": app.get("artistName"),
+        "developerUrl": app.get("artistViewUrl"),
+        "developerWebsite": app.get("sellerUrl"),
+        "score": app.get("averageUserRating"),
+        "reviews": app.get("userRatingCount"),
+        "currentVersionScore": app.get("averageUserRatingForCurrentVersion"),
+        "currentVersionReviews": app.get("userRatingCountForCurrentVersion"),
+        "screenshots": app.get("screenshotUrls"),
+        "ipadScreenshots": app.get("ipadScreenshotUrls"),
+        "appletvScreenshots": app.get("appletvScreenshotUrls"),
+        "supportedDevices": app.get("supportedDevices")
+    }
+
+def _request_json(url: str, params: dict, headers: dict = None):
+    """Выполняет GET запрос через общую сессию и возвращает JSON"""
+    response = get_session().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def _get_json(endpoint: str, url: str, params: dict, headers: dict = None):
+    """GET запрос через кэш ответов и общий регулятор темпа (повторы при 403/429/5xx)"""
+    key = {"params": params, "headers": headers or {}}
+    return cached_call(endpoint, key, throttled_call, _request_json, url, params, headers)
+
+def search_ids(term: str, country: str = "us", num: int = 50, page: int = 1, lang: str = "en-us"):
+    """
+    Получает упорядоченный список trackId по поисковому запросу
+
+    Args:
+        term: Поисковый запрос
+        country: Код страны
+        num: Количество результатов на странице
+        page: Номер страницы (с 1)
+        lang: Язык (заголовок Accept-Language)
+
+    Returns:
+        list: Список trackId в порядке выдачи
+    """
+    params = {
+        "clientApplication": "Software",
+        "media": "software",
+        "term": term
+    }
+    headers = {
+        "X-Apple-Store-Front": f"{store_id(country)},24 t:native",
+        "Accept-Language": lang
+    }
+    data = _get_json("search_ids", SEARCH_URL, params, headers)
+    bubbles = data.get("bubbles") or []
+    results = (bubbles[0].get("results") if bubbles else None) or []
+
+    # Apple отдает id строкой, приводим к числу как trackId в lookup
+    start = num * (page - 1)
+    return [int(item["id"]) for item in results[start:start + num] if item.get("id")]
+
+def lookup(ids: list, id_field: str = "id", country: str = "us", lang: str = None):
+    """
+    Получает метаданные приложений пакетами по LOOKUP_BATCH_SIZE
+
+    Args:
+        ids: Список trackId или bundleId
+        id_field: Поле поиска ("id" или "bundleId")
+        country: Код страны
+        lang: Язык
+
+    Returns:
+        list: Приложения в формате app-store-scraper
+    """
+    apps = []
+    for start in range(0, len(ids), LOOKUP_BATCH_SIZE):
+        chunk = ids[start:start + LOOKUP_BATCH_SIZE]
+        params = {
+            id_field: ",".join(str(i) for i in chunk),
+            "country": country,
+            "entity": "software"
+        }
+        if lang:
+            params["lang"] = lang
+        data = _get_json("lookup", LOOKUP_URL, params)
+        for app in data.get("results", []):
+            if app.get("wrapperType") in (None, "software"):
+                apps.append(clean_app(app))
+    return apps
+
+def search(term: str, country: str = "us", num: int = 50, page: int = 1, lang: str = "en-us"):
+    """Поиск приложений с полными метаданными (аналог store.search)"""
+    ids = search_ids(term, country, num, page, lang)
+    if not ids:
+        return []
+    # lookup не гарантирует порядок, восстанавливаем порядок выдачи
+    apps_by_id = {app["id"]: app for app in lookup(ids, "id", country, lang)}
+    return [apps_by_id[i] for i in ids if i in apps_by_id]
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Долгоживущий Node.js процесс для вызовов app-store-scraper.
+
+Вместо запуска `node -e` на каждый запрос держим один процесс, который
+читает JSON-строки запросов из stdin и пишет JSON-строки ответов в stdout.
+Каждый запрос имеет свой id, поэтому несколько запросов могут выполняться
+одновременно. Если процесс упал, он перезапускается при следующем вызове.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils.rate_limiter import throttled_call
+from src.utils.response_cache import cached_call
+
+# Код воркера: один запрос = одна строка JSON {"id", "method", "opts"}
+WORKER_CODE = """
+import store from 'app-store-scraper';
+import common from 'app-store-scraper/lib/common.js';
+import readline from 'readline';
+
+// Методы app-store-scraper плюс пакетный lookup по списку ID
+const methods = Object.assign({}, store, {
+    lookup: (opts) => common.lookup(opts.ids, opts.idField, opts.country, opts.lang)
+});
+
+const rl = readline.createInterface({ input: process.stdin });
+
+function reply(payload) {
+    process.stdout.write(JSON.stringify(payload) + "\\n");
+}
+
+rl.on('line', (line) => {
+    let req;
+    try {
+        req = JSON.parse(line);
+    } catch (err) {
+        return;
+    }
+    const fn = methods[req.method];
+    Promise.resolve()
+        .then(() => {
+            if (typeof fn !== 'function') {
+                throw new Error(`Unknown method ${req.method}`);
+            }
+            return fn(req.opts || {});
+        })
+        .then(result => {
+            reply({ id: req.id, ok: true, result: result });
+        })
+        .catch(err => {
+            const status = err && err.response ? err.response.statusCode : null;
+            const code = err && err.code ? err.code : null;
+            const message = err && err.message ? err.message : `HTTP ${status}`;
+            reply({ id: req.id, ok: false, error: `ERR ${message}`, status: status, code: code });
+        });
+});
+"""
+
+# Таймаут одного запроса к воркеру (секунды)
+DEFAULT_TIMEOUT = 120
+
+
+class NodeWorkerError(Exception):
+    """Ошибка выполнения запроса в Node.js воркере"""
+
+    def __init__(self, message, status=None, code=None):
+        super().__init__(message)
+        # HTTP статус ответа App Store (если ошибка пришла от сервера)
+        self.status = status
+        # Сетевой код ошибки (ENOTFOUND, ECONNRESET, ...) — такие ошибки можно повторить
+        self.code = code
+        self.retryable = code is not None
+
+
+class NodeWorker:
+    """Постоянный Node.js процесс с протоколом JSON-lines"""
+
+    def __init__(self, cwd=None):
+        self.cwd = cwd or os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self._process = None
+        self._reader = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """Запускает Node.js процесс и поток чтения ответов"""
+        self._process = subprocess.Popen(
+            ["node", "--input-type=module", "-e", WORKER_CODE],
+            cwd=self.cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self._reader = threading.Thread(target=self._read_loop, args=(self._process,), daemon=True)
+        self._reader.start()
+        threading.Thread(target=self._drain_stderr, args=(self._process,), daemon=True).start()
+
+    def _read_loop(self, process):
+        """Читает ответы воркера и передает их ожидающим запросам"""
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                waiter = self._pending.pop(response.get("id"), None)
+            if waiter:
+                waiter["response"] = response
+                waiter["event"].set()
+
+        # Процесс завершился: все ожидающие запросы получают ошибку
+        with self._lock:
+            if self._process is process:
+                self._process = None
+            pending = [w for w in self._pending.values() if w["process"] is process]
+            for rid in [rid for rid, w in self._pending.items() if w["process"] is process]:
+                del self._pending[rid]
+        for waiter in pending:
+            waiter["response"] = {"ok": False, "error": "ERR Node.js worker exited", "code": "EWORKER", "crashed": True}
+            waiter["event"].set()
+
+    def _drain_stderr(self, process):
+        """Печатает stderr воркера, чтобы буфер не переполнялся"""
+        for line in process.stderr:
+            line = line.rstrip()
+            if line:
+                print("⚠️ Node.js:", line)
+
+    def _send(self, method, opts, timeout):
+        """Отправляет один запрос и ждет ответ"""
+        waiter = {"event": threading.Event(), "response": None}
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            request_id = next(self._ids)
+            waiter["process"] = self._process
+            self._pending[request_id] = waiter
+            payload = json.dumps({"id": request_id, "method": method, "opts": opts}, ensure_ascii=False)
+            try:
+                self._process.stdin.write(payload + "\n")
+                self._process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                del self._pending[request_id]
+                self._process = None
+                return {"ok": False, "error": "ERR Node.js worker pipe closed", "code": "EWORKER", "crashed": True}
+
+        if not waiter["event"].wait(timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise NodeWorkerError(f"ERR timeout after {timeout}s ({method})", code="ETIMEOUT")
+        return waiter["response"]
+
+    def call(self, method, opts=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Вызывает метод app-store-scraper в воркере
+
+        Args:
+            method: Имя метода (search, list, app, suggest, lookup, ...)
+            opts: Параметры метода
+            timeout: Таймаут ожидания ответа в секундах
+
+        Returns:
+            Результат метода (уже распарсенный JSON)
+        """
+        response = self._send(method, opts or {}, timeout)
+        # Воркер упал во время запроса: перезапускаем и повторяем один раз
+        if response.get("crashed"):
+            response = self._send(method, opts or {}, timeout)
+
+        if not response.get("ok"):
+            raise NodeWorkerError(response.get("error", "ERR unknown"), response.get("status"), response.get("code"))
+        return response.get("result")
+
+    def close(self):
+        """Останавливает Node.js процесс"""
+        with self._lock:
+            process, self._process = self._process, None
+        if process and process.poll() is None:
+            try:
+                process.stdin.close()
+                process.wait(timeout=5)
+            except Exception:
+                process.kill()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """Возвращает общий экземпляр воркера (создается при первом обращении)"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = NodeWorker()
+            atexit.register(_worker.close)
+        return _worker
+
+
+def call_node(method, opts=None, timeout=DEFAULT_TIMEOUT):
+    """Вызывает метод app-store-scraper через общий воркер (с кэшем ответов, троттлингом и повторами)"""
+    return cached_call(method, opts or {}, throttled_call, get_worker().call, method, opts, timeout)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Адаптивное расписание проверок пар (ключевое слово, страна).
+
+Вместо проверки всех пар раз в час каждая пара получает свой интервал:
+чем сильнее менялась позиция за последние проверки и чем выше приложение
+в выдаче, тем чаще проверка. Интервалы ограничены снизу и сверху и
+масштабируются так, чтобы суммарно укладываться в бюджет запросов в час.
+Очередь проверок — куча по времени следующей проверки.
+"""
+
+import heapq
+import itertools
+import json
+import math
+import os
+import time
+from collections import deque
+
+# Границы интервала проверки одной пары (секунды)
+MIN_INTERVAL = 600
+MAX_INTERVAL = 6 * 3600
+
+# Интервал пары с весом 1
+BASE_INTERVAL = 3600
+
+# Сколько последних наблюдений учитывается при расчете изменчивости
+VOLATILITY_WINDOW = 8
+
+# Пары, срок которых наступает в пределах этого окна, проверяются вместе
+BATCH_WINDOW = 60
+
+# Как часто проверять, не изменился ли keywords.json (секунды)
+KEYWORDS_POLL_INTERVAL = 30
+
+def rank_volatility(ranks, limit):
+    """
+    Изменчивость позиции: среднее абсолютное изменение между соседними
+    наблюдениями ("не найдено" считается позицией limit + 1)
+    """
+    values = [limit + 1 if rank is None else rank for rank in ranks]
+    if len(values) < 2:
+        return 0.0
+    return sum(abs(b - a) for a, b in zip(values, values[1:])) / (len(values) - 1)
+
+def rank_importance(rank):
+    """Важность пары по текущей позиции: верх выдачи важнее"""
+    if rank is None:
+        return 0.5
+    if rank <= 10:
+        return 2.0
+    if rank <= 50:
+        return 1.0
+    return 0.75
+
+def pair_weight(ranks, limit):
+    """Вес пары: важность × (1 + log(1 + изменчивость))"""
+    current = ranks[-1] if ranks else None
+    return rank_importance(current) * (1 + math.log1p(rank_volatility(ranks, limit)))
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+def fit_intervals(weights, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, requests_per_hour=None):
+    """
+    Рассчитывает интервалы проверки по весам пар
+
+    Интервал пары — BASE_INTERVAL / вес, умноженный на общий коэффициент.
+    Коэффициент подбирается бинарным поиском так, чтобы суммарное число
+    запросов в час было как можно ближе к бюджету, но не больше него
+    (с учетом ограничений min_interval/max_interval).
+
+    Args:
+        weights: Словарь {пара: вес}
+        requests_per_hour: Бюджет запросов в час (по умолчанию — число пар,
+            то есть та же нагрузка, что и при проверке всех пар раз в час)
+
+    Returns:
+        dict: {пара: интервал в секундах}
+    """
+    if not weights:
+        return {}
+    budget = requests_per_hour or len(weights)
+    raw = {key: BASE_INTERVAL / max(weight, 1e-6) for key, weight in weights.items()}
+
+    def intervals_for(factor):
+        return {key: _clamp(value * factor, min_interval, max_interval) for key, value in raw.items()}
+
+    def rate(intervals):
+        return sum(3600 / interval for interval in intervals.values())
+
+    # Все пары на нижней границе укладываются в бюджет
+    low = min_interval / max(raw.values())
+    if rate(intervals_for(low)) <= budget:
+        return intervals_for(low)
+
+    # Даже верхняя граница не укладывается — бюджет недостижим
+    high = max_interval / min(raw.values())
+    if rate(intervals_for(high)) > budget:
+        print(f"⚠️ Бюджет {budget} запросов/час недостижим при интервале до {max_interval} с")
+        return intervals_for(high)
+
+    # Бинарный поиск наименьшего коэффициента, укладывающегося в бюджет
+    for _ in range(60):
+        middle = math.sqrt(low * high)
+        if rate(intervals_for(middle)) > budget:
+            low = middle
+        else:
+            high = middle
+    return intervals_for(high)
+
+class CheckScheduler:
+    """
+    Очередь проверок пар по времени следующей проверки
+
+    Пары — кортежи (term, country), как в iter_pairs. Устаревшие записи
+    кучи (после перепланирования или удаления пары) пропускаются при
+    извлечении.
+    """
+
+    def __init__(self, limit, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, requests_per_hour=None):
+        self.limit = limit
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.requests_per_hour = requests_per_hour
+        self._heap = []
+        self._counter = itertools.count()
+        # Пара → номер актуальной записи в куче
+        self._entries = {}
+        self._due = {}
+        self._last_check = {}
+        self._ranks = {}
+        self._intervals = {}
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, pair):
+        return pair in self._due
+
+    def pairs(self):
+        """Все пары в расписании"""
+        return list(self._due)
+
+    def _push(self, pair, due):
+        seq = next(self._counter)
+        self._entries[pair] = seq
+        self._due[pair] = due
+        heapq.heappush(self._heap, (due, seq, pair))
+
+    def add(self, pair, due=None, ranks=None):
+        """
+        Добавляет пару в расписание
+
+        Args:
+            due: Время первой проверки (по умолчанию — сейчас)
+            ranks: Прошлые позиции пары для расчета изменчивости
+        """
+        self._ranks[pair] = deque(ranks or [], maxlen=VOLATILITY_WINDOW)
+        self._push(pair, time.time() if due is None else due)
+
+    def remove(self, pair):
+        """Удаляет пару из расписания"""
+        for table in (self._entries, self._due, self._last_check, self._ranks, self._intervals):
+            table.pop(pair, None)
+
+    def sync_pairs(self, search_terms, now=None):
+        """
+        Приводит расписание к новому keywords.json
+
+        Новые пары ставятся в очередь сразу, удаленные убираются,
+        остальные остаются со своим сроком и историей позиций.
+
+        Returns:
+            tuple: (добавленные пары, удаленные пары)
+        """
+        now = time.time() if now is None else now
+        new_pairs = [(term, country) for term, countries in search_terms.items() for country in countries]
+        new_set = set(new_pairs)
+        added = [pair for pair in dict.fromkeys(new_pairs) if pair not in self._due]
+        removed = [pair for pair in self._due if pair not in new_set]
+        for pair in removed:
+            self.remove(pair)
+        for pair in added:
+            self.add(pair, due=now)
+        return added, removed
+
+    def observe(self, pair, rank, ts=None, failed=False):
+        """
+        Запоминает результат проверки пары
+
+        Неудачная проверка (failed) не добавляет позицию в расчет
+        изменчивости; следующая попытка — через обычный интервал пары.
+        """
+        if pair not in self._due:
+            return
+        if not failed:
+            self._ranks[pair].append(rank)
+        self._last_check[pair] = time.time() if ts is None else ts
+
+    def interval(self, pair):
+        """Текущий интервал проверки пары (None, если еще не рассчитан)"""
+        return self._intervals.get(pair)
+
+    def replan(self):
+        """
+        Пересчитывает интервалы всех пар и время их следующей проверки
+
+        Срок пары — время последней проверки плюс новый интервал; пары,
+        которые еще не проверялись, остаются в очереди со своим сроком.
+        """
+        weights = {pair: pair_weight(list(ranks), self.limit) for pair, ranks in self._ranks.items()}
+        self._intervals = fit_intervals(weights, self.min_interval, self.max_interval, self.requests_per_hour)
+        now = time.time()
+        for pair in self._due:
+            last_check = self._last_check.get(pair)
+            if last_check is not None:
+                due = last_check + self._intervals[pair]
+            elif pair in self._entries:
+                continue
+            else:
+                # Извлечена, но так и не проверена — проверяем снова
+                due = now
+            if pair not in self._entries or due != self._due[pair]:
+                self._push(pair, due)
+
+    def requeue(self, pairs, due=None):
+        """
+        Возвращает извлеченные, но не проверенные пары в очередь
+
+        Args:
+            due: Время новой попытки (по умолчанию — сейчас)
+        """
+        due = time.time() if due is None else due
+        for pair in pairs:
+            if pair in self._due:
+                self._push(pair, due)
+
+    def next_due(self):
+        """Время ближайшей проверки или None, если расписание пусто"""
+        while self._heap:
+            due, seq, pair = self._heap[0]
+            if self._entries.get(pair) == seq:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None, window=BATCH_WINDOW):
+        """
+        Извлекает пары, срок проверки которых наступил
+
+        Пары со сроком в пределах window секунд забираются заодно, чтобы
+        проверять их одним проходом. Извлеченная пара возвращается в
+        очередь при следующем replan после observe.
+        """
+        now = time.time() if now is None else now
+        due_pairs = []
+        while self._heap and self._heap[0][0] <= now + window:
+            due, seq, pair = heapq.heappop(self._heap)
+            if self._entries.get(pair) == seq:
+                del self._entries[pair]
+                due_pairs.append(pair)
+        return due_pairs
+
+    def requests_per_hour_planned(self):
+        """Плановое число запросов в час по текущим интервалам"""
+        return sum(3600 / interval for interval in self._intervals.values())
+
+def group_pairs(pairs):
+    """Собирает пары (term, country) обратно в формат keywords.json"""
+    search_terms = {}
+    for term, country in pairs:
+        search_terms.setdefault(term, []).append(country)
+    return search_terms
+
+class KeywordsWatcher:
+    """
+    Следит за keywords.json по времени изменения и размеру файла
+
+    Файл с ошибкой JSON (например, недописанный редактором) пропускается
+    до следующего изменения.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self):
+        """
+        Returns:
+            dict | None: Новое содержимое файла или None, если файл не изменился
+        """
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return None
+        self._stamp = stamp
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                search_terms = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ {os.path.basename(self.path)} не прочитан: {e}")
+            return None
+        if not isinstance(search_terms, dict) or not all(isinstance(countries, list) for countries in search_terms.values()):
+            print(f"⚠️ {os.path.basename(self.path)}: ожидается {{ключевое слово: [страны]}}")
+            return None
+        return search_terms
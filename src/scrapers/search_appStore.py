@@ -2,10 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import json
+import math
 import time
 import logging
 from datetime import datetime
-from collections import defaultdict
 from tabulate import tabulate
 import sys
 import os
@@ -13,10 +13,17 @@ import os
 # Добавляем путь к корневой папке проекта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from src.scrapers.appstore_scraper import get_rank
+from src.scrapers.sweep import stream_sweep, local_fetcher, iter_pairs, DEFAULT_CONCURRENCY, DEFAULT_COUNTRY_RATE
+from src.scrapers.worker import queue_fetcher
+from src.utils.work_queue import WorkQueue, LEASE_SIZE
+from src.scrapers.scheduler import CheckScheduler, KeywordsWatcher, group_pairs, MIN_INTERVAL, MAX_INTERVAL, VOLATILITY_WINDOW, KEYWORDS_POLL_INTERVAL
 from src.utils.country_utils import get_country_name
-from src.utils.telegram_utils import load_message_ids, save_message_ids, send_to_telegram, format_telegram_message, load_telegram_config, update_message, load_message_ids_from_repo, save_message_ids_to_repo
-from src.utils.state_manager import load_state, save_state, get_now_str, load_table_config, update_state_entry, load_state_from_repo, save_state_to_repo
+from src.utils.telegram_utils import load_message_ids, save_message_ids, load_telegram_config, update_message, load_message_ids_from_repo, load_message_hashes, save_message_hashes, load_message_hashes_from_repo, notify_country_async, get_telegram_client
+from src.utils.state_manager import get_now_str, load_table_config, load_competitors_config, load_state_from_repo, save_run_to_repo
+from src.utils.rank_history import open_history
+from src.utils.response_cache import bypass_cache
+from src.utils.checkpoint import open_checkpoint
+from src.utils.state_model import RankState
 
 def countdown(seconds, message="Ожидание"):
     """Обратный отсчет с сообщением"""
@@ -27,17 +34,132 @@ def countdown(seconds, message="Ожидание"):
         time.sleep(1)
     sys.stdout.write("\r" + " " * 40 + "\r")  # очистка строки
 
-def format_rank_display(prev_rank, rank):
-    """Форматирует отображение позиции"""
-    if prev_rank != rank and prev_rank is not None:
-        return f"#{prev_rank} → #{rank}" if rank else f"#{prev_rank} → x"
-    elif prev_rank is None and rank is not None:
-        return f"x → #{rank}"
-    else:
-        return f"#{rank}" if rank else "x"
+def render_country_table(rows, table_config):
+    """Отрисовывает таблицу страны по колонкам из table_config.json"""
+    columns = table_config["columns"]
+    
+    # Добавляем номер, если есть колонка '#'
+    if "#" in columns:
+        for idx, item in enumerate(rows):
+            item["#"] = idx + 1
+    
+    # Формируем строки таблицы по выбранным колонкам
+    table = [
+        [item.get(col, "x") for col in columns]
+        for item in sorted(rows, key=lambda x: int(x["Now"].split("#")[-1].split()[0]) if "#" in x["Now"] else float("inf"))
+    ]
+    
+    return tabulate(table, headers=table_config["headers"], tablefmt=table_config["style"])
+
+def run_check(bundle_id, search_terms, limit, prev_state, message_ids, message_hashes, table_config, competitors=None, backend=None, concurrency=DEFAULT_CONCURRENCY, country_rate=DEFAULT_COUNTRY_RATE, current_state=None, table_rows=None, fetch=None, checkpoint=None, now_ts=None, failed_pairs=None):
+    """
+    Одна проверка: запросы → состояние → таблица → Telegram
+
+    Таблица страны отрисовывается и ставится в очередь отправки, как только
+    готова последняя пара этой страны; остальные страны в это время
+    продолжают проверяться.
+
+    Args:
+        current_state: RankState, в который записываются позиции (по умолчанию — новый)
+        table_rows: Последние строки таблиц {страна: {ключевое слово: строка}};
+            если задан, проверяются только пары из search_terms, а таблица
+            страны собирается из новых и прошлых строк
+        fetch: Источник позиций вместо локальных запросов (см. queue_fetcher)
+        checkpoint: SweepCheckpoint — готовые пары берутся из него, новые
+            периодически сохраняются
+        now_ts: Unix-время проверки (по умолчанию — текущее)
+        failed_pairs: Список для пар, проверка которых не удалась (см. stream_sweep)
+
+    Returns:
+        RankState: Новое состояние
+    """
+    current_state = RankState() if current_state is None else current_state
+    now_ts = int(time.time()) if now_ts is None else now_ts
+    if checkpoint is not None:
+        fetch = checkpoint.wrap(fetch or local_fetcher(bundle_id, limit, backend, concurrency, country_rate, competitors))
+    
+    for country_key, rows in stream_sweep(
+        bundle_id, search_terms, limit, prev_state, now_ts, current_state,
+        backend=backend, concurrency=concurrency, country_rate=country_rate,
+        competitors=competitors, fetch=fetch, failed_pairs=failed_pairs
+    ):
+        if table_rows is not None:
+            country_rows = table_rows.setdefault(country_key, {})
+            country_rows.update((row["KW"], row) for row in rows)
+            rows = list(country_rows.values())
+        text_table = render_country_table(rows, table_config)
+        country_name = get_country_name(country_key)
+        print(f"📊 Страна {country_name} проверена")
+        
+        # Редактируем сообщение страны, только если таблица изменилась (в фоне)
+        notify_country_async(country_key, country_name, text_table, get_now_str(), message_ids, message_hashes)
+    
+    # Дожидаемся отправки в Telegram, чтобы сохранить актуальные message_ids
+    get_telegram_client().flush()
+    return current_state
+
+def create_scheduler(bundle_id, search_terms, limit, prev_state, history=None, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, requests_per_hour=None):
+    """
+    Создает расписание проверок для всех пар из search_terms
+
+    Все пары проверяются сразу (чтобы собрать полные таблицы), а
+    изменчивость позиций берется из истории (SQLite) или, если ее нет,
+    из прошлого состояния.
+    """
+    scheduler = CheckScheduler(limit, min_interval, max_interval, requests_per_hour)
+    # Последние позиции всех пар — одним запросом к истории
+    recent_ranks = history.recent_ranks(bundle_id, VOLATILITY_WINDOW) if history is not None else None
+    for term, country in iter_pairs(search_terms):
+        if recent_ranks is not None:
+            ranks = recent_ranks.get((country.lower(), term), [])
+        else:
+            record = prev_state.get(country, term)
+            ranks = [record.last_rank] if record else []
+        scheduler.add((term, country), ranks=ranks)
+    return scheduler
+
+def get_fetcher(queue_path, bundle_id, limit, competitors, lease_size=LEASE_SIZE):
+    """Источник позиций через очередь воркеров (None — проверять в этом процессе)"""
+    if not queue_path:
+        return None
+    print(f"📬 Проверка через очередь воркеров: {queue_path}")
+    return queue_fetcher(WorkQueue(queue_path), bundle_id, limit, competitors, lease_size)
+
+def reload_keywords(scheduler, search_terms, table_rows, table_config, message_ids, message_hashes):
+    """
+    Применяет изменения keywords.json без полной перепроверки
 
-def main_loop(bundle_id, search_terms, limit, keywords_file=None):
-    """Основной цикл мониторинга"""
+    Новые пары проверяются в ближайшей итерации, удаленные убираются из
+    расписания и таблиц (таблицы их стран отправляются заново). Записи
+    удаленных пар остаются в состоянии в памяти: если пару вернут в
+    keywords.json, ее история (начальная позиция, изменение) сохранится.
+    В сохраняемое состояние попадают только пары из расписания.
+    """
+    added, removed = scheduler.sync_pairs(search_terms)
+    print(f"📝 keywords.json изменен: +{len(added)} / -{len(removed)} пар")
+    
+    for term, country in removed:
+        table_rows.get(country.upper(), {}).pop(term, None)
+    for country_key in sorted({country.upper() for _, country in removed}):
+        rows = table_rows.get(country_key)
+        if not rows:
+            table_rows.pop(country_key, None)
+            continue
+        text_table = render_country_table(list(rows.values()), table_config)
+        notify_country_async(country_key, get_country_name(country_key), text_table, get_now_str(), message_ids, message_hashes)
+    get_telegram_client().flush()
+
+def main_loop(bundle_id, search_terms, limit, keywords_file=None, backend=None, concurrency=DEFAULT_CONCURRENCY, country_rate=DEFAULT_COUNTRY_RATE, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, requests_per_hour=None, queue_path=None, lease_size=LEASE_SIZE):
+    """
+    Основной цикл мониторинга
+
+    Каждая пара проверяется по своему расписанию (CheckScheduler): часто
+    меняющиеся и высокие позиции — чаще, стабильные — реже, в пределах
+    requests_per_hour запросов в час (по умолчанию — число пар).
+    С queue_path пары проверяют воркеры (main.py worker), а этот процесс
+    только планирует проверки и отправляет таблицы. Изменения keywords_file
+    подхватываются без перезапуска (см. reload_keywords).
+    """
     # Загружаем конфигурацию Telegram
     token, chat_id = load_telegram_config()
     print(f"📱 Telegram конфигурация загружена: токен {'настроен' if token and token != 'YOUR_BOT_TOKEN' else 'не настроен'}")
@@ -48,15 +170,22 @@ def main_loop(bundle_id, search_terms, limit, keywords_file=None):
     
     # Проверяем, есть ли GITHUB_TOKEN для использования репозитория
     github_token = os.environ.get('GITHUB_TOKEN')
+    history = None
     if github_token:
         # Загружаем состояние из репозитория (для GitHub Actions)
-        prev_state = load_state_from_repo()
+        prev_state = RankState.from_dict(load_state_from_repo())
         # Загружаем message_ids из репозитория (для GitHub Actions)
         message_ids = load_message_ids_from_repo()
+        message_hashes = load_message_hashes_from_repo()
     else:
-        # Локальное использование
-        prev_state = load_state(state_file)
+        # Локальное использование: состояние строится из истории позиций (SQLite)
+        history = open_history(bundle_id, legacy_file=state_file)
+        prev_state = history.load_state(bundle_id)
         message_ids = load_message_ids()
+        message_hashes = load_message_hashes()
+    
+    # Снимок времени изменения keywords_file — до чтения, чтобы не пропустить правку между ними
+    watcher = KeywordsWatcher(keywords_file) if keywords_file else None
     
     # Перечитываем keywords_file, если он задан
     if keywords_file:
@@ -65,120 +194,100 @@ def main_loop(bundle_id, search_terms, limit, keywords_file=None):
     
     # Читаем конфиг таблицы
     table_config = load_table_config()
-    style = table_config["style"]
-    columns = table_config["columns"]
-    headers = table_config["headers"]
+    competitors = load_competitors_config()
     
-    print(f"🚀 Запуск мониторинга... (таблица: {style}, колонки: {columns})")
-    print("⏰ Интервал проверки: 10 минут")
+    # Позиции по расписанию всегда запрашиваются заново, без кэша выдачи
+    bypass_cache()
+    fetch = get_fetcher(queue_path, bundle_id, limit, competitors, lease_size)
+    scheduler = create_scheduler(bundle_id, search_terms, limit, prev_state, history,
+                                 min_interval, max_interval, requests_per_hour)
+    table_rows = {}
+    
+    print(f"🚀 Запуск мониторинга... (таблица: {table_config['style']}, колонки: {table_config['columns']})")
+    print(f"⏰ Интервал проверки пары: от {min_interval // 60} до {max_interval // 60} минут, "
+          f"бюджет {requests_per_hour or len(scheduler)} запросов/час")
     print("🔄 Для остановки нажмите Ctrl+C")
     print("-" * 50)
     
     iteration = 0
     while True:
+        new_terms = watcher.poll() if watcher else None
+        if new_terms is not None:
+            reload_keywords(scheduler, new_terms, table_rows, table_config, message_ids, message_hashes)
+        
+        due_pairs = scheduler.pop_due()
+        if not due_pairs:
+            next_due = scheduler.next_due()
+            if next_due is None:
+                print("⚠️ Нет пар для проверки")
+                next_due = time.time() + min_interval
+            wait = int(math.ceil(next_due - time.time()))
+            if wait > 0:
+                # Ждем не дольше интервала опроса keywords.json
+                countdown(min(wait, KEYWORDS_POLL_INTERVAL) if watcher else wait, "Ожидание")
+            continue
+        
         iteration += 1
-        print(f"\n🔄 Итерация #{iteration} - {get_now_str()}")
+        print(f"\n🔄 Итерация #{iteration} - {get_now_str()}: {len(due_pairs)} из {len(scheduler)} пар")
         
-        grouped_results = defaultdict(list)
-        current_state = {}
-        now_str = get_now_str()
-
-        for term, countries in search_terms.items():
-            for country in countries:
-                key = f"{country.lower()}|{term}"
-                prev_info = prev_state.get(key, {})
-                
-                if not isinstance(prev_info, dict):
-                    prev_info = {
-                        "initial_rank": prev_info,
-                        "last_rank": prev_info,
-                        "last_change_time": None
-                    }
-                
-                prev_rank = prev_info.get("last_rank")
-                rank = get_rank(term, bundle_id, country, limit)
-                
-                # Обновляем состояние
-                current_state[key] = update_state_entry(prev_state, key, rank, now_str)
-                
-                # Формируем данные для таблицы
-                state_info = current_state[key]
-                initial_rank = state_info["initial_rank"]
-                last_change_time = state_info.get("last_change_time", "x")
-                
-                grouped_results[country.upper()].append({
-                    "#": None,  # будет добавлен позже
-                    "KW": term,
-                    "Init": f"#{initial_rank}" if initial_rank else "x",
-                    "Now": format_rank_display(prev_rank, rank),
-                    "UpdKW": last_change_time if last_change_time else "x"
-                })
-                
-                # Короткая пауза между запросами
-                time.sleep(2)
-
-        # Отправляем результаты в Telegram
-        for country in sorted(grouped_results.keys()):
-            country_items = grouped_results[country]
-            
-            # Добавляем номер, если есть колонка '#'
-            if "#" in columns:
-                for idx, item in enumerate(country_items):
-                    item["#"] = idx + 1
-            
-            # Формируем строки таблицы по выбранным колонкам
-            table = [
-                [item[col] for col in columns]
-                for item in sorted(country_items, key=lambda x: int(x["Now"].split("#")[-1].split()[0]) if "#" in x["Now"] else float("inf"))
-            ]
-            
-            text_table = tabulate(table, headers=headers, tablefmt=style)
-            country_key = country.upper()
-            country_name = get_country_name(country)
-            country_update_time = get_now_str()
-            
-            message_text = format_telegram_message(country_name, text_table, country_update_time)
-            
-            # Всегда отправляем новое сообщение
-            new_msg_id = send_to_telegram(message_text, country=country_key)
-            if new_msg_id:
-                message_ids[country_key] = new_msg_id
-                print(f"✅ Новое сообщение для {country_name} отправлено")
-            else:
-                print(f"❌ Ошибка отправки сообщения для {country_name}")
+        failed_pairs = []
+        try:
+            current_state = run_check(
+                bundle_id, group_pairs(due_pairs), limit, prev_state, message_ids, message_hashes, table_config,
+                competitors=competitors, backend=backend, concurrency=concurrency, country_rate=country_rate,
+                current_state=prev_state.copy(), table_rows=table_rows, fetch=fetch, failed_pairs=failed_pairs
+            )
+        except (TimeoutError, RuntimeError) as e:
+            # Очередь воркеров не выполнила запуск: пары проверяются снова позже, мониторинг продолжается
+            print(f"❌ Итерация #{iteration} не выполнена: {e}")
+            scheduler.requeue(due_pairs, time.time() + min_interval)
+            continue
+        
+        # Новые позиции — в расписание (ошибки запроса не считаются изменением позиции)
+        now_ts = time.time()
+        failed = set(failed_pairs)
+        checked_pairs = [pair for pair in due_pairs if pair not in failed]
+        for term, country in due_pairs:
+            record = current_state.get(country, term)
+            scheduler.observe((term, country), record.last_rank if record else None, now_ts, failed=(term, country) in failed)
+        scheduler.replan()
+        if failed:
+            print(f"⚠️ Не удалось проверить пар: {len(failed)}, повтор по расписанию")
         
         # Сохраняем состояние
         if github_token:
-            # Сохраняем в репозиторий (для GitHub Actions)
-            save_message_ids_to_repo(message_ids)
-            save_state_to_repo(current_state)
+            # Сохраняем в репозиторий одним коммитом (для GitHub Actions)
+            # В сохраняемом состоянии только пары из keywords.json
+            save_run_to_repo(current_state.select((country, term) for term, country in scheduler.pairs()).to_dict(),
+                             message_ids, message_hashes=message_hashes)
         else:
-            # Локальное сохранение
+            # Локальное сохранение: добавляем в историю только проверенные пары
             save_message_ids(message_ids)
-            save_state(current_state, state_file)
+            save_message_hashes(message_hashes)
+            history.record_state(bundle_id, current_state.select((country, term) for term, country in checked_pairs))
         
         # Обновляем prev_state для следующей итерации
         prev_state = current_state
         
-        print(f"✅ Итерация #{iteration} завершена")
-        print("⏰ Ожидание 1 час до следующей проверки...")
-        countdown(3600, "Ожидание")
+        print(f"✅ Итерация #{iteration} завершена, план: {scheduler.requests_per_hour_planned():.0f} запросов/час")
 
-def single_check(bundle_id, search_terms, limit, keywords_file=None):
-    """Однократная проверка мониторинга (для GitHub Actions)"""
+def single_check(bundle_id, search_terms, limit, keywords_file=None, backend=None, concurrency=DEFAULT_CONCURRENCY, country_rate=DEFAULT_COUNTRY_RATE, queue_path=None, lease_size=LEASE_SIZE, resume=False):
+    """
+    Однократная проверка мониторинга (для GitHub Actions)
+
+    Проверенные пары периодически сохраняются в контрольную точку; с
+    resume=True пары из нее не запрашиваются повторно.
+    """
     # Загружаем конфигурацию Telegram
     token, chat_id = load_telegram_config()
     print(f"📱 Telegram конфигурация загружена: токен {'настроен' if token and token != 'YOUR_BOT_TOKEN' else 'не настроен'}")
     
-    # Обновляем пути к файлам
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    state_file = os.path.join(project_root, "data", "results", "last_state.json")
-    
     # Загружаем состояние из репозитория (для GitHub Actions)
-    prev_state = load_state_from_repo()
+    prev_state = RankState.from_dict(load_state_from_repo())
     
     # Загружаем message_ids из репозитория (для GitHub Actions)
     message_ids = load_message_ids_from_repo()
+    message_hashes = load_message_hashes_from_repo()
     
     # Перечитываем keywords_file, если он задан
     if keywords_file:
@@ -187,82 +296,21 @@ def single_check(bundle_id, search_terms, limit, keywords_file=None):
     
     # Читаем конфиг таблицы
     table_config = load_table_config()
-    style = table_config["style"]
-    columns = table_config["columns"]
-    headers = table_config["headers"]
+    competitors = load_competitors_config()
     
-    print(f"🔍 Выполнение проверки... (таблица: {style}, колонки: {columns})")
-    grouped_results = defaultdict(list)
-    current_state = {}
-    now_str = get_now_str()
-
-    for term, countries in search_terms.items():
-        for country in countries:
-            key = f"{country.lower()}|{term}"
-            prev_info = prev_state.get(key, {})
-            
-            if not isinstance(prev_info, dict):
-                prev_info = {
-                    "initial_rank": prev_info,
-                    "last_rank": prev_info,
-                    "last_change_time": None
-                }
-            
-            prev_rank = prev_info.get("last_rank")
-            rank = get_rank(term, bundle_id, country, limit)
-            
-            # Обновляем состояние
-            current_state[key] = update_state_entry(prev_state, key, rank, now_str)
-            
-            # Формируем данные для таблицы
-            state_info = current_state[key]
-            initial_rank = state_info["initial_rank"]
-            last_change_time = state_info.get("last_change_time", "x")
-            
-            grouped_results[country.upper()].append({
-                "#": None,  # будет добавлен позже
-                "KW": term,
-                "Init": f"#{initial_rank}" if initial_rank else "x",
-                "Now": format_rank_display(prev_rank, rank),
-                "UpdKW": last_change_time if last_change_time else "x"
-            })
-            
-            # Короткая пауза между запросами
-            time.sleep(2)
-
-    # Отправляем результаты в Telegram
-    for country in sorted(grouped_results.keys()):
-        country_items = grouped_results[country]
-        
-        # Добавляем номер, если есть колонка '#'
-        if "#" in columns:
-            for idx, item in enumerate(country_items):
-                item["#"] = idx + 1
-        
-        # Формируем строки таблицы по выбранным колонкам
-        table = [
-            [item[col] for col in columns]
-            for item in sorted(country_items, key=lambda x: int(x["Now"].split("#")[-1].split()[0]) if "#" in x["Now"] else float("inf"))
-        ]
-        
-        text_table = tabulate(table, headers=headers, tablefmt=style)
-        country_key = country.upper()
-        country_name = get_country_name(country)
-        country_update_time = get_now_str()
-        
-        message_text = format_telegram_message(country_name, text_table, country_update_time)
-        
-        # Всегда отправляем новое сообщение
-        new_msg_id = send_to_telegram(message_text, country=country_key)
-        if new_msg_id:
-            message_ids[country_key] = new_msg_id
-            print(f"✅ Новое сообщение для {country_name} отправлено")
-        else:
-            print(f"❌ Ошибка отправки сообщения для {country_name}")
+    checkpoint = open_checkpoint(bundle_id, resume=resume, use_repo=bool(os.environ.get('GITHUB_TOKEN')))
+    
+    print(f"🔍 Выполнение проверки... (таблица: {table_config['style']}, колонки: {table_config['columns']})")
+    current_state = run_check(
+        bundle_id, search_terms, limit, prev_state, message_ids, message_hashes, table_config,
+        competitors=competitors, backend=backend, concurrency=concurrency, country_rate=country_rate,
+        fetch=get_fetcher(queue_path, bundle_id, limit, competitors, lease_size),
+        checkpoint=checkpoint, now_ts=checkpoint.started_ts
+    )
     
-    # Сохраняем состояние в репозиторий (для GitHub Actions)
-    save_message_ids_to_repo(message_ids)
-    save_state_to_repo(current_state)
+    # Сохраняем состояние в репозиторий одним коммитом вместе с очищенной контрольной точкой
+    save_run_to_repo(current_state.to_dict(), message_ids, message_hashes=message_hashes,
+                     extra_files=checkpoint.clear())
     
     print("✅ Проверка завершена")
 
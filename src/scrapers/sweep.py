@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Параллельная проверка позиций по всем парам (ключевое слово, страна).
+
+Запросы выполняются в пуле потоков, а темп запросов к каждой витрине
+ограничивается отдельным token bucket вместо фиксированных пауз.
+"""
+
+import sys
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.scrapers.appstore_scraper import get_ranks
+from src.utils.rate_limiter import KeyedRateLimiter
+from src.utils.state_manager import format_timestamp
+from src.utils.state_model import RankRecord
+
+# Количество одновременных запросов
+DEFAULT_CONCURRENCY = 4
+
+# Запросов в секунду к одной витрине
+DEFAULT_COUNTRY_RATE = 0.5
+
+def format_rank_display(prev_rank, rank):
+    """Форматирует отображение позиции"""
+    if prev_rank != rank and prev_rank is not None:
+        return f"#{prev_rank} → #{rank}" if rank else f"#{prev_rank} → x"
+    elif prev_rank is None and rank is not None:
+        return f"x → #{rank}"
+    else:
+        return f"#{rank}" if rank else "x"
+
+def get_keyword_competitors(competitors, term):
+    """Возвращает конкурентов для ключевого слова: {название: bundleId}"""
+    if not competitors:
+        return {}
+    result = dict(competitors.get("*", {}))
+    result.update(competitors.get(term, {}))
+    return result
+
+def format_competitor_rank(rank):
+    """Форматирует позицию конкурента для таблицы"""
+    return f"#{rank}" if rank else "x"
+
+def iter_pairs(search_terms):
+    """Разворачивает keywords.json в список пар (term, country)"""
+    return [(term, country) for term, countries in search_terms.items() for country in countries]
+
+def probe_hint(prev_state, country, term, limit):
+    """
+    Подсказка для прогрессивной проверки по прошлому состоянию
+
+    Если пара уже проверялась и приложение не было найдено, сразу
+    запрашиваем всю глубину выдачи (limit).
+    """
+    record = prev_state.get(country, term)
+    if record is None:
+        return None
+    return record.last_rank if record.last_rank is not None else limit
+
+def iter_ranks(bundle_id, pairs, limit, backend=None, concurrency=DEFAULT_CONCURRENCY, country_rate=DEFAULT_COUNTRY_RATE, competitors=None, hints=None, limiter=None, on_abort=None):
+    """
+    Получает позиции для списка пар параллельно и отдает их по мере готовности
+
+    Позиции приложения и всех его конкурентов по ключевому слову
+    берутся из одного поискового запроса.
+
+    Args:
+        bundle_id: ID приложения
+        pairs: Список пар (term, country)
+        limit: Максимальное количество результатов поиска
+        backend: Бэкенд поиска
+        concurrency: Количество одновременных запросов
+        country_rate: Запросов в секунду к одной витрине
+        competitors: Конфигурация конкурентов (см. load_competitors_config)
+        hints: Прошлые позиции {(term, country): позиция} для выбора первого окна
+        limiter: Общий KeyedRateLimiter (по умолчанию — новый с country_rate)
+        on_abort: Вызывается при ошибке или прерывании со списком уже
+            полученных, но еще не отданных результатов [(индекс, позиции)]
+
+    Yields:
+        tuple: (индекс пары в pairs, словарь bundleId → позиция) в порядке завершения;
+        вместо словаря None, если проверка пары не удалась (ошибка запроса)
+    """
+    limiter = limiter or KeyedRateLimiter(country_rate)
+
+    def check(pair):
+        term, country = pair
+        limiter.acquire(country.lower())
+        bundle_ids = [bundle_id] + list(get_keyword_competitors(competitors, term).values())
+        last_rank = (hints or {}).get(pair)
+        try:
+            return get_ranks(term, bundle_ids, country, limit, backend=backend, last_rank=last_rank, raise_errors=True)
+        except Exception:
+            # Ошибка — не "не найдено": позиции пары неизвестны
+            return None
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    futures = {pool.submit(check, pair): index for index, pair in enumerate(pairs)}
+    yielded = set()
+    try:
+        for future in as_completed(futures):
+            yielded.add(future)
+            yield futures[future], future.result()
+    except BaseException:
+        if on_abort is not None:
+            completed = [
+                (futures[future], future.result()) for future in futures
+                if future not in yielded and future.done() and not future.cancelled() and future.exception() is None
+            ]
+            if completed:
+                on_abort(completed)
+        raise
+    finally:
+        # Не ждем оставшиеся пары: при прерывании выходим сразу
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def local_fetcher(bundle_id, limit, backend=None, concurrency=DEFAULT_CONCURRENCY, country_rate=DEFAULT_COUNTRY_RATE, competitors=None):
+    """Источник позиций для stream_sweep(fetch=...) с запросами из этого процесса"""
+    def fetch(pairs, hints, on_abort=None):
+        return iter_ranks(bundle_id, pairs, limit, backend, concurrency, country_rate, competitors, hints, on_abort=on_abort)
+    return fetch
+
+def build_row(term, record, prev_rank, ranks, keyword_competitors, failed=False):
+    """
+    Строка таблицы для пары (время форматируется только здесь)
+
+    Для неудачной проверки (failed) показывается прошлая позиция с "?".
+    """
+    now = format_rank_display(prev_rank, record.last_rank)
+    row = {
+        "#": None,  # будет добавлен позже
+        "KW": term,
+        "Init": f"#{record.initial_rank}" if record.initial_rank else "x",
+        "Now": f"{now} ?" if failed else now,
+        "UpdKW": format_timestamp(record.last_change_ts) if record.last_change_ts else "x"
+    }
+    for name, competitor_id in keyword_competitors.items():
+        row[name] = format_competitor_rank(ranks.get(competitor_id))
+    return row
+
+def stream_sweep(bundle_id, search_terms, limit, prev_state, now_ts, current_state, backend=None, concurrency=DEFAULT_CONCURRENCY, country_rate=DEFAULT_COUNTRY_RATE, competitors=None, fetch=None, failed_pairs=None):
+    """
+    Проверяет все пары и отдает таблицу страны, как только готова ее последняя пара
+
+    Пары разных стран чередуются, поэтому запросы к разным витринам идут
+    параллельно, а страна с меньшим числом пар готова раньше остальных.
+    Строки страны хранятся только до ее выдачи.
+
+    Args:
+        prev_state: Прошлое состояние (RankState)
+        now_ts: Unix-время проверки
+        current_state: RankState, в который записываются новые позиции
+        fetch: Источник позиций fetch(pairs, hints, on_abort=None) с тем же результатом,
+            что и iter_ranks (например, очередь воркеров, см. queue_fetcher)
+
+        failed_pairs: Список, в который добавляются пары (term, country) с неудачной проверкой
+
+    Пара, проверка которой не удалась, остается в current_state с прошлой
+    записью (без новой позиции), а в таблице помечается "?".
+
+    Yields:
+        tuple: (код страны в верхнем регистре, строки таблицы в порядке ключевых слов)
+    """
+    pairs = iter_pairs(search_terms)
+    # Чередуем страны (по одной паре каждой страны по кругу), чтобы потоки
+    # не ждали token bucket одной витрины; порядок пар внутри страны сохраняется
+    by_country = {}
+    for term, country in pairs:
+        by_country.setdefault(country.upper(), deque()).append((term, country))
+    pairs = []
+    while by_country:
+        for country_key in list(by_country):
+            country_pairs = by_country[country_key]
+            pairs.append(country_pairs.popleft())
+            if not country_pairs:
+                del by_country[country_key]
+
+    hints = {(term, country): probe_hint(prev_state, country, term, limit) for term, country in pairs}
+    remaining = defaultdict(int)
+    for _, country in pairs:
+        remaining[country.upper()] += 1
+    pending_rows = defaultdict(dict)
+
+    if fetch is not None:
+        results = fetch(pairs, hints)
+    else:
+        results = iter_ranks(bundle_id, pairs, limit, backend, concurrency, country_rate, competitors, hints)
+
+    for index, ranks in results:
+        term, country = pairs[index]
+        prev_record = prev_state.get(country, term)
+        prev_rank = prev_record.last_rank if prev_record else None
+        keyword_competitors = get_keyword_competitors(competitors, term)
+
+        if ranks is None:
+            # Проверка не удалась: оставляем прошлую запись и прошлые позиции конкурентов
+            record = prev_record or RankRecord()
+            if prev_record is not None:
+                current_state.set(country, term, prev_record)
+            ranks = dict(record.competitors or {})
+            failed = True
+            if failed_pairs is not None:
+                failed_pairs.append((term, country))
+        else:
+            # Обновляем состояние
+            record = current_state.update(prev_state, country, term, ranks[bundle_id], now_ts)
+
+            # Матрица позиций конкурентов по этому ключевому слову и стране
+            record.competitors = {b: ranks.get(b) for b in keyword_competitors.values()} if keyword_competitors else None
+            failed = False
+
+        country_key = country.upper()
+        pending_rows[country_key][index] = build_row(term, record, prev_rank, ranks, keyword_competitors, failed)
+        remaining[country_key] -= 1
+        if remaining[country_key] == 0:
+            rows = pending_rows.pop(country_key)
+            yield country_key, [rows[i] for i in sorted(rows)]
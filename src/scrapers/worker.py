@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Распределенная проверка позиций через очередь аренд (WorkQueue).
+
+Воркеры (main.py worker) на одной или нескольких машинах с общим файлом
+очереди забирают аренды, проверяют их пары и записывают позиции.
+Координатор (main.py search/check --queue) создает запуск и получает
+позиции по мере их появления в очереди — тем же потоком, что и при
+локальной проверке (stream_sweep с параметром fetch).
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.scrapers.sweep import iter_ranks, DEFAULT_CONCURRENCY, DEFAULT_COUNTRY_RATE
+from src.utils.rate_limiter import KeyedRateLimiter
+from src.utils.response_cache import bypass_cache
+from src.utils.work_queue import WorkQueue, WORK_QUEUE_DB, LEASE_SIZE, LEASE_SECONDS
+
+# Пауза между опросами очереди (секунды)
+POLL_INTERVAL = 2
+
+# Координатор предупреждает, если столько секунд нет новых результатов,
+# и прекращает ожидание после QUEUE_TIMEOUT секунд без результатов
+IDLE_WARNING = 60
+QUEUE_TIMEOUT = 1800
+
+def get_worker_id():
+    """ID воркера: имя машины и PID процесса"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def process_lease(queue, lease, worker_id, backend=None, concurrency=DEFAULT_CONCURRENCY, limiter=None, lease_seconds=LEASE_SECONDS):
+    """
+    Проверяет пары аренды и записывает результаты
+
+    Аренда продлевается из фонового потока каждые lease_seconds / 3
+    секунд — в том числе пока одна пара ждет паузу троттлинга. Если аренда
+    потеряна (истекла и досталась другому воркеру), проверка прерывается
+    после текущей пары.
+
+    Returns:
+        bool: True, если результаты приняты
+    """
+    run = queue.get_run(lease["run_id"])
+    if run is None or run["status"] != "active":
+        return False
+
+    pairs = [(term, country) for term, country, _ in lease["pairs"]]
+    hints = {(term, country): hint for term, country, hint in lease["pairs"]}
+    results = []
+    stop = threading.Event()
+    lost = threading.Event()
+
+    def renew():
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(lease["id"], worker_id, lease_seconds):
+                lost.set()
+                return
+
+    renewer = threading.Thread(target=renew, daemon=True)
+    renewer.start()
+    try:
+        for index, ranks in iter_ranks(run["bundle"], pairs, run["limit"], backend=backend, concurrency=concurrency,
+                                       competitors=run["competitors"], hints=hints, limiter=limiter):
+            term, country = pairs[index]
+            results.append((term, country, ranks))
+            if lost.is_set():
+                print(f"⚠️ Аренда #{lease['id']} потеряна, проверка прервана")
+                return False
+    except Exception as e:
+        print(f"❌ Ошибка проверки аренды #{lease['id']}: {e}")
+        queue.release(lease["id"], worker_id)
+        return False
+    finally:
+        stop.set()
+        renewer.join()
+
+    return queue.complete(lease["id"], worker_id, results)
+
+def run_worker(queue_path=WORK_QUEUE_DB, backend=None, concurrency=DEFAULT_CONCURRENCY, country_rate=DEFAULT_COUNTRY_RATE, lease_seconds=LEASE_SECONDS, poll_interval=POLL_INTERVAL, max_idle=None):
+    """
+    Цикл воркера: захват аренды → проверка → запись результатов
+
+    Args:
+        queue_path: Файл очереди (общий для координатора и воркеров)
+        country_rate: Запросов в секунду к одной витрине (на воркер)
+        max_idle: Завершиться после стольких секунд без аренд (по умолчанию — работать всегда)
+
+    Returns:
+        int: Количество обработанных аренд
+    """
+    queue = WorkQueue(queue_path)
+    worker_id = get_worker_id()
+    # Пары приходят по расписанию координатора — выдачу не берем из кэша
+    bypass_cache()
+    # Один ограничитель на все аренды воркера
+    limiter = KeyedRateLimiter(country_rate)
+    print(f"👷 Воркер {worker_id} запущен, очередь: {queue_path}")
+
+    processed = 0
+    idle_since = time.time()
+    try:
+        while True:
+            lease = queue.claim(worker_id, lease_seconds)
+            if lease is None:
+                if max_idle is not None and time.time() - idle_since >= max_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            if process_lease(queue, lease, worker_id, backend, concurrency, limiter, lease_seconds):
+                processed += 1
+                print(f"✅ Аренда #{lease['id']} выполнена: {len(lease['pairs'])} пар")
+            idle_since = time.time()
+    finally:
+        queue.close()
+    print(f"👷 Воркер {worker_id} завершен, аренд: {processed}")
+    return processed
+
+def queue_ranks(queue, bundle_id, pairs, limit, competitors=None, hints=None, lease_size=LEASE_SIZE, poll_interval=POLL_INTERVAL, timeout=QUEUE_TIMEOUT):
+    """
+    Ставит пары в очередь и отдает позиции по мере записи их воркерами
+
+    Повторяющиеся пары ставятся в очередь один раз, а результат отдается
+    для каждого их индекса.
+
+    Args:
+        timeout: Сколько секунд ждать новых результатов (нет воркеров) до TimeoutError
+
+    Yields:
+        tuple: (индекс пары в pairs, словарь bundleId → позиция или None при ошибке), как iter_ranks
+    """
+    indexes = defaultdict(list)
+    for i, pair in enumerate(pairs):
+        indexes[pair].append(i)
+    unique_pairs = list(indexes)
+
+    run_id = queue.create_run(bundle_id, limit, unique_pairs, competitors, hints, lease_size)
+    print(f"📬 Запуск #{run_id}: {len(unique_pairs)} пар поставлено в очередь")
+
+    received = 0
+    last_row = 0
+    last_progress = time.time()
+    warned_at = last_progress
+    try:
+        while received < len(unique_pairs):
+            for row_id, term, country, ranks in queue.fetch_results(run_id, last_row):
+                last_row = row_id
+                received += 1
+                last_progress = time.time()
+                for i in indexes[(term, country)]:
+                    yield i, ranks
+            if received == len(unique_pairs):
+                break
+
+            progress = queue.progress(run_id)
+            if progress.get("failed"):
+                raise RuntimeError(f"Запуск #{run_id}: аренда не выполнена после нескольких попыток")
+            now = time.time()
+            if timeout is not None and now - last_progress >= timeout:
+                raise TimeoutError(f"Запуск #{run_id}: нет результатов {int(now - last_progress)} с, воркеры не запущены?")
+            if now - max(last_progress, warned_at) >= IDLE_WARNING:
+                warned_at = now
+                active = progress.get("leased", 0)
+                print(f"⚠️ Запуск #{run_id}: {received}/{len(unique_pairs)} пар, нет новых результатов "
+                      f"{int(now - last_progress)} с (аренд в работе: {active}) — запущен ли main.py worker?")
+            time.sleep(poll_interval)
+    finally:
+        queue.finish_run(run_id, "done" if received == len(unique_pairs) else "cancelled")
+
+def queue_fetcher(queue, bundle_id, limit, competitors=None, lease_size=LEASE_SIZE, poll_interval=POLL_INTERVAL, timeout=QUEUE_TIMEOUT):
+    """Источник позиций для stream_sweep(fetch=...) через очередь воркеров"""
+    def fetch(pairs, hints, on_abort=None):
+        # Результаты воркеров уже сохранены в очереди, on_abort не нужен
+        return queue_ranks(queue, bundle_id, pairs, limit, competitors, hints, lease_size, poll_interval, timeout)
+    return fetch
@@ -2,4 +2,12 @@
  
 from .country_utils import *
 from .telegram_utils import *
-from .state_manager import * 
\ No newline at end of file
+from .state_manager import *
+from .rate_limiter import *
+from .response_cache import *
+from .rank_history import *
+from .atomic_store import *
+from .github_sync import *
+from .state_model import *
+from .work_queue import *
+from .checkpoint import *
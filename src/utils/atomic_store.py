@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Атомарное и инкрементальное сохранение JSON-словарей.
+
+Основной файл записывается только целиком через временный файл, fsync и
+переименование, поэтому падение процесса не оставляет его испорченным.
+Между такими записями изменившиеся ключи дописываются в журнал
+(<файл>.log, одна JSON-строка на изменение). Когда журнал становится
+больше самого словаря, он сворачивается обратно в основной файл.
+
+Первая строка журнала — заголовок с хэшем основного файла, поверх которого
+он записан. Если процесс упал после записи нового основного файла, но до
+удаления журнала, хэш не совпадет и устаревший журнал не будет применен.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+# Суффикс файла журнала изменений
+JOURNAL_SUFFIX = ".log"
+
+# Минимальный размер журнала (строк), после которого возможно сворачивание
+COMPACT_MIN_ENTRIES = 200
+
+# Последнее сохраненное содержимое по каждому файлу: {путь: {ключ: JSON значения}}
+_snapshots = {}
+_journal_sizes = {}
+# Хэш основного файла, к которому относится журнал: {путь: хэш}
+_base_digests = {}
+_lock = threading.Lock()
+
+def _fsync_dir(path):
+    """Сбрасывает на диск запись каталога (переименование файла)"""
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write_json(path, data):
+    """Записывает JSON через временный файл, fsync и переименование"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _fsync_dir(path)
+
+def _digest(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+def _serialize(data):
+    return {key: json.dumps(value, ensure_ascii=False, sort_keys=True) for key, value in data.items()}
+
+def load_json_journal(path):
+    """
+    Загружает словарь: основной файл плюс изменения из журнала
+
+    Недописанная последняя строка журнала (падение во время записи)
+    пропускается. FileNotFoundError пробрасывается, если нет ни файла,
+    ни журнала.
+    """
+    journal_path = path + JOURNAL_SUFFIX
+    data = {}
+    found = False
+    base_digest = None
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw.decode("utf-8"))
+        base_digest = _digest(raw)
+        found = True
+
+    entries = 0
+    corrupted = False
+    if os.path.exists(journal_path):
+        found = True
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f):
+                try:
+                    change = json.loads(line)
+                except ValueError:
+                    corrupted = True
+                    continue
+                if number == 0 and "base" in change:
+                    if change["base"] != base_digest:
+                        # Журнал записан поверх прежнего основного файла (падение при сворачивании)
+                        corrupted = True
+                        break
+                    continue
+                entries += 1
+                if change.get("deleted"):
+                    data.pop(change["key"], None)
+                else:
+                    data[change["key"]] = change["value"]
+
+    if not found:
+        raise FileNotFoundError(path)
+
+    with _lock:
+        # После поврежденного журнала следующее сохранение перепишет файл целиком
+        if corrupted:
+            _snapshots.pop(path, None)
+        else:
+            _snapshots[path] = _serialize(data)
+        _journal_sizes[path] = entries
+        _base_digests[path] = base_digest
+    return data
+
+def compact_json_journal(path, data):
+    """Переписывает основной файл целиком и очищает журнал"""
+    with _lock:
+        atomic_write_json(path, data)
+        with open(path, "rb") as f:
+            _base_digests[path] = _digest(f.read())
+        # Падение до удаления журнала безопасно: его заголовок не совпадет с новым файлом
+        journal_path = path + JOURNAL_SUFFIX
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        _snapshots[path] = _serialize(data)
+        _journal_sizes[path] = 0
+
+def save_json_journal(path, data):
+    """
+    Сохраняет словарь, дописывая в журнал только изменившиеся ключи
+
+    Если файл в этом процессе еще не загружался или журнал вырос больше
+    словаря, файл переписывается целиком (атомарно).
+
+    Returns:
+        int: Количество записанных изменений (для полной записи — размер словаря)
+    """
+    with _lock:
+        snapshot = _snapshots.get(path)
+    if snapshot is None:
+        compact_json_journal(path, data)
+        return len(data)
+
+    current = _serialize(data)
+    changes = [{"key": key, "value": data[key]} for key, value in current.items() if snapshot.get(key) != value]
+    changes += [{"key": key, "deleted": True} for key in snapshot if key not in current]
+    if not changes:
+        return 0
+
+    with _lock:
+        entries = _journal_sizes.get(path, 0) + len(changes)
+    if entries > max(COMPACT_MIN_ENTRIES, len(data)):
+        compact_json_journal(path, data)
+        return len(data)
+
+    with _lock:
+        journal_path = path + JOURNAL_SUFFIX
+        # Новый журнал начинается с хэша основного файла
+        header = "" if os.path.exists(journal_path) else json.dumps({"base": _base_digests.get(path)}) + "\n"
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write(header + "".join(json.dumps(change, ensure_ascii=False) + "\n" for change in changes))
+            f.flush()
+            os.fsync(f.fileno())
+        _snapshots[path] = current
+        _journal_sizes[path] = entries
+    return len(changes)
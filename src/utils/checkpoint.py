@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Контрольные точки проверки всех пар.
+
+Позиции уже проверенных пар периодически дописываются в журнал
+data/results/sweep_checkpoint.json. В режиме GitHub контрольная точка еще
+и коммитится в репозиторий (файлы раннера между запусками не
+сохраняются) — но редко и в фоновом потоке, а сразу — только при ошибке
+или прерывании. Проверка с --resume берет готовые пары из
+контрольной точки и запрашивает только оставшиеся. После успешного
+сохранения состояния контрольная точка очищается.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils.atomic_store import load_json_journal, save_json_journal
+from src.utils.github_sync import get_github_sync
+
+def get_project_root():
+    """Получает путь к корневой папке проекта"""
+    return os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+CHECKPOINT_REPO_PATH = "data/results/sweep_checkpoint.json"
+CHECKPOINT_FILE = os.path.join(get_project_root(), "data", "results", "sweep_checkpoint.json")
+
+# Сохранять локально не реже, чем раз в столько секунд или столько новых пар
+CHECKPOINT_INTERVAL = 60
+CHECKPOINT_PAIRS = 25
+
+# Как часто коммитить контрольную точку в репозиторий во время проверки (секунды)
+CHECKPOINT_REPO_INTERVAL = 600
+
+# Более старая контрольная точка при --resume не используется (секунды)
+CHECKPOINT_MAX_AGE = 24 * 3600
+
+META_KEY = "__meta__"
+
+def checkpoint_key(term, country):
+    """Ключ пары в контрольной точке (как в last_state.json)"""
+    return f"{country.lower()}|{term}"
+
+class SweepCheckpoint:
+    """Позиции проверенных пар текущей проверки: ключ пары → {bundleId: позиция}"""
+
+    def __init__(self, bundle_id, path=CHECKPOINT_FILE, sync=None, interval=CHECKPOINT_INTERVAL, every_pairs=CHECKPOINT_PAIRS, repo_interval=CHECKPOINT_REPO_INTERVAL):
+        self.bundle_id = bundle_id
+        self.path = path
+        self.sync = sync
+        self.interval = interval
+        self.every_pairs = every_pairs
+        self.repo_interval = repo_interval
+        self.started_ts = int(time.time())
+        self.done = {}
+        self._unsaved = 0
+        self._saved_at = time.time()
+        self._pushed_at = time.time()
+        self._push_thread = None
+
+    def _read(self):
+        if self.sync is not None:
+            try:
+                data = self.sync.load_json(CHECKPOINT_REPO_PATH)
+                if data is not None:
+                    return data
+            except Exception as e:
+                print(f"❌ Ошибка загрузки контрольной точки из репозитория: {e}")
+        try:
+            return load_json_journal(self.path)
+        except FileNotFoundError:
+            return {}
+
+    def load(self):
+        """
+        Загружает контрольную точку для --resume
+
+        Контрольная точка другого приложения или старше CHECKPOINT_MAX_AGE
+        не используется.
+
+        Returns:
+            int: Количество уже проверенных пар
+        """
+        data = self._read()
+        meta = data.pop(META_KEY, None) or {}
+        if not data:
+            print("ℹ️ Контрольная точка пуста, проверяем все пары")
+            return 0
+        if meta.get("bundle_id") != self.bundle_id:
+            print("⚠️ Контрольная точка другого приложения, проверяем все пары")
+            return 0
+        if time.time() - meta.get("ts", 0) > CHECKPOINT_MAX_AGE:
+            print("⚠️ Контрольная точка устарела, проверяем все пары")
+            return 0
+
+        self.started_ts = meta["ts"]
+        self.done = data
+        print(f"♻️ Контрольная точка загружена: {len(data)} пар уже проверено")
+        return len(data)
+
+    def _data(self):
+        data = {META_KEY: {"bundle_id": self.bundle_id, "ts": self.started_ts}}
+        data.update(self.done)
+        return data
+
+    def save(self):
+        """Дописывает проверенные пары в локальный журнал"""
+        try:
+            save_json_journal(self.path, self._data())
+        except Exception as e:
+            print(f"❌ Ошибка сохранения контрольной точки: {e}")
+        self._unsaved = 0
+        self._saved_at = time.time()
+
+    def _push(self, data):
+        try:
+            self.sync.save_json_files({CHECKPOINT_REPO_PATH: data}, "Checkpoint App Store monitor sweep")
+            print(f"💾 Контрольная точка в репозитории: {len(data) - 1} пар")
+        except Exception as e:
+            print(f"❌ Ошибка сохранения контрольной точки в репозиторий: {e}")
+
+    def push(self, background=False):
+        """
+        Коммитит контрольную точку в репозиторий (режим GitHub)
+
+        В фоне коммит не запускается, пока не завершен предыдущий.
+        """
+        if self.sync is None:
+            return
+        self.wait_push()
+        self._pushed_at = time.time()
+        data = self._data()
+        if background:
+            self._push_thread = threading.Thread(target=self._push, args=(data,), daemon=True)
+            self._push_thread.start()
+        else:
+            self._push(data)
+
+    def wait_push(self):
+        """Дожидается фонового коммита контрольной точки"""
+        if self._push_thread is not None:
+            self._push_thread.join()
+            self._push_thread = None
+
+    def record(self, term, country, ranks):
+        """
+        Запоминает позиции пары и при необходимости сохраняет контрольную точку
+
+        Неудачная проверка (ranks is None) не запоминается, чтобы --resume
+        запросил пару снова.
+        """
+        if ranks is None:
+            return
+        self.done[checkpoint_key(term, country)] = ranks
+        self._unsaved += 1
+        if self._unsaved >= self.every_pairs or time.time() - self._saved_at >= self.interval:
+            self.save()
+            push_running = self._push_thread is not None and self._push_thread.is_alive()
+            if self.sync is not None and not push_running and time.time() - self._pushed_at >= self.repo_interval:
+                self.push(background=True)
+
+    def abort(self, completed=()):
+        """
+        Сохраняет контрольную точку при ошибке или прерывании проверки
+
+        Args:
+            completed: Полученные, но еще не отданные результаты [(term, country, позиции)]
+        """
+        for term, country, ranks in completed:
+            if ranks is not None:
+                self.done[checkpoint_key(term, country)] = ranks
+        self.save()
+        self.push()
+        print(f"💾 Контрольная точка сохранена: {len(self.done)} пар")
+
+    def clear(self):
+        """
+        Очищает контрольную точку после успешного сохранения состояния
+
+        Returns:
+            dict: Файлы для того же коммита в репозиторий {путь: данные}
+        """
+        self.wait_push()
+        self.done = {}
+        try:
+            save_json_journal(self.path, {})
+        except Exception as e:
+            print(f"❌ Ошибка очистки контрольной точки: {e}")
+        return {CHECKPOINT_REPO_PATH: {}}
+
+    def wrap(self, fetch):
+        """
+        Источник позиций для stream_sweep(fetch=...) с контрольными точками
+
+        Пары из контрольной точки отдаются сразу, остальные запрашиваются
+        через fetch и записываются в контрольную точку. При ошибке или
+        прерывании (Ctrl+C) контрольная точка сохраняется перед выходом.
+        """
+        def fetch_remaining(pairs, hints):
+            remaining = []
+            for index, (term, country) in enumerate(pairs):
+                ranks = self.done.get(checkpoint_key(term, country))
+                if ranks is not None:
+                    yield index, ranks
+                else:
+                    remaining.append(index)
+            if not remaining:
+                return
+
+            remaining_pairs = [pairs[index] for index in remaining]
+            completed = []
+
+            def on_abort(results):
+                completed.extend(remaining_pairs[sub_index] + (ranks,) for sub_index, ranks in results)
+
+            source = fetch(remaining_pairs, hints, on_abort=on_abort)
+            try:
+                for sub_index, ranks in source:
+                    term, country = remaining_pairs[sub_index]
+                    self.record(term, country, ranks)
+                    yield remaining[sub_index], ranks
+            except BaseException:
+                # Закрываем источник сразу, чтобы получить его готовые результаты
+                source.close()
+                self.abort(completed)
+                raise
+
+        return fetch_remaining
+
+def open_checkpoint(bundle_id, resume=False, use_repo=False):
+    """
+    Создает контрольную точку проверки
+
+    Args:
+        resume: Загрузить сохраненную контрольную точку
+        use_repo: Сохранять контрольную точку и в репозиторий (GitHub Actions)
+    """
+    checkpoint = SweepCheckpoint(bundle_id, sync=get_github_sync() if use_repo else None)
+    if resume:
+        checkpoint.load()
+    return checkpoint
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Синхронизация файлов состояния с репозиторием GitHub.
+
+При загрузке через contents API запоминаются SHA блоба и ETag каждого
+файла. При сохранении файлы, содержимое которых не изменилось (тот же SHA
+блоба), пропускаются, а все остальные записываются одним коммитом через
+git data API: ref → commit → новое дерево → новый коммит → обновление ref.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import requests
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_BRANCH = "main"
+REQUEST_TIMEOUT = 30
+
+def git_blob_sha(content: bytes):
+    """SHA блоба git для содержимого файла"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def dump_json_bytes(data):
+    """Сериализует JSON так же, как он хранится в репозитории"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+class GitHubSyncError(Exception):
+    """Ошибка запроса к GitHub API"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class GitHubSync:
+    """Загрузка файлов из репозитория и запись изменений одним коммитом"""
+
+    def __init__(self, repo, token, branch=DEFAULT_BRANCH, api_url=None, session=None):
+        self.repo = repo
+        self.branch = branch
+        self.api_url = (api_url or os.environ.get("GITHUB_API_URL") or DEFAULT_API_URL).rstrip("/")
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json"
+        })
+        # Путь → {"sha", "etag", "content"} по последней загрузке/записи
+        self._files = {}
+        # Путь → содержимое (bytes), ожидающее коммита
+        self._staged = {}
+        self._lock = threading.Lock()
+
+    def _url(self, path):
+        return f"{self.api_url}/repos/{self.repo}/{path}"
+
+    def _request(self, method, path, expected=(200,), **kwargs):
+        response = self.session.request(method, self._url(path), timeout=REQUEST_TIMEOUT, **kwargs)
+        if response.status_code not in expected:
+            raise GitHubSyncError(f"{method} {path}: HTTP {response.status_code}", response.status_code)
+        return response
+
+    def load_json(self, file_path):
+        """
+        Загружает JSON-файл из репозитория
+
+        Повторная загрузка использует If-None-Match: при ответе 304 файл
+        берется из памяти.
+
+        Returns:
+            Данные файла или None, если файла нет в репозитории
+        """
+        cached = self._files.get(file_path)
+        headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+        response = self._request(
+            "GET", f"contents/{file_path}", expected=(200, 304, 404),
+            params={"ref": self.branch}, headers=headers
+        )
+
+        if response.status_code == 404:
+            return None
+        if response.status_code == 304:
+            return json.loads(cached["content"].decode("utf-8"))
+
+        payload = response.json()
+        content = base64.b64decode(payload.get("content", ""))
+        with self._lock:
+            self._files[file_path] = {
+                "sha": payload.get("sha") or git_blob_sha(content),
+                "etag": response.headers.get("ETag"),
+                "content": content
+            }
+        return json.loads(content.decode("utf-8"))
+
+    def stage_json(self, file_path, data):
+        """
+        Добавляет файл в следующий коммит
+
+        Returns:
+            bool: False, если содержимое совпадает с версией в репозитории
+        """
+        content = dump_json_bytes(data)
+        with self._lock:
+            known = self._files.get(file_path)
+            if known and known["sha"] == git_blob_sha(content):
+                self._staged.pop(file_path, None)
+                return False
+            self._staged[file_path] = content
+        return True
+
+    def commit(self, message):
+        """
+        Записывает все добавленные файлы одним коммитом
+
+        Returns:
+            str | None: SHA нового коммита или None, если изменений нет
+        """
+        with self._lock:
+            staged = dict(self._staged)
+        if not staged:
+            return None
+
+        ref = self._request("GET", f"git/ref/heads/{self.branch}").json()
+        parent_sha = ref["object"]["sha"]
+        parent = self._request("GET", f"git/commits/{parent_sha}").json()
+
+        tree = self._request("POST", "git/trees", expected=(201,), json={
+            "base_tree": parent["tree"]["sha"],
+            "tree": [
+                {"path": path, "mode": "100644", "type": "blob", "content": content.decode("utf-8")}
+                for path, content in sorted(staged.items())
+            ]
+        }).json()
+
+        commit = self._request("POST", "git/commits", expected=(201,), json={
+            "message": message,
+            "tree": tree["sha"],
+            "parents": [parent_sha]
+        }).json()
+
+        self._request("PATCH", f"git/refs/heads/{self.branch}", json={"sha": commit["sha"]})
+
+        with self._lock:
+            for path, content in staged.items():
+                self._files[path] = {"sha": git_blob_sha(content), "etag": None, "content": content}
+                if self._staged.get(path) is content:
+                    del self._staged[path]
+        return commit["sha"]
+
+    def save_json_files(self, files, message):
+        """
+        Сохраняет несколько JSON-файлов одним коммитом
+
+        Args:
+            files: Словарь {путь в репозитории: данные}
+            message: Сообщение коммита
+
+        Returns:
+            list: Пути файлов, которые действительно изменились
+        """
+        changed = [path for path, data in files.items() if self.stage_json(path, data)]
+        if changed:
+            self.commit(message)
+        return changed
+
+_sync = None
+_sync_lock = threading.Lock()
+
+def get_github_sync():
+    """
+    Возвращает общий экземпляр GitHubSync
+
+    Returns:
+        GitHubSync | None: None, если не заданы GITHUB_TOKEN и GITHUB_REPOSITORY
+    """
+    global _sync
+    token = os.environ.get("GITHUB_TOKEN")
+    repo = os.environ.get("GITHUB_REPOSITORY")
+    if not token or not repo:
+        return None
+    with _sync_lock:
+        if _sync is None or _sync.repo != repo:
+            _sync = GitHubSync(repo, token)
+        return _sync
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+История позиций в SQLite.
+
+Каждая проверка добавляет строки (время, страна, ключевое слово, bundleId,
+позиция) в таблицу observations, файл не переписывается целиком. Текущее
+состояние (initial_rank, last_rank, время изменения) строится
+представлением rank_state по тем же правилам, что и RankState.update.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils.state_manager import load_state
+from src.utils.state_model import RankState, RankRecord
+
+def get_project_root():
+    """Получает путь к корневой папке проекта"""
+    return os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+HISTORY_DB = os.path.join(get_project_root(), "data", "results", "rank_history.db")
+LEGACY_STATE_FILE = os.path.join(get_project_root(), "data", "results", "last_state.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    ts INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    term TEXT NOT NULL,
+    bundle TEXT NOT NULL,
+    rank INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_observations_pair_ts ON observations (country, term, ts);
+
+-- initial_rank: первая найденная позиция; last_change_ts: время последнего
+-- изменения позиции (первое наблюдение считается изменением, если приложение найдено)
+CREATE VIEW IF NOT EXISTS rank_state AS
+WITH marked AS (
+    SELECT country, term, bundle, ts, rank,
+           LAG(rank) OVER pair AS prev_rank,
+           ROW_NUMBER() OVER pair AS rn,
+           ROW_NUMBER() OVER (PARTITION BY country, term, bundle ORDER BY ts DESC, rowid DESC) AS rn_desc,
+           MIN(CASE WHEN rank IS NOT NULL THEN ts END) OVER (PARTITION BY country, term, bundle) AS first_found_ts
+    FROM observations
+    WINDOW pair AS (PARTITION BY country, term, bundle ORDER BY ts, rowid)
+)
+SELECT country, term, bundle,
+       MIN(CASE WHEN ts = first_found_ts THEN rank END) AS initial_rank,
+       MAX(CASE WHEN rn_desc = 1 THEN rank END) AS last_rank,
+       MAX(CASE WHEN (rn = 1 AND rank IS NOT NULL) OR (rn > 1 AND rank IS NOT prev_rank) THEN ts END) AS last_change_ts,
+       MAX(ts) AS last_ts
+FROM marked
+GROUP BY country, term, bundle;
+"""
+
+class RankHistory:
+    """Хранилище наблюдений позиций в SQLite"""
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """Закрывает соединение с базой"""
+        self._conn.close()
+
+    def _insert(self, rows):
+        """Добавляет строки наблюдений одной транзакцией"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO observations (ts, country, term, bundle, rank) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def record(self, bundle_id, ranks, ts=None):
+        """
+        Добавляет наблюдения одной проверки
+
+        Args:
+            bundle_id: ID приложения
+            ranks: Итерируемые тройки (country, term, rank)
+            ts: Unix-время проверки (по умолчанию — текущее)
+        """
+        ts = int(ts if ts is not None else time.time())
+        return self._insert([(ts, country.lower(), term, bundle_id, rank) for country, term, rank in ranks])
+
+    def record_state(self, bundle_id, state, ts=None):
+        """Добавляет наблюдения из RankState после проверки (включая позиции конкурентов)"""
+        ts = int(ts if ts is not None else time.time())
+        rows = []
+        for (country, term), record in state.items():
+            rows.append((ts, country, term, bundle_id, record.last_rank))
+            for competitor_id, rank in (record.competitors or {}).items():
+                rows.append((ts, country, term, competitor_id, rank))
+        return self._insert(rows)
+
+    def is_empty(self):
+        """Проверяет, есть ли в базе хотя бы одно наблюдение"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM observations LIMIT 1").fetchone() is None
+
+    def load_state(self, bundle_id):
+        """
+        Строит RankState из истории
+
+        Позиции остальных bundleId по тем же парам попадают в поле competitors.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT country, term, bundle, initial_rank, last_rank, last_change_ts FROM rank_state"
+            ).fetchall()
+
+        state = RankState()
+        competitors = {}
+        for country, term, bundle, initial_rank, last_rank, last_change_ts in rows:
+            if bundle == bundle_id:
+                state.set(country, term, RankRecord(initial_rank, last_rank, last_change_ts))
+            else:
+                competitors.setdefault((country, term), {})[bundle] = last_rank
+
+        for (country, term), ranks in competitors.items():
+            record = state.get(country, term)
+            if record is not None:
+                record.competitors = ranks
+        return state
+
+    def get_history(self, country, term, bundle_id, since=None):
+        """Возвращает наблюдения пары [(unix-время, позиция)] по возрастанию времени"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT ts, rank FROM observations WHERE country = ? AND term = ? AND bundle = ? AND ts >= ? ORDER BY ts",
+                (country.lower(), term, bundle_id, since or 0)
+            ).fetchall()
+
+    def recent_ranks(self, bundle_id, limit):
+        """
+        Последние limit позиций каждой пары одним запросом
+
+        Returns:
+            dict: {(страна, ключевое слово): [позиции по возрастанию времени]}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT country, term, rank FROM (
+                    SELECT country, term, ts, rowid AS id, rank,
+                           ROW_NUMBER() OVER (PARTITION BY country, term ORDER BY ts DESC, rowid DESC) AS rn_desc
+                    FROM observations WHERE bundle = ?
+                )
+                WHERE rn_desc <= ?
+                ORDER BY country, term, ts, id
+                """,
+                (bundle_id, limit)
+            ).fetchall()
+
+        ranks = {}
+        for country, term, rank in rows:
+            ranks.setdefault((country, term), []).append(rank)
+        return ranks
+
+    def import_state(self, bundle_id, state, now=None):
+        """
+        Переносит старое состояние (last_state.json) в историю
+
+        Для каждой пары создаются наблюдения, из которых представление
+        rank_state восстанавливает initial_rank, last_rank и время изменения.
+        """
+        now = int(now if now is not None else time.time())
+        rows = []
+        for (country, term), record in RankState.from_dict(state).items():
+            change_ts = record.last_change_ts or now
+            if record.initial_rank is not None and record.initial_rank != record.last_rank:
+                rows.append((change_ts - 1, country, term, bundle_id, record.initial_rank))
+            rows.append((change_ts, country, term, bundle_id, record.last_rank))
+        return self._insert(rows)
+
+def open_history(bundle_id, path=HISTORY_DB, legacy_file=LEGACY_STATE_FILE):
+    """Открывает историю позиций и при первом запуске переносит в нее last_state.json"""
+    history = RankHistory(path)
+    if history.is_empty() and os.path.exists(legacy_file):
+        legacy_state = load_state(legacy_file)
+        if legacy_state:
+            count = history.import_state(bundle_id, legacy_state)
+            print(f"📦 {os.path.basename(legacy_file)} перенесен в историю позиций: {count} наблюдений")
+    return history
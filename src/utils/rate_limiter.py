@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import time
+import requests
+
+class TokenBucket:
+    """Потокобезопасный token bucket: rate токенов в секунду, не более capacity подряд"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Блокирует поток, пока не появится свободный токен"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class KeyedRateLimiter:
+    """Набор token bucket'ов с отдельным лимитом на каждый ключ (например, страну)"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Ждет токен в bucket'е для ключа key"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+        bucket.acquire()
+
+# Статусы, при которых App Store просит снизить темп
+THROTTLE_STATUSES = (403, 429)
+
+# Количество повторов запроса после ошибки троттлинга
+DEFAULT_RETRIES = 3
+
+def error_status(error):
+    """Извлекает HTTP статус из исключения (NodeWorkerError или requests)"""
+    status = getattr(error, "status", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+def is_retryable(error):
+    """Проверяет, является ли ошибка признаком перегрузки/сбоя сети (стоит повторить)"""
+    status = error_status(error)
+    if status is not None:
+        return status in THROTTLE_STATUSES or status >= 500
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return bool(getattr(error, "retryable", False))
+
+class AdaptiveThrottle:
+    """
+    Общий адаптивный регулятор темпа запросов (AIMD)
+
+    Пока ответы успешные, темп плавно растет до max_rate. На 403/429/5xx и
+    сетевых ошибках темп делится пополам, а следующие запросы ждут паузу,
+    растущую экспоненциально (со случайным jitter) с каждой ошибкой подряд.
+    """
+
+    def __init__(self, rate: float = 1.0, min_rate: float = 0.2, max_rate: float = 5.0,
+                 increase: float = 0.05, backoff_base: float = 2.0, backoff_max: float = 120.0):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._rate = rate
+        self._failures = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def current_rate(self):
+        """Текущий темп (запросов в секунду)"""
+        return self._rate
+
+    def acquire(self):
+        """Резервирует слот для запроса и ждет его наступления"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self._rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def on_success(self):
+        """Успешный ответ: аддитивно увеличиваем темп"""
+        with self._lock:
+            self._failures = 0
+            self._rate = min(self.max_rate, self._rate + self.increase)
+
+    def on_failure(self, status=None):
+        """Ошибка троттлинга: уменьшаем темп и откладываем следующие запросы"""
+        with self._lock:
+            self._failures += 1
+            self._rate = max(self.min_rate, self._rate / 2)
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+            delay *= random.uniform(0.5, 1.5)
+            self._next_slot = max(self._next_slot, time.monotonic() + delay)
+            rate = self._rate
+        print(f"⏳ Замедление (статус {status or 'ERR'}): пауза {delay:.1f} с, темп {rate:.2f} запр/с")
+
+_throttle = AdaptiveThrottle()
+
+def get_throttle():
+    """Возвращает общий регулятор темпа для всех скраперов"""
+    return _throttle
+
+def throttled_call(fn, *args, retries: int = DEFAULT_RETRIES, throttle: AdaptiveThrottle = None, **kwargs):
+    """
+    Вызывает fn через общий регулятор темпа с повтором при ошибках троттлинга
+
+    Ошибки, которые не являются признаком перегрузки (404, неверные
+    параметры), пробрасываются сразу без повторов.
+    """
+    throttle = throttle or get_throttle()
+    for attempt in range(retries + 1):
+        throttle.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            throttle.on_failure(error_status(e))
+            if attempt == retries:
+                raise
+            continue
+        throttle.on_success()
+        return result
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Дисковый кэш ответов скраперов.
+
+Ключ записи — хэш от (эндпоинт, параметры запроса), значение хранится
+сжатым zlib JSON. У каждого эндпоинта свой TTL, а общий размер кэша
+ограничен: при превышении удаляются записи, которые дольше всего не читались.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+def get_project_root():
+    """Получает путь к корневой папке проекта"""
+    return os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+CACHE_DIR = os.path.join(get_project_root(), "data", "cache", "responses")
+
+# TTL по эндпоинтам (секунды)
+DEFAULT_TTLS = {
+    "search": 10 * 60,
+    "search_ids": 10 * 60,
+    "list": 30 * 60,
+    "app": 6 * 60 * 60,
+    "lookup": 6 * 60 * 60,
+    "suggest": 60 * 60
+}
+DEFAULT_TTL = 10 * 60
+
+# Эндпоинты поисковой выдачи (из них берутся позиции)
+SEARCH_ENDPOINTS = ("search", "search_ids")
+
+# Максимальный размер кэша на диске (байты)
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# Значение-маркер «нет в кэше» (None — допустимый ответ)
+MISS = object()
+
+class ResponseCache:
+    """Content-addressed кэш ответов с TTL и LRU вытеснением по размеру"""
+
+    def __init__(self, directory=CACHE_DIR, ttls=None, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.directory = directory
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    def make_key(self, endpoint, params):
+        """Строит ключ записи по эндпоинту и параметрам"""
+        raw = json.dumps([endpoint, params], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, endpoint):
+        """TTL для эндпоинта"""
+        return self.ttls.get(endpoint, self.ttls.get("*", DEFAULT_TTL))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json.z")
+
+    def get(self, endpoint, params):
+        """Возвращает закэшированный ответ или MISS"""
+        if not self.enabled or self.ttl_for(endpoint) <= 0:
+            return MISS
+        path = self._path(self.make_key(endpoint, params))
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_for(endpoint):
+                return MISS
+            with open(path, "rb") as f:
+                data = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+            # Время последнего чтения используется для LRU
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            return data
+        except FileNotFoundError:
+            return MISS
+        except Exception as e:
+            print(f"⚠️ Поврежденная запись кэша {path}: {e}")
+            return MISS
+
+    def set(self, endpoint, params, value):
+        """Сохраняет ответ в кэш"""
+        if not self.enabled or self.ttl_for(endpoint) <= 0:
+            return
+        path = self._path(self.make_key(endpoint, params))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"❌ Ошибка записи в кэш: {e}")
+            return
+
+        # Полный обход каталога только когда приблизительный размер превышен
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(payload)
+            need_evict = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if need_evict:
+            self.evict()
+
+    def _entries(self):
+        """Список записей (путь, размер, время последнего чтения)"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json.z"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_atime))
+        return entries
+
+    def evict(self):
+        """Удаляет давно не читанные записи, пока кэш не уложится в max_bytes"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._total_bytes = total
+
+    def clear(self):
+        """Полностью очищает кэш"""
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = 0
+
+_cache = ResponseCache()
+
+def get_cache():
+    """Возвращает общий кэш ответов"""
+    return _cache
+
+def configure_cache(enabled=True, ttl=None):
+    """
+    Настраивает общий кэш ответов
+
+    Args:
+        enabled: Включить/выключить кэш
+        ttl: Единый TTL в секундах для всех эндпоинтов (None — TTL по умолчанию)
+    """
+    _cache.enabled = enabled
+    if ttl is not None:
+        _cache.ttls = {endpoint: ttl for endpoint in DEFAULT_TTLS}
+        _cache.ttls["*"] = ttl
+
+def bypass_cache(endpoints=SEARCH_ENDPOINTS):
+    """
+    Отключает кэш для эндпоинтов (TTL 0): ответы не читаются и не записываются
+
+    Нужно для проверок по расписанию: пара может быть проверена раньше,
+    чем истечет TTL выдачи, и получила бы старую позицию из кэша.
+    """
+    for endpoint in endpoints:
+        _cache.ttls[endpoint] = 0
+
+def cached_call(endpoint, params, fn, *args, **kwargs):
+    """Возвращает ответ из кэша или вызывает fn и сохраняет результат"""
+    cache = get_cache()
+    value = cache.get(endpoint, params)
+    if value is not MISS:
+        return value
+    value = fn(*args, **kwargs)
+    cache.set(endpoint, params, value)
+    return value
@@ -3,10 +3,16 @@
 
 import json
 import os
-import base64
-import requests
 from datetime import datetime
 import pytz
+import sys
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils.atomic_store import load_json_journal, save_json_journal
+from src.utils.github_sync import get_github_sync
+from src.utils.telegram_utils import save_message_ids, save_message_hashes, MESSAGE_IDS_REPO_PATH, MESSAGE_HASHES_REPO_PATH
 
 def get_project_root():
     """Получает путь к корневой папке проекта"""
@@ -15,8 +21,7 @@ def get_project_root():
 def load_state(filename):
     """Загружает состояние из файла"""
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_json_journal(filename)
     except FileNotFoundError:
         return {}
     except Exception as e:
@@ -24,29 +29,31 @@ def load_state(filename):
     return {}
 
 def save_state(state, filename):
-    """Сохраняет состояние в файл"""
+    """Сохраняет состояние в файл (в журнал попадают только изменившиеся записи)"""
     try:
-        # Создаем директорию если не существует
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        save_json_journal(filename, state)
     except Exception as e:
         print(f"❌ Ошибка сохранения состояния: {e}")
 
-def get_now_str():
-    """Возвращает текущее время в строковом формате с учетом часового пояса"""
+def get_timezone():
+    """Возвращает часовой пояс из переменной окружения TZ (по умолчанию UTC)"""
     # Проверяем переменную окружения TZ
     timezone_str = os.environ.get('TZ', 'UTC')
     
     try:
         # Пытаемся использовать указанный часовой пояс
-        tz = pytz.timezone(timezone_str)
-        now = datetime.now(tz)
+        return pytz.timezone(timezone_str)
     except:
         # Если ошибка, используем UTC
-        now = datetime.now(pytz.UTC)
-    
-    return now.strftime("%d %b %H:%M")
+        return pytz.UTC
+
+def format_timestamp(ts):
+    """Форматирует unix-время в строку вида "11 Jun 11:58" с учетом часового пояса"""
+    return datetime.fromtimestamp(ts, get_timezone()).strftime("%d %b %H:%M")
+
+def get_now_str():
+    """Возвращает текущее время в строковом формате с учетом часового пояса"""
+    return datetime.now(get_timezone()).strftime("%d %b %H:%M")
 
 def load_table_config():
     """Загружает конфигурацию таблицы"""
@@ -69,142 +76,81 @@ def load_table_config():
             "headers": ["KW", "Now", "UpdKW"]
     }
 
+def load_competitors_config():
+    """
+    Загружает список конкурентов по ключевым словам
+
+    Формат: {"ключевое слово": {"Название": "bundle.id"}}, ключ "*"
+    задает конкурентов для всех ключевых слов
+    """
+    config_path = os.path.join(get_project_root(), "data", "config", "competitors.json")
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"❌ Ошибка загрузки конфигурации конкурентов: {e}")
+        return {}
+
 def save_table_config(config, filename="table_config.json"):
     """Сохраняет конфигурацию таблицы"""
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(config, f, ensure_ascii=False, indent=2)
 
-def convert_time_format(time_str):
-    """Конвертирует новый формат времени в старый"""
-    if not time_str or time_str == "x":
-        return time_str
-    
-    try:
-        # Пробуем распарсить новый формат "2025-06-11 01:03:22"
-        new_format = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-        return new_format.strftime("%d %b %H:%M")
-    except:
-        # Если не удалось распарсить, возвращаем как есть
-        return time_str
-
-def update_state_entry(prev_state, key, rank, timestamp):
-    """Обновляет запись состояния"""
-    prev_info = prev_state.get(key, {})
-    
-    if not isinstance(prev_info, dict):
-        prev_info = {
-            "initial_rank": prev_info,
-            "last_rank": prev_info,
-            "last_change_time": None
-        }
-    
-    # Конвертируем новый формат времени в старый
-    if prev_info.get("last_change_time"):
-        prev_info["last_change_time"] = convert_time_format(prev_info["last_change_time"])
-    
-    # Если позиция изменилась, обновляем время последнего изменения
-    if prev_info.get("last_rank") != rank:
-        prev_info["last_change_time"] = timestamp
-    
-    # Обновляем последнюю позицию
-    prev_info["last_rank"] = rank
-    
-    # Если это первая запись, устанавливаем начальную позицию
-    if "initial_rank" not in prev_info or prev_info["initial_rank"] is None:
-        prev_info["initial_rank"] = rank
-    
-    return prev_info 
-
 def save_state_to_repo(state, filename="last_state.json"):
     """Сохраняет состояние в репозиторий через GitHub API"""
+    return save_run_to_repo(state, None, filename)
+
+def save_run_to_repo(state, message_ids=None, filename="last_state.json", message_hashes=None, extra_files=None):
+    """
+    Сохраняет состояние, message_ids и хэши таблиц в репозиторий одним коммитом
+
+    Файлы, которые не изменились с момента загрузки, не записываются.
+    extra_files ({путь в репозитории: данные}) попадают в тот же коммит.
+    При ошибке данные сохраняются локально.
+    """
+    files = {f"data/results/{filename}": state}
+    if message_ids is not None:
+        files[MESSAGE_IDS_REPO_PATH] = message_ids
+    if message_hashes is not None:
+        files[MESSAGE_HASHES_REPO_PATH] = message_hashes
+    files.update(extra_files or {})
+
+    def save_locally():
+        save_state(state, filename)
+        if message_ids is not None:
+            save_message_ids(message_ids)
+        if message_hashes is not None:
+            save_message_hashes(message_hashes)
+
     try:
-        # Получаем токен из переменных окружения
-        github_token = os.environ.get('GITHUB_TOKEN')
-        if not github_token:
-            print("⚠️ GITHUB_TOKEN не найден, сохраняем локально")
-            return save_state(state, filename)
-        
-        # Получаем информацию о репозитории
-        repo = os.environ.get('GITHUB_REPOSITORY')
-        if not repo:
-            print("⚠️ GITHUB_REPOSITORY не найден, сохраняем локально")
-            return save_state(state, filename)
-        
-        # Путь к файлу в репозитории
-        file_path = f"data/results/{filename}"
-        
-        # Получаем текущий SHA файла (если существует)
-        url = f"https://api.github.com/repos/{repo}/contents/{file_path}"
-        headers = {
-            "Authorization": f"token {github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+        sync = get_github_sync()
+        if sync is None:
+            print("⚠️ GITHUB_TOKEN или GITHUB_REPOSITORY не найден, сохраняем локально")
+            return save_locally()
         
-        # Проверяем, существует ли файл
-        response = requests.get(url, headers=headers)
-        sha = None
-        if response.status_code == 200:
-            sha = response.json().get("sha")
-        
-        # Подготавливаем данные для загрузки
-        content = json.dumps(state, ensure_ascii=False, indent=2)
-        content_bytes = content.encode('utf-8')
-        content_b64 = base64.b64encode(content_bytes).decode('utf-8')
-        
-        data = {
-            "message": f"Update {filename} for App Store monitor",
-            "content": content_b64,
-            "branch": "main"
-        }
-        
-        if sha:
-            data["sha"] = sha
-        
-        # Загружаем файл
-        response = requests.put(url, headers=headers, json=data)
-        
-        if response.status_code in [200, 201]:
-            print(f"✅ {filename} сохранен в репозиторий: {file_path}")
-            return True
+        changed = sync.save_json_files(files, f"Update {', '.join(os.path.basename(p) for p in files)} for App Store monitor")
+        if changed:
+            print(f"✅ Сохранено в репозиторий одним коммитом: {', '.join(changed)}")
         else:
-            print(f"❌ Ошибка сохранения {filename} в репозиторий: {response.status_code}")
-            return save_state(state, filename)
+            print("✅ Файлы в репозитории не изменились, коммит не нужен")
+        return True
             
     except Exception as e:
-        print(f"❌ Ошибка сохранения {filename} в репозиторий: {e}")
-        return save_state(state, filename)
+        print(f"❌ Ошибка сохранения в репозиторий: {e}")
+        return save_locally()
 
 def load_state_from_repo(filename="last_state.json"):
     """Загружает состояние из репозитория через GitHub API"""
     try:
-        # Получаем токен из переменных окружения
-        github_token = os.environ.get('GITHUB_TOKEN')
-        if not github_token:
-            print("⚠️ GITHUB_TOKEN не найден, загружаем локально")
+        sync = get_github_sync()
+        if sync is None:
+            print("⚠️ GITHUB_TOKEN или GITHUB_REPOSITORY не найден, загружаем локально")
             return load_state(filename)
         
-        # Получаем информацию о репозитории
-        repo = os.environ.get('GITHUB_REPOSITORY')
-        if not repo:
-            print("⚠️ GITHUB_REPOSITORY не найден, загружаем локально")
-            return load_state(filename)
-        
-        # Путь к файлу в репозитории
-        file_path = f"data/results/{filename}"
-        
-        # Получаем содержимое файла
-        url = f"https://api.github.com/repos/{repo}/contents/{file_path}"
-        headers = {
-            "Authorization": f"token {github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 200:
-            content = response.json().get("content", "")
-            content_decoded = base64.b64decode(content).decode('utf-8')
-            data = json.loads(content_decoded)
+        data = sync.load_json(f"data/results/{filename}")
+        if data is not None:
             print(f"✅ {filename} загружен из репозитория: {len(data)} записей")
             return data
         else:
@@ -213,4 +159,4 @@ def load_state_from_repo(filename="last_state.json"):
             
     except Exception as e:
         print(f"❌ Ошибка загрузки {filename} из репозитория: {e}")
-        return load_state(filename) 
\ No newline at end of file
+        return load_state(filename)
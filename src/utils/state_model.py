@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Компактное представление состояния позиций в памяти.
+
+Запись пары — объект с __slots__ вместо словаря, ключ — кортеж
+(страна, ключевое слово) из интернированных строк, время изменения —
+целое unix-время. В строку время переводится только при выводе таблицы.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils.state_manager import get_timezone
+
+def parse_time_str(time_str, now=None):
+    """
+    Переводит строку "11 Jun 11:58" из старого состояния в unix-время
+
+    Год в строке не хранится: берется текущий, а если дата получается в
+    будущем — предыдущий.
+    """
+    if not time_str or time_str == "x":
+        return None
+    tz = get_timezone()
+    now = now or datetime.now(tz)
+    for fmt in ("%d %b %H:%M", "%Y-%m-%d %H:%M:%S"):
+        try:
+            parsed = datetime.strptime(time_str, fmt)
+        except ValueError:
+            continue
+        if fmt == "%d %b %H:%M":
+            parsed = parsed.replace(year=now.year)
+            if tz.localize(parsed) > now:
+                parsed = parsed.replace(year=now.year - 1)
+        return int(tz.localize(parsed).timestamp())
+    return None
+
+# Версия схемы сохраняемого состояния (файлы без поля schema_version — версия 1)
+STATE_SCHEMA_VERSION = 2
+SCHEMA_KEY = "schema_version"
+
+def _migrate_v1(data):
+    """
+    Версия 1 → 2
+
+    Записи могли быть числом (только позиция) или словарем со временем
+    изменения в виде строки "11 Jun 11:58"; теперь это всегда словарь с
+    unix-временем в last_change_ts.
+    """
+    migrated = {}
+    for key, entry in data.items():
+        if "|" not in key:
+            continue
+        if not isinstance(entry, dict):
+            entry = {"initial_rank": entry, "last_rank": entry, "last_change_time": None}
+        change_ts = entry.get("last_change_ts")
+        if change_ts is None:
+            change_ts = parse_time_str(entry.get("last_change_time"))
+        migrated[key] = {
+            "initial_rank": entry.get("initial_rank"),
+            "last_rank": entry.get("last_rank"),
+            "last_change_ts": change_ts
+        }
+        if entry.get("competitors"):
+            migrated[key]["competitors"] = entry["competitors"]
+    return migrated
+
+# Миграции: версия → функция, переводящая данные в следующую версию
+MIGRATIONS = {
+    1: _migrate_v1
+}
+
+def migrate_state(data):
+    """Приводит сохраненное состояние к текущей версии схемы"""
+    version = data.get(SCHEMA_KEY, 1)
+    if version == STATE_SCHEMA_VERSION or not data:
+        return data
+    if version > STATE_SCHEMA_VERSION:
+        raise ValueError(f"Неизвестная версия схемы состояния: {version}")
+
+    count = len(data) - (SCHEMA_KEY in data)
+    while version < STATE_SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    data[SCHEMA_KEY] = version
+    print(f"📦 Состояние обновлено до схемы v{version}: {count} записей")
+    return data
+
+def state_key(country, term):
+    """Ключ пары: (страна, ключевое слово) из интернированных строк"""
+    return (sys.intern(country.lower()), sys.intern(term))
+
+class RankRecord:
+    """Состояние одной пары (ключевое слово, страна)"""
+
+    __slots__ = ("initial_rank", "last_rank", "last_change_ts", "competitors")
+
+    def __init__(self, initial_rank=None, last_rank=None, last_change_ts=None, competitors=None):
+        self.initial_rank = initial_rank
+        self.last_rank = last_rank
+        self.last_change_ts = last_change_ts
+        # bundleId конкурента → позиция (None, если конкуренты не заданы)
+        self.competitors = competitors
+
+    def updated(self, rank, ts):
+        """Возвращает новую запись после проверки с позицией rank во время ts"""
+        changed = self.last_rank != rank
+        return RankRecord(
+            self.initial_rank if self.initial_rank is not None else rank,
+            rank,
+            ts if changed else self.last_change_ts,
+            self.competitors
+        )
+
+    def to_dict(self):
+        entry = {
+            "initial_rank": self.initial_rank,
+            "last_rank": self.last_rank,
+            "last_change_ts": self.last_change_ts
+        }
+        if self.competitors:
+            entry["competitors"] = self.competitors
+        return entry
+
+    @classmethod
+    def from_dict(cls, entry):
+        """Создает запись из сохраненного словаря текущей версии схемы"""
+        return cls(entry["initial_rank"], entry["last_rank"], entry["last_change_ts"], entry.get("competitors"))
+
+    def __eq__(self, other):
+        return isinstance(other, RankRecord) and all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __repr__(self):
+        return f"RankRecord({self.initial_rank}, {self.last_rank}, {self.last_change_ts}, {self.competitors})"
+
+class RankState:
+    """Состояние всех пар: (страна, ключевое слово) → RankRecord"""
+
+    __slots__ = ("_records",)
+
+    def __init__(self):
+        self._records = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def get(self, country, term):
+        """Запись пары или None"""
+        return self._records.get(state_key(country, term))
+
+    def set(self, country, term, record):
+        self._records[state_key(country, term)] = record
+
+    def items(self):
+        """Итерация по ((страна, ключевое слово), запись)"""
+        return self._records.items()
+
+    def copy(self):
+        """Поверхностная копия (записи не изменяются на месте, см. RankRecord.updated)"""
+        state = RankState()
+        state._records = dict(self._records)
+        return state
+
+    def select(self, keys):
+        """Новое состояние только с указанными парами (страна, ключевое слово)"""
+        state = RankState()
+        for country, term in keys:
+            record = self.get(country, term)
+            if record is not None:
+                state.set(country, term, record)
+        return state
+
+    def update(self, prev_state, country, term, rank, ts):
+        """
+        Записывает результат проверки пары с учетом прошлого состояния
+
+        Время изменения обновляется, только если позиция изменилась;
+        начальная позиция — первая найденная.
+        """
+        prev = prev_state.get(country, term) if prev_state is not None else None
+        record = (prev or RankRecord()).updated(rank, ts)
+        self.set(country, term, record)
+        return record
+
+    def to_dict(self):
+        """Сохраняемый вид: {"schema_version": N, "country|term": {...}}"""
+        data = {SCHEMA_KEY: STATE_SCHEMA_VERSION}
+        # Порядок ключей не зависит от порядка завершения запросов
+        for (country, term), record in sorted(self._records.items(), key=lambda item: item[0]):
+            data[f"{country}|{term}"] = record.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Создает состояние из сохраненного словаря
+
+        Файлы старых версий схемы один раз приводятся к текущей
+        (migrate_state), дальше записи читаются без проверок формата.
+        """
+        data = migrate_state(data or {})
+        state = cls()
+        for key, entry in data.items():
+            if key == SCHEMA_KEY:
+                continue
+            country, term = key.split("|", 1)
+            state.set(country, term, RankRecord.from_dict(entry))
+        return state
@@ -4,7 +4,26 @@
 import requests
 import json
 import os
-import base64
+import hashlib
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import sys
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.utils.atomic_store import load_json_journal, save_json_journal
+from src.utils.github_sync import get_github_sync
+from src.utils.rate_limiter import KeyedRateLimiter, TokenBucket
+
+# Путь к message_ids.json в репозитории
+MESSAGE_IDS_REPO_PATH = "data/config/message_ids.json"
+
+# Хэши последних отправленных таблиц по странам
+MESSAGE_HASHES_REPO_PATH = "data/config/message_hashes.json"
 
 def get_project_root():
     """Получает путь к корневой папке проекта"""
@@ -28,20 +47,19 @@ def load_telegram_config():
             return config.get("TG_TOKEN"), config.get("TG_CHAT_ID")
     except FileNotFoundError:
         print(f"⚠️ Файл конфигурации Telegram не найден: {config_path}")
-        return "YOUR_BOT_TOKEN", "YOUR_CHAT_ID", None
+        return "YOUR_BOT_TOKEN", "YOUR_CHAT_ID"
     except Exception as e:
         print(f"❌ Ошибка загрузки конфигурации Telegram: {e}")
-        return "YOUR_BOT_TOKEN", "YOUR_CHAT_ID", None
+        return "YOUR_BOT_TOKEN", "YOUR_CHAT_ID"
 
 def load_message_ids():
     """Загружает ID сообщений из файла"""
     message_ids_path = os.path.join(get_project_root(), "data", "config", "message_ids.json")
     print(f"🔍 Загружаем message_ids из: {message_ids_path}")
     try:
-        with open(message_ids_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            print(f"✅ Загружено {len(data)} message_ids: {list(data.keys())}")
-            return data
+        data = load_json_journal(message_ids_path)
+        print(f"✅ Загружено {len(data)} message_ids: {list(data.keys())}")
+        return data
     except FileNotFoundError:
         print(f"⚠️ Файл message_ids не найден, создаем пустой словарь")
         return {}
@@ -54,68 +72,55 @@ def save_message_ids(message_ids):
     message_ids_path = os.path.join(get_project_root(), "data", "config", "message_ids.json")
     print(f"💾 Сохраняем {len(message_ids)} message_ids в: {message_ids_path}")
     try:
-        # Создаем директорию если не существует
-        os.makedirs(os.path.dirname(message_ids_path), exist_ok=True)
-        with open(message_ids_path, "w", encoding="utf-8") as f:
-            json.dump(message_ids, f, ensure_ascii=False, indent=2)
+        save_json_journal(message_ids_path, message_ids)
         print(f"✅ Message IDs сохранены успешно")
     except Exception as e:
         print(f"❌ Ошибка сохранения ID сообщений: {e}")
 
+def load_message_hashes():
+    """Загружает хэши последних отправленных таблиц из файла"""
+    hashes_path = os.path.join(get_project_root(), MESSAGE_HASHES_REPO_PATH)
+    try:
+        return load_json_journal(hashes_path)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"❌ Ошибка загрузки хэшей сообщений: {e}")
+        return {}
+
+def save_message_hashes(message_hashes):
+    """Сохраняет хэши последних отправленных таблиц в файл"""
+    hashes_path = os.path.join(get_project_root(), MESSAGE_HASHES_REPO_PATH)
+    try:
+        save_json_journal(hashes_path, message_hashes)
+    except Exception as e:
+        print(f"❌ Ошибка сохранения хэшей сообщений: {e}")
+
+def load_message_hashes_from_repo():
+    """Загружает хэши таблиц из репозитория через GitHub API"""
+    try:
+        sync = get_github_sync()
+        if sync is None:
+            return load_message_hashes()
+        data = sync.load_json(MESSAGE_HASHES_REPO_PATH)
+        return data if data is not None else load_message_hashes()
+    except Exception as e:
+        print(f"❌ Ошибка загрузки хэшей сообщений из репозитория: {e}")
+        return load_message_hashes()
+
 def save_message_ids_to_repo(message_ids):
     """Сохраняет message_ids в репозиторий через GitHub API"""
     try:
-        # Получаем токен из переменных окружения
-        github_token = os.environ.get('GITHUB_TOKEN')
-        if not github_token:
-            print("⚠️ GITHUB_TOKEN не найден, сохраняем локально")
+        sync = get_github_sync()
+        if sync is None:
+            print("⚠️ GITHUB_TOKEN или GITHUB_REPOSITORY не найден, сохраняем локально")
             return save_message_ids(message_ids)
         
-        # Получаем информацию о репозитории
-        repo = os.environ.get('GITHUB_REPOSITORY')
-        if not repo:
-            print("⚠️ GITHUB_REPOSITORY не найден, сохраняем локально")
-            return save_message_ids(message_ids)
-        
-        # Путь к файлу в репозитории
-        file_path = "data/config/message_ids.json"
-        
-        # Получаем текущий SHA файла (если существует)
-        url = f"https://api.github.com/repos/{repo}/contents/{file_path}"
-        headers = {
-            "Authorization": f"token {github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        
-        # Проверяем, существует ли файл
-        response = requests.get(url, headers=headers)
-        sha = None
-        if response.status_code == 200:
-            sha = response.json().get("sha")
-        
-        # Подготавливаем данные для загрузки
-        content = json.dumps(message_ids, ensure_ascii=False, indent=2)
-        content_bytes = content.encode('utf-8')
-        content_b64 = base64.b64encode(content_bytes).decode('utf-8')
-        
-        data = {
-            "message": "Update message IDs for App Store monitor",
-            "content": content_b64,
-            "branch": "main"
-        }
-        
-        if sha:
-            data["sha"] = sha
-        
-        # Загружаем файл
-        response = requests.put(url, headers=headers, json=data)
-        
-        if response.status_code in [200, 201]:
-            print(f"✅ Message IDs сохранены в репозиторий: {file_path}")
-            return True
+        if sync.save_json_files({MESSAGE_IDS_REPO_PATH: message_ids}, "Update message IDs for App Store monitor"):
+            print(f"✅ Message IDs сохранены в репозиторий: {MESSAGE_IDS_REPO_PATH}")
         else:
-            print(f"❌ Ошибка сохранения в репозиторий: {response.status_code}")
-            return save_message_ids(message_ids)
+            print("✅ Message IDs в репозитории не изменились")
+        return True
             
     except Exception as e:
         print(f"❌ Ошибка сохранения в репозиторий: {e}")
@@ -124,34 +129,13 @@ def save_message_ids_to_repo(message_ids):
 def load_message_ids_from_repo():
     """Загружает message_ids из репозитория через GitHub API"""
     try:
-        # Получаем токен из переменных окружения
-        github_token = os.environ.get('GITHUB_TOKEN')
-        if not github_token:
-            print("⚠️ GITHUB_TOKEN не найден, загружаем локально")
+        sync = get_github_sync()
+        if sync is None:
+            print("⚠️ GITHUB_TOKEN или GITHUB_REPOSITORY не найден, загружаем локально")
             return load_message_ids()
         
-        # Получаем информацию о репозитории
-        repo = os.environ.get('GITHUB_REPOSITORY')
-        if not repo:
-            print("⚠️ GITHUB_REPOSITORY не найден, загружаем локально")
-            return load_message_ids()
-        
-        # Путь к файлу в репозитории
-        file_path = "data/config/message_ids.json"
-        
-        # Получаем содержимое файла
-        url = f"https://api.github.com/repos/{repo}/contents/{file_path}"
-        headers = {
-            "Authorization": f"token {github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 200:
-            content = response.json().get("content", "")
-            content_decoded = base64.b64decode(content).decode('utf-8')
-            data = json.loads(content_decoded)
+        data = sync.load_json(MESSAGE_IDS_REPO_PATH)
+        if data is not None:
             print(f"✅ Message IDs загружены из репозитория: {len(data)} записей")
             return data
         else:
@@ -162,34 +146,155 @@ def load_message_ids_from_repo():
         print(f"❌ Ошибка загрузки из репозитория: {e}")
         return load_message_ids()
 
+# Лимиты Telegram: не больше ~1 сообщения в секунду в один чат и ~30 в секунду всего
+TELEGRAM_CHAT_RATE = 1.0
+TELEGRAM_GLOBAL_RATE = 30.0
+
+# Повторы запроса после 429 (Too Many Requests)
+TELEGRAM_RETRIES = 3
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_TIMEOUT = 30
+
+class TelegramClient:
+    """
+    Клиент Telegram Bot API
+
+    Конфигурация читается один раз, запросы идут через общую keep-alive
+    сессию и ограничиваются по чату и глобально. На 429 клиент ждет
+    retry_after из ответа и повторяет запрос. Задачи, переданные в submit,
+    выполняются в фоновом потоке по очереди, поэтому проверка позиций не
+    ждет ответа Telegram.
+    """
+
+    def __init__(self, token=None, chat_id=None, session=None, api_url=TELEGRAM_API_URL,
+                 chat_rate=TELEGRAM_CHAT_RATE, global_rate=TELEGRAM_GLOBAL_RATE, retries=TELEGRAM_RETRIES):
+        self._config = (token, chat_id) if token else None
+        self.session = session or requests.Session()
+        self.api_url = api_url.rstrip("/")
+        self.retries = retries
+        self._chat_limiter = KeyedRateLimiter(chat_rate)
+        self._global_limiter = TokenBucket(global_rate, capacity=global_rate)
+        self._paused_until = 0.0
+        self._pause_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    @property
+    def config(self):
+        """(token, chat_id), загружаются при первом обращении"""
+        if self._config is None:
+            self._config = load_telegram_config()
+        return self._config
+
+    def is_configured(self):
+        token, _ = self.config
+        return bool(token) and token != "YOUR_BOT_TOKEN"
+
+    def _wait_turn(self, chat_id):
+        """Ждет паузу после 429 и свободные слоты в лимитах"""
+        with self._pause_lock:
+            delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._global_limiter.acquire()
+        self._chat_limiter.acquire(str(chat_id))
+
+    def call(self, method, data):
+        """
+        Вызывает метод Bot API
+
+        Returns:
+            dict: Ответ Telegram ({"ok": ..., ...})
+        """
+        token, chat_id = self.config
+        data = dict(data)
+        data.setdefault("chat_id", chat_id)
+        url = f"{self.api_url}/bot{token}/{method}"
+
+        for attempt in range(self.retries + 1):
+            self._wait_turn(data["chat_id"])
+            response = self.session.post(url, data=data, timeout=TELEGRAM_TIMEOUT)
+            try:
+                result = response.json()
+            except ValueError:
+                response.raise_for_status()
+                raise
+
+            if response.status_code == 429 and attempt < self.retries:
+                retry_after = (result.get("parameters") or {}).get("retry_after", 1)
+                print(f"⏳ Telegram просит подождать {retry_after} с")
+                with self._pause_lock:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                continue
+            return result
+        return result
+
+    def send_message(self, text):
+        """Отправляет сообщение, возвращает его ID или None"""
+        result = self.call("sendMessage", {"text": text, "parse_mode": "HTML"})
+        if result.get("ok"):
+            return result["result"]["message_id"]
+        print(f"❌ Ошибка Telegram API: {result}")
+        return None
+
+    def edit_message(self, message_id, text):
+        """Редактирует сообщение, возвращает True при успехе"""
+        result = self.call("editMessageText", {"message_id": message_id, "text": text, "parse_mode": "HTML"})
+        if result.get("ok"):
+            return True
+        print(f"❌ Ошибка обновления сообщения {message_id}: {result}")
+        return False
+
+    def _run_queue(self):
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except Exception as e:
+                        print(f"❌ Ошибка фоновой отправки в Telegram: {e}")
+                        future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, fn, *args, **kwargs):
+        """Ставит задачу в фоновую очередь отправки, возвращает Future"""
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run_queue, daemon=True)
+                self._worker.start()
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def flush(self):
+        """Ждет выполнения всех задач в очереди"""
+        self._queue.join()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_telegram_client():
+    """Возвращает общий клиент Telegram"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TelegramClient()
+            atexit.register(_client.flush)
+        return _client
+
 def send_to_telegram(message, country=None, message_id=None):
     """Отправляет сообщение в Telegram"""
-    # Загружаем конфигурацию заново
-    token, chat_id = load_telegram_config()
-    
-    if not token or token == "YOUR_BOT_TOKEN":
+    client = get_telegram_client()
+    if not client.is_configured():
         print("⚠️ Токен Telegram не настроен")
         return None
     
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    
-    data = {
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "HTML"
-    }
-        
     try:
-        response = requests.post(url, data=data)
-        response.raise_for_status()
-        result = response.json()
-        
-        if result.get("ok"):
-            return result["result"]["message_id"]
-        else:
-            print(f"❌ Ошибка Telegram API: {result}")
-            return None
-            
+        return client.send_message(message)
     except Exception as e:
         print(f"❌ Ошибка отправки в Telegram: {e}")
         return None
@@ -197,38 +302,71 @@ def send_to_telegram(message, country=None, message_id=None):
 def update_message(message_id, new_text):
     """Обновляет существующее сообщение в Telegram"""
     print(f"🔄 Пытаемся обновить сообщение ID: {message_id}")
-    # Загружаем конфигурацию заново
-    token, chat_id = load_telegram_config()
-    
-    if not token or token == "YOUR_BOT_TOKEN":
+    client = get_telegram_client()
+    if not client.is_configured():
         print("⚠️ Токен Telegram не настроен")
         return False
     
-    url = f"https://api.telegram.org/bot{token}/editMessageText"
-    
-    data = {
-        "chat_id": chat_id,
-        "message_id": message_id,
-        "text": new_text,
-        "parse_mode": "HTML"
-    }
-    
     try:
-        response = requests.post(url, data=data)
-        response.raise_for_status()
-        result = response.json()
-        
-        if result.get("ok"):
+        if client.edit_message(message_id, new_text):
             print(f"✅ Сообщение {message_id} успешно обновлено")
             return True
-        else:
-            print(f"❌ Ошибка обновления сообщения {message_id}: {result}")
-            return False
-        
+        return False
     except Exception as e:
         print(f"❌ Ошибка обновления сообщения в Telegram: {e}")
         return False
 
+def table_hash(table_text):
+    """Хэш отрисованной таблицы для определения изменений"""
+    return hashlib.sha1(table_text.encode("utf-8")).hexdigest()
+
+def notify_country(country_key, country_name, table_text, update_time, message_ids, message_hashes):
+    """
+    Обновляет сообщение страны в Telegram, только если таблица изменилась
+
+    Неизмененная таблица не требует запросов к API. Измененная
+    редактирует существующее сообщение, а если его нет или
+    редактирование не удалось — отправляется новое.
+
+    Returns:
+        str: "skipped", "edited", "sent" или "failed"
+    """
+    digest = table_hash(table_text)
+    message_id = message_ids.get(country_key)
+    if message_id and message_hashes.get(country_key) == digest:
+        print(f"⏭️ Таблица для {country_name} не изменилась")
+        return "skipped"
+
+    message_text = format_telegram_message(country_name, table_text, update_time)
+
+    if message_id and update_message(message_id, message_text):
+        message_hashes[country_key] = digest
+        return "edited"
+
+    new_msg_id = send_to_telegram(message_text, country=country_key)
+    if new_msg_id:
+        message_ids[country_key] = new_msg_id
+        message_hashes[country_key] = digest
+        print(f"✅ Новое сообщение для {country_name} отправлено")
+        return "sent"
+
+    print(f"❌ Ошибка отправки сообщения для {country_name}")
+    return "failed"
+
+def notify_country_async(country_key, country_name, table_text, update_time, message_ids, message_hashes):
+    """
+    То же, что notify_country, но в фоновой очереди клиента Telegram
+
+    message_ids и message_hashes обновляются в фоновом потоке: перед их
+    сохранением нужно дождаться очереди (get_telegram_client().flush()).
+
+    Returns:
+        Future: Результат notify_country
+    """
+    return get_telegram_client().submit(
+        notify_country, country_key, country_name, table_text, update_time, message_ids, message_hashes
+    )
+
 def format_telegram_message(country_name, table_text, update_time):
     """Форматирует сообщение для Telegram"""
     return f"""📱 <b>App Store Monitor</b>\n🌍 <b>{country_name}</b>\n⏰ <b>{update_time}</b>\n\n<pre>{table_text}</pre>\n\n#AppStore #ASO #Monitor""" 
\ No newline at end of file
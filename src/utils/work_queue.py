@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Очередь заданий проверки в SQLite для нескольких воркеров.
+
+Координатор создает запуск (run) и делит его пары (ключевое слово, страна)
+на аренды (leases) — небольшие пачки пар одной страны. Воркеры захватывают
+аренду на lease_seconds секунд, продлевают ее по ходу проверки и
+записывают результаты. Если воркер пропал, аренда истекает и достается
+другому воркеру. Результат принимается только от текущего владельца
+аренды, поэтому каждая пара попадает в результаты ровно один раз.
+
+Файл базы может лежать на общем диске: база работает в режиме журнала
+DELETE (WAL требует, чтобы все процессы были на одной машине), а все
+изменения выполняются короткими транзакциями BEGIN IMMEDIATE.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+def get_project_root():
+    """Получает путь к корневой папке проекта"""
+    return os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+WORK_QUEUE_DB = os.path.join(get_project_root(), "data", "results", "work_queue.db")
+
+# Пар в одной аренде
+LEASE_SIZE = 10
+
+# Срок аренды без продления (секунды)
+LEASE_SECONDS = 120
+
+# После стольких неудачных попыток аренда считается проваленной
+MAX_ATTEMPTS = 3
+
+# Завершенные запуски старше этого срока удаляются (секунды)
+RUN_RETENTION = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bundle TEXT NOT NULL,
+    search_limit INTEGER NOT NULL,
+    competitors TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL,
+    pairs TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_leases_run_status ON leases (run_id, status);
+
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL,
+    term TEXT NOT NULL,
+    country TEXT NOT NULL,
+    ranks TEXT NOT NULL,
+    PRIMARY KEY (run_id, term, country)
+);
+"""
+
+def chunk_pairs(pairs, lease_size=LEASE_SIZE):
+    """
+    Делит пары на аренды: пары одной страны вместе, не больше lease_size
+
+    Так темп запросов к одной витрине остается в руках одного воркера.
+    """
+    by_country = {}
+    for term, country in pairs:
+        by_country.setdefault(country.lower(), []).append((term, country))
+    chunks = []
+    for country_pairs in by_country.values():
+        for start in range(0, len(country_pairs), max(1, lease_size)):
+            chunks.append(country_pairs[start:start + lease_size])
+    return chunks
+
+class WorkQueue:
+    """Очередь аренд и результатов проверки в SQLite"""
+
+    def __init__(self, path=WORK_QUEUE_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            # Не WAL: общая память WAL не работает между машинами и на сетевых дисках
+            self._conn.execute("PRAGMA journal_mode=DELETE")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """Закрывает соединение с базой"""
+        self._conn.close()
+
+    def _transaction(self, fn):
+        """Выполняет fn(conn) в транзакции BEGIN IMMEDIATE"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def create_run(self, bundle_id, limit, pairs, competitors=None, hints=None, lease_size=LEASE_SIZE):
+        """
+        Создает запуск и его аренды
+
+        Args:
+            pairs: Список пар (term, country)
+            competitors: Конфигурация конкурентов (передается воркерам)
+            hints: Прошлые позиции {(term, country): позиция}
+
+        Returns:
+            int: ID запуска
+        """
+        now = time.time()
+        hints = hints or {}
+
+        def create(conn):
+            self._purge(conn, now - RUN_RETENTION)
+            run_id = conn.execute(
+                "INSERT INTO runs (bundle, search_limit, competitors, created_at) VALUES (?, ?, ?, ?)",
+                (bundle_id, limit, json.dumps(competitors or {}, ensure_ascii=False), now)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO leases (run_id, pairs) VALUES (?, ?)",
+                [
+                    (run_id, json.dumps([[term, country, hints.get((term, country))] for term, country in chunk], ensure_ascii=False))
+                    for chunk in chunk_pairs(pairs, lease_size)
+                ]
+            )
+            return run_id
+
+        return self._transaction(create)
+
+    def _purge(self, conn, before):
+        """Удаляет старые завершенные запуски вместе с арендами и результатами"""
+        old_runs = [row[0] for row in conn.execute(
+            "SELECT id FROM runs WHERE status != 'active' AND created_at < ?", (before,)
+        )]
+        for table, column in (("results", "run_id"), ("leases", "run_id"), ("runs", "id")):
+            conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(run_id,) for run_id in old_runs])
+
+    def get_run(self, run_id):
+        """Параметры запуска: bundle, limit, competitors, status"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT bundle, search_limit, competitors, status FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"bundle": row[0], "limit": row[1], "competitors": json.loads(row[2] or "{}"), "status": row[3]}
+
+    def claim(self, worker, lease_seconds=LEASE_SECONDS, now=None):
+        """
+        Захватывает свободную или просроченную аренду активного запуска
+
+        Returns:
+            dict | None: {"id", "run_id", "pairs": [(term, country, подсказка)]}
+        """
+        now = time.time() if now is None else now
+
+        def claim_lease(conn):
+            row = conn.execute(
+                """
+                SELECT leases.id, leases.run_id, leases.pairs FROM leases
+                JOIN runs ON runs.id = leases.run_id
+                WHERE runs.status = 'active'
+                  AND (leases.status = 'pending' OR (leases.status = 'leased' AND leases.expires_at < ?))
+                ORDER BY leases.id
+                LIMIT 1
+                """,
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE leases SET status = 'leased', worker = ?, expires_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now + lease_seconds, row[0])
+            )
+            return {"id": row[0], "run_id": row[1], "pairs": [tuple(pair) for pair in json.loads(row[2])]}
+
+        return self._transaction(claim_lease)
+
+    def heartbeat(self, lease_id, worker, lease_seconds=LEASE_SECONDS, now=None):
+        """
+        Продлевает аренду
+
+        Returns:
+            bool: False, если аренда уже принадлежит другому воркеру или запуск отменен
+        """
+        now = time.time() if now is None else now
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE leases SET expires_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (now + lease_seconds, lease_id, worker)
+        ).rowcount == 1)
+
+    def complete(self, lease_id, worker, results):
+        """
+        Записывает результаты аренды
+
+        Args:
+            results: Список (term, country, {bundleId: позиция})
+
+        Returns:
+            bool: False, если аренда потеряна (результаты отброшены)
+        """
+        def complete_lease(conn):
+            row = conn.execute(
+                "SELECT run_id FROM leases WHERE id = ? AND worker = ? AND status = 'leased'", (lease_id, worker)
+            ).fetchone()
+            if row is None:
+                return False
+            conn.executemany(
+                "INSERT OR IGNORE INTO results (run_id, term, country, ranks) VALUES (?, ?, ?, ?)",
+                [(row[0], term, country, json.dumps(ranks)) for term, country, ranks in results]
+            )
+            conn.execute("UPDATE leases SET status = 'done', expires_at = NULL WHERE id = ?", (lease_id,))
+            return True
+
+        return self._transaction(complete_lease)
+
+    def release(self, lease_id, worker):
+        """Возвращает аренду в очередь после ошибки (или помечает проваленной)"""
+        return self._transaction(lambda conn: conn.execute(
+            """
+            UPDATE leases SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                              worker = NULL, expires_at = NULL
+            WHERE id = ? AND worker = ? AND status = 'leased'
+            """,
+            (MAX_ATTEMPTS, lease_id, worker)
+        ).rowcount == 1)
+
+    def fetch_results(self, run_id, after=0):
+        """
+        Результаты запуска, записанные после строки after
+
+        Returns:
+            list: [(rowid, term, country, {bundleId: позиция})]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, term, country, ranks FROM results WHERE run_id = ? AND rowid > ? ORDER BY rowid",
+                (run_id, after)
+            ).fetchall()
+        return [(rowid, term, country, json.loads(ranks)) for rowid, term, country, ranks in rows]
+
+    def progress(self, run_id):
+        """Количество аренд запуска по статусам"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM leases WHERE run_id = ? GROUP BY status", (run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def finish_run(self, run_id, status="done"):
+        """Закрывает запуск: незавершенные аренды больше не выдаются"""
+        def finish(conn):
+            conn.execute("UPDATE runs SET status = ? WHERE id = ?", (status, run_id))
+            conn.execute(
+                "UPDATE leases SET status = 'cancelled' WHERE run_id = ? AND status IN ('pending', 'leased')", (run_id,)
+            )
+
+        self._transaction(finish)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты поиска позиций приложений (без доступа к сети)
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.scrapers.appstore_scraper as appstore_scraper
+from src.scrapers.node_worker import NodeWorkerError
+
+APPS = {11: "com.other", 22: "com.app", 33: "com.cached"}
+
+def test_ranks_without_track_id_lookup():
+    """Ошибка lookup по bundleId не обнуляет позиции: приложения ищутся по метаданным выдачи"""
+    print("🧪 Тест 1: Позиции при ошибке получения trackId")
+
+    def fake_lookup_apps(ids, id_field="id", country="us", backend=None):
+        if id_field == "bundleId":
+            raise NodeWorkerError("ERR timeout")
+        return [{"id": track_id, "appId": APPS[track_id]} for track_id in ids]
+
+    originals = (appstore_scraper.lookup_apps, appstore_scraper.search_ids, appstore_scraper._track_ids, appstore_scraper.TRACK_IDS_FILE)
+    appstore_scraper.lookup_apps = fake_lookup_apps
+    appstore_scraper.search_ids = lambda term, country, max_results, backend=None: [11, 22, 33]
+    appstore_scraper._track_ids = {"com.cached": 33}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            appstore_scraper.TRACK_IDS_FILE = os.path.join(tmp, "track_ids.json")
+            ranks = appstore_scraper.get_ranks("translator", ["com.app", "com.cached", "com.missing"], "us", 250)
+            assert ranks == {"com.app": 2, "com.cached": 3, "com.missing": None}, ranks
+    finally:
+        appstore_scraper.lookup_apps, appstore_scraper.search_ids, appstore_scraper._track_ids, appstore_scraper.TRACK_IDS_FILE = originals
+    print("✅ Позиции:", ranks)
+
+def test_save_track_ids_atomic():
+    """Кэш trackId записывается целиком, без временных файлов"""
+    print("🧪 Тест 2: Сохранение кэша trackId")
+    original = appstore_scraper.TRACK_IDS_FILE
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            appstore_scraper.TRACK_IDS_FILE = os.path.join(tmp, "cache", "track_ids.json")
+            appstore_scraper.save_track_ids({"com.app": 22})
+            appstore_scraper.save_track_ids({"com.app": 22, "com.cached": 33})
+            with open(appstore_scraper.TRACK_IDS_FILE, "r", encoding="utf-8") as f:
+                assert json.load(f) == {"com.app": 22, "com.cached": 33}
+            assert os.listdir(os.path.dirname(appstore_scraper.TRACK_IDS_FILE)) == ["track_ids.json"]
+    finally:
+        appstore_scraper.TRACK_IDS_FILE = original
+    print("✅ Кэш сохранен")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов поиска позиций")
+    print("=" * 50)
+
+    test_ranks_without_track_id_lookup()
+    test_save_track_ids_atomic()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты атомарного и инкрементального сохранения JSON
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.utils.atomic_store as atomic_store
+from src.utils.atomic_store import load_json_journal, save_json_journal, JOURNAL_SUFFIX
+
+def test_journal_writes_only_changes():
+    """В журнал попадают только измененные и удаленные ключи"""
+    print("🧪 Тест 1: Запись изменений в журнал")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.json")
+        state = {f"us|kw{i}": {"last_rank": i} for i in range(10)}
+
+        assert save_json_journal(path, state) == 10
+        assert not os.path.exists(path + JOURNAL_SUFFIX)
+
+        state["us|kw1"]["last_rank"] = 100
+        del state["us|kw2"]
+        assert save_json_journal(path, state) == 2
+        assert save_json_journal(path, state) == 0
+
+        with open(path + JOURNAL_SUFFIX, encoding="utf-8") as f:
+            # Заголовок с хэшем основного файла и два изменения
+            assert len(f.readlines()) == 3
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["us|kw1"]["last_rank"] == 1
+
+        assert load_json_journal(path) == state
+        print("✅ Журнал содержит только изменения")
+
+def test_truncated_journal_and_compaction():
+    """Недописанная строка журнала пропускается, большой журнал сворачивается"""
+    print("🧪 Тест 2: Поврежденный журнал и сворачивание")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ids.json")
+        save_json_journal(path, {"US": 1})
+        save_json_journal(path, {"US": 2})
+        with open(path + JOURNAL_SUFFIX, "a", encoding="utf-8") as f:
+            f.write('{"key": "GB", "val')
+
+        assert load_json_journal(path) == {"US": 2}
+        # После повреждения файл переписывается целиком
+        save_json_journal(path, {"US": 3})
+        assert not os.path.exists(path + JOURNAL_SUFFIX)
+
+        original = atomic_store.COMPACT_MIN_ENTRIES
+        atomic_store.COMPACT_MIN_ENTRIES = 3
+        try:
+            for value in range(4, 10):
+                save_json_journal(path, {"US": value})
+            with open(path + JOURNAL_SUFFIX, encoding="utf-8") as f:
+                assert len(f.readlines()) <= 3 + 1
+        finally:
+            atomic_store.COMPACT_MIN_ENTRIES = original
+
+        assert load_json_journal(path) == {"US": 9}
+        print("✅ Журнал восстановлен и свернут")
+
+def test_crash_during_compaction():
+    """Журнал, оставшийся после записи нового основного файла, не применяется"""
+    print("🧪 Тест 3: Падение при сворачивании")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.json")
+        save_json_journal(path, {"k": 1, "j": 1})
+        save_json_journal(path, {"k": 2, "j": 5})
+        with open(path + JOURNAL_SUFFIX, encoding="utf-8") as f:
+            stale_journal = f.read()
+
+        # Сворачивание записало новый файл, но процесс упал до удаления журнала
+        atomic_store.compact_json_journal(path, {"k": 3})
+        with open(path + JOURNAL_SUFFIX, "w", encoding="utf-8") as f:
+            f.write(stale_journal)
+
+        assert load_json_journal(path) == {"k": 3}
+        # Следующее сохранение переписывает файл и убирает устаревший журнал
+        save_json_journal(path, {"k": 4})
+        assert not os.path.exists(path + JOURNAL_SUFFIX)
+        save_json_journal(path, {"k": 5})
+        assert load_json_journal(path) == {"k": 5}
+        print("✅ Устаревший журнал пропущен")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов сохранения состояния")
+    print("=" * 50)
+
+    test_journal_writes_only_changes()
+    test_truncated_journal_and_compaction()
+    test_crash_during_compaction()
+
+    print("\n✅ Все тесты завершены!")
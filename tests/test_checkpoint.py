@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты контрольных точек проверки
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.scrapers.sweep as sweep
+import src.scrapers.appstore_scraper as appstore_scraper
+from src.scrapers.node_worker import NodeWorkerError
+from src.utils.checkpoint import SweepCheckpoint
+from src.utils.state_model import RankState, RankRecord
+
+SEARCH_TERMS = {"a": ["us", "gb"], "b": ["us"], "c": ["gb"]}
+
+def test_resume_fetches_remaining_pairs():
+    """После падения повторно запрашиваются только непроверенные пары"""
+    print("🧪 Тест 1: Продолжение с контрольной точки")
+    calls = []
+
+    def failing_get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+        if len(calls) == 2:
+            # Прерывание (Ctrl+C, падение процесса) — не ошибка запроса, проверка останавливается
+            raise KeyboardInterrupt
+        calls.append((term, country))
+        return {bundle_ids[0]: len(calls)}
+
+    def get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+        calls.append((term, country))
+        return {bundle_ids[0]: 10}
+
+    original = sweep.get_ranks
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "checkpoint.json")
+
+            # Первая проверка прерывается на третьей паре
+            sweep.get_ranks = failing_get_ranks
+            checkpoint = SweepCheckpoint("com.test", path=path, every_pairs=100)
+            fetch = checkpoint.wrap(sweep.local_fetcher("com.test", 250, concurrency=1, country_rate=100))
+            try:
+                list(sweep.stream_sweep("com.test", SEARCH_TERMS, 250, RankState(), 1, RankState(), fetch=fetch))
+                assert False, "ожидалось прерывание"
+            except KeyboardInterrupt:
+                pass
+            # Пул не дожидается оставшихся пар — даем уже взятой паре завершиться
+            time.sleep(0.1)
+            done = list(calls)
+            assert len(done) == 2
+
+            # Вторая проверка с --resume
+            calls.clear()
+            sweep.get_ranks = get_ranks
+            resumed = SweepCheckpoint("com.test", path=path)
+            assert resumed.load() == 2
+            assert resumed.started_ts == checkpoint.started_ts
+            current_state = RankState()
+            fetch = resumed.wrap(sweep.local_fetcher("com.test", 250, concurrency=1, country_rate=100))
+            list(sweep.stream_sweep("com.test", SEARCH_TERMS, 250, RankState(), 1, current_state, fetch=fetch))
+
+            assert sorted(calls + done) == sorted((term, country) for term, countries in SEARCH_TERMS.items() for country in countries)
+            assert len(current_state) == 4
+            assert sorted(record.last_rank for _, record in current_state.items()) == [1, 2, 10, 10]
+
+            # После успешного сохранения состояния контрольная точка пуста
+            resumed.clear()
+            assert SweepCheckpoint("com.test", path=path).load() == 0
+    finally:
+        sweep.get_ranks = original
+    print("✅ Повторно запрошено пар:", len(calls))
+
+def test_interrupt_saves_without_draining():
+    """Прерывание не ждет оставшиеся пары и сохраняет все полученные позиции"""
+    print("🧪 Тест 2: Прерывание проверки")
+    calls = []
+
+    def slow_get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+        time.sleep(0.1)
+        calls.append(term)
+        return {bundle_ids[0]: 1}
+
+    original = sweep.get_ranks
+    sweep.get_ranks = slow_get_ranks
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "checkpoint.json")
+            checkpoint = SweepCheckpoint("com.test", path=path, every_pairs=100)
+            fetch = checkpoint.wrap(sweep.local_fetcher("com.test", 250, concurrency=4, country_rate=1000))
+            results = fetch([(f"term {i}", "us") for i in range(40)], {})
+
+            next(results)
+            time.sleep(0.25)
+            # Прерывание (Ctrl+C) в потребителе результатов
+            started = time.time()
+            results.close()
+            elapsed = time.time() - started
+            fetched = len(calls)
+
+            saved = SweepCheckpoint("com.test", path=path).load()
+    finally:
+        sweep.get_ranks = original
+
+    # Оставшиеся ~30 пар (≈0.8 с) не дожидаемся
+    assert elapsed < 0.5
+    # В контрольной точке все пары, полученные до прерывания (кроме выполнявшихся в этот момент)
+    assert fetched >= saved >= fetched - 4 and saved > 1
+    print(f"✅ Прервано за {elapsed:.2f} с, сохранено пар: {saved}")
+
+def test_failed_pairs_not_recorded():
+    """Ошибка запроса (перехваченная get_ranks) не сохраняется как "не найдено" и повторяется при --resume"""
+    print("🧪 Тест 3: Неудачные пары в контрольной точке")
+    calls = []
+
+    def flaky_search_ids(term, country, max_results=250, backend=None):
+        calls.append((term, country))
+        if term == "b":
+            raise NodeWorkerError("ERR socket hang up")
+        return [7, 42]
+
+    originals = (appstore_scraper.search_ids, appstore_scraper.resolve_track_ids)
+    appstore_scraper.search_ids = flaky_search_ids
+    appstore_scraper.resolve_track_ids = lambda bundle_ids, country="us", backend=None: {b: 42 for b in bundle_ids}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "checkpoint.json")
+            prev_state = RankState()
+            prev_state.set("us", "b", RankRecord(5, 5, 100))
+            current_state = RankState()
+            checkpoint = SweepCheckpoint("com.test", path=path)
+            fetch = checkpoint.wrap(sweep.local_fetcher("com.test", 250, concurrency=1, country_rate=100))
+            failed_pairs = []
+            tables = dict(sweep.stream_sweep("com.test", SEARCH_TERMS, 250, prev_state, 200, current_state, fetch=fetch, failed_pairs=failed_pairs))
+            assert failed_pairs == [("b", "us")]
+            checkpoint.save()
+
+            # Прошлая запись сохранена, в таблице — прошлая позиция с пометкой
+            assert current_state.get("us", "b") == RankRecord(5, 5, 100)
+            assert [row["Now"] for row in tables["US"]] == ["x → #2", "#5 ?"]
+            assert current_state.get("us", "a").last_rank == 2
+
+            calls.clear()
+            resumed = SweepCheckpoint("com.test", path=path)
+            assert resumed.load() == 3
+            fetch = resumed.wrap(sweep.local_fetcher("com.test", 250, concurrency=1, country_rate=100))
+            list(sweep.stream_sweep("com.test", SEARCH_TERMS, 250, prev_state, 200, RankState(), fetch=fetch))
+            assert calls == [("b", "us")]
+    finally:
+        appstore_scraper.search_ids, appstore_scraper.resolve_track_ids = originals
+    print("✅ Неудачная пара запрошена повторно")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов контрольных точек")
+    print("=" * 50)
+
+    test_resume_fetches_remaining_pairs()
+    test_interrupt_saves_without_draining()
+    test_failed_pairs_not_recorded()
+
+    print("\n✅ Все тесты завершены!")
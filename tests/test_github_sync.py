@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты синхронизации с GitHub на локальном HTTP сервере-заглушке
+"""
+
+import sys
+import os
+import json
+import base64
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.utils.github_sync import GitHubSync, git_blob_sha, dump_json_bytes
+
+REPO = "owner/repo"
+
+class FakeGitHub:
+    """Минимальная модель репозитория: файлы ветки main и журнал запросов"""
+
+    def __init__(self, files):
+        self.files = {path: dump_json_bytes(data) for path, data in files.items()}
+        self.head = "c0"
+        self.commits = {"c0": {"tree": "t0", "parents": []}}
+        self.trees = {"t0": dict(self.files)}
+        self.requests = []
+        self.statuses = []
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, payload=None, headers=None):
+        self.server.github.statuses.append(status)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def body(self):
+        return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+    def route(self, method):
+        gh = self.server.github
+        path = self.path.split("?")[0][len(f"/repos/{REPO}/"):]
+        gh.requests.append((method, path))
+
+        if method == "GET" and path.startswith("contents/"):
+            file_path = path[len("contents/"):]
+            content = gh.trees[gh.commits[gh.head]["tree"]].get(file_path)
+            if content is None:
+                return self.reply(404, {"message": "Not Found"})
+            etag = f'"{git_blob_sha(content)}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self.reply(304)
+            return self.reply(200, {"sha": git_blob_sha(content), "content": base64.b64encode(content).decode()}, {"ETag": etag})
+        if method == "GET" and path == "git/ref/heads/main":
+            return self.reply(200, {"object": {"sha": gh.head}})
+        if method == "GET" and path.startswith("git/commits/"):
+            return self.reply(200, {"tree": {"sha": gh.commits[path.split("/")[-1]]["tree"]}})
+        if method == "POST" and path == "git/trees":
+            data = self.body()
+            tree = dict(gh.trees[data["base_tree"]])
+            for item in data["tree"]:
+                tree[item["path"]] = item["content"].encode("utf-8")
+            sha = f"t{len(gh.trees)}"
+            gh.trees[sha] = tree
+            return self.reply(201, {"sha": sha})
+        if method == "POST" and path == "git/commits":
+            data = self.body()
+            sha = f"c{len(gh.commits)}"
+            gh.commits[sha] = {"tree": data["tree"], "parents": data["parents"]}
+            return self.reply(201, {"sha": sha})
+        if method == "PATCH" and path == "git/refs/heads/main":
+            gh.head = self.body()["sha"]
+            return self.reply(200, {"object": {"sha": gh.head}})
+        return self.reply(404, {"message": "Not Found"})
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def do_PATCH(self):
+        self.route("PATCH")
+
+def start_server(github):
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    server.github = github
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_single_commit_for_changed_files():
+    """Измененные файлы записываются одним коммитом, неизмененные пропускаются"""
+    print("🧪 Тест 1: Один коммит на все изменения")
+    github = FakeGitHub({
+        "data/results/last_state.json": {"us|kw": {"last_rank": 1}},
+        "data/config/message_ids.json": {"US": 10}
+    })
+    server = start_server(github)
+    try:
+        sync = GitHubSync(REPO, "token", api_url=f"http://127.0.0.1:{server.server_port}")
+        state = sync.load_json("data/results/last_state.json")
+        message_ids = sync.load_json("data/config/message_ids.json")
+        assert sync.load_json("data/config/missing.json") is None
+
+        # Ничего не изменилось — ни одного запроса на запись
+        github.requests.clear()
+        assert sync.save_json_files({"data/results/last_state.json": state, "data/config/message_ids.json": message_ids}, "noop") == []
+        assert github.requests == []
+
+        state["us|kw"]["last_rank"] = 2
+        message_ids["US"] = 11
+        changed = sync.save_json_files({"data/results/last_state.json": state, "data/config/message_ids.json": message_ids}, "update")
+        assert sorted(changed) == ["data/config/message_ids.json", "data/results/last_state.json"]
+        assert len(github.commits) == 2
+        assert [m for m, _ in github.requests].count("PATCH") == 1
+        assert json.loads(github.trees[github.commits[github.head]["tree"]]["data/config/message_ids.json"]) == {"US": 11}
+        assert sync.load_json("data/config/message_ids.json") == {"US": 11}
+        print("✅ Коммитов:", len(github.commits) - 1)
+    finally:
+        server.shutdown()
+
+def test_etag_not_modified():
+    """Ответ 304 возвращает данные из памяти"""
+    print("🧪 Тест 2: ETag")
+    github = FakeGitHub({"data/config/message_ids.json": {"GB": 5}})
+    server = start_server(github)
+    try:
+        sync = GitHubSync(REPO, "token", api_url=f"http://127.0.0.1:{server.server_port}")
+        assert sync.load_json("data/config/message_ids.json") == {"GB": 5}
+        assert sync.load_json("data/config/message_ids.json") == {"GB": 5}
+        assert github.statuses == [200, 304]
+        print("✅ Данные получены из кэша по ETag")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов синхронизации с GitHub")
+    print("=" * 50)
+
+    test_single_commit_for_changed_files()
+    test_etag_not_modified()
+
+    print("\n✅ Все тесты завершены!")
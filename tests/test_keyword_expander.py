@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты раскрытия ключевых слов по подсказкам (без доступа к сети)
+"""
+
+import sys
+import os
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.scrapers.charts_scraper as charts_scraper
+from src.scrapers.node_worker import NodeWorkerError
+from src.analyzers.keyword_expander import PrefixTrie, expand_keywords, to_keywords_config
+
+def test_prefix_trie():
+    """Запрошенные и полностью раскрытые префиксы не запрашиваются повторно"""
+    print("🧪 Тест 1: Префиксное дерево")
+    trie = PrefixTrie()
+    trie.mark("photo")
+    trie.mark("video", complete=True)
+
+    assert trie.is_covered("photo")
+    assert not trie.is_covered("photo a")
+    assert not trie.is_covered("phot")
+    assert trie.is_covered("video a")
+    print("✅ Префиксы отмечаются корректно")
+
+def test_expand_keywords():
+    """Обход в ширину с учетом лимита запросов"""
+    print("🧪 Тест 2: Раскрытие ключевых слов")
+    suggestions = {
+        "photo translator": ["photo translator", "photo translator app", "photo translator free"],
+        "photo translator a": ["photo translator app"],
+    }
+    calls = []
+
+    def fake_call_node(method, opts=None, timeout=None):
+        calls.append(opts["term"])
+        return [{"term": term} for term in suggestions.get(opts["term"], [])]
+
+    original = charts_scraper.call_node
+    charts_scraper.call_node = fake_call_node
+    charts_scraper._suggestions_memo.clear()
+    try:
+        candidates = expand_keywords(["Photo Translator"], "us", depth=2, budget=10, country_rate=100)
+        terms = [c["term"] for c in candidates]
+        assert terms[0] == "photo translator app", terms
+        assert "photo translator" not in terms
+        assert len(calls) <= 10
+
+        # Короткий ответ для "photo translator" означает, что "photo translator a".."z" уже известны
+        assert "photo translator a" not in calls
+
+        config = to_keywords_config({"us": candidates}, top=1)
+        assert config == {"photo translator app": ["us"]}
+        print("✅ Кандидаты:", terms)
+    finally:
+        charts_scraper.call_node = original
+        charts_scraper._suggestions_memo.clear()
+
+def test_failed_prefix_is_retried():
+    """Ошибка запроса не считается пустым ответом: префикс не отмечается и повторяется"""
+    print("🧪 Тест 3: Повтор после ошибки")
+    calls = []
+
+    def flaky_call_node(method, opts=None, timeout=None):
+        calls.append(opts["term"])
+        if calls.count(opts["term"]) == 1:
+            raise NodeWorkerError("timeout")
+        return [{"term": "photo translator app"}]
+
+    original = charts_scraper.call_node
+    charts_scraper.call_node = flaky_call_node
+    charts_scraper._suggestions_memo.clear()
+    try:
+        candidates = expand_keywords(["photo translator"], "us", depth=1, budget=10, country_rate=100)
+        assert calls == ["photo translator", "photo translator"], calls
+        assert [c["term"] for c in candidates] == ["photo translator app"]
+        print("✅ Запросов:", len(calls))
+    finally:
+        charts_scraper.call_node = original
+        charts_scraper._suggestions_memo.clear()
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов раскрытия ключевых слов")
+    print("=" * 50)
+
+    test_prefix_trie()
+    test_expand_keywords()
+    test_failed_prefix_is_retried()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты постоянного Node.js воркера (не требуют доступа к сети)
+"""
+
+import sys
+import os
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.scrapers.node_worker import NodeWorker, NodeWorkerError
+
+def test_unknown_method():
+    """Ошибка метода возвращается как NodeWorkerError, процесс продолжает работать"""
+    print("🧪 Тест 1: Неизвестный метод")
+    worker = NodeWorker()
+    try:
+        for _ in range(3):
+            try:
+                worker.call("no_such_method", timeout=30)
+                assert False, "ожидалась ошибка"
+            except NodeWorkerError as e:
+                assert "Unknown method" in str(e)
+        print("✅ Ошибки получены, воркер жив")
+    finally:
+        worker.close()
+
+def test_restart_after_crash():
+    """После падения процесса следующий вызов запускает новый воркер"""
+    print("🧪 Тест 2: Перезапуск после падения")
+    worker = NodeWorker()
+    try:
+        try:
+            worker.call("no_such_method", timeout=30)
+        except NodeWorkerError:
+            pass
+        first = worker._process
+        first.kill()
+        first.wait()
+
+        try:
+            worker.call("no_such_method", timeout=30)
+        except NodeWorkerError as e:
+            assert "Unknown method" in str(e)
+        assert worker._process is not None and worker._process.pid != first.pid
+        print("✅ Воркер перезапущен")
+    finally:
+        worker.close()
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов Node.js воркера")
+    print("=" * 50)
+
+    test_unknown_method()
+    test_restart_after_crash()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты поиска шаблонов в подсказках
+"""
+
+import sys
+import os
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.analyzers.pattern_matcher import PatternMatcher, iter_suggestion_rows, count_pattern_hits
+
+def test_match_overlapping_patterns():
+    """Все шаблоны находятся за один проход, включая пересекающиеся подстроки"""
+    print("🧪 Тест 1: Пересекающиеся шаблоны")
+    matcher = PatternMatcher({
+        "translator": ["translator", "translation"],
+        "translate": ["translat"],
+        "camera": ["camera", "photo"]
+    })
+    assert matcher.match("Photo Translator") == {"translator", "translate", "camera"}
+    assert matcher.match("translate text") == {"translate"}
+    assert matcher.match("dictionary") == set()
+    print("✅ Совпадения найдены")
+
+def test_count_pattern_hits():
+    """Счетчики по странам и шаблонам, примеры ограничены"""
+    print("🧪 Тест 2: Подсчет совпадений")
+    results = {
+        "us": {"translator": [{"term": "photo translator"}, {"term": "voice translator"}, {"term": "dictionary"}]},
+        "gb": {"translator": [{"term": "dictionary"}]}
+    }
+    matcher = PatternMatcher({"translator": ["translator"], "voice": ["voice"]})
+    hits, examples, total = count_pattern_hits(iter_suggestion_rows(results), matcher, max_examples=1)
+
+    assert total == 4
+    assert hits == {"us": {"translator": 2, "voice": 1}, "gb": {}}
+    assert examples["us"]["translator"] == [{"keyword": "translator", "suggestion": "photo translator"}]
+
+    # Для шаблонов из keep_all сохраняются все совпадения
+    _, examples, _ = count_pattern_hits(iter_suggestion_rows(results), matcher, max_examples=1, keep_all=("translator",))
+    assert len(examples["us"]["translator"]) == 2
+    assert len(examples["us"]["voice"]) == 1
+    print("✅ Счетчики:", hits)
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов поиска шаблонов")
+    print("=" * 50)
+
+    test_match_overlapping_patterns()
+    test_count_pattern_hits()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты истории позиций в SQLite
+"""
+
+import sys
+import os
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.utils.rank_history import RankHistory
+from src.utils.state_model import RankState
+from src.utils.state_manager import format_timestamp
+
+BUNDLE = "com.example.app"
+
+def test_state_view_matches_rank_state_update():
+    """Представление rank_state совпадает с последовательными RankState.update"""
+    print("🧪 Тест 1: Состояние из истории")
+    history = RankHistory(":memory:")
+    observations = [(1000, None), (2000, 5), (3000, 5), (4000, 3), (5000, None), (6000, None)]
+
+    state = RankState()
+    for ts, rank in observations:
+        history.record(BUNDLE, [("US", "photo translator", rank)], ts)
+        next_state = RankState()
+        next_state.update(state, "US", "photo translator", rank, ts)
+        state = next_state
+
+    loaded = history.load_state(BUNDLE)
+    assert loaded.to_dict() == state.to_dict(), (loaded.to_dict(), state.to_dict())
+    assert [rank for _, rank in history.get_history("us", "photo translator", BUNDLE)] == [r for _, r in observations]
+
+    # Последние позиции всех пар одним запросом
+    history.record("com.rival", [("US", "photo translator", 1)], 7000)
+    history.record(BUNDLE, [("GB", "photo translator", 9)], 7000)
+    assert history.recent_ranks(BUNDLE, 3) == {("us", "photo translator"): [3, None, None], ("gb", "photo translator"): [9]}
+    print("✅ Состояние:", loaded.to_dict())
+
+def test_competitors_and_import():
+    """Позиции конкурентов и перенос старого last_state.json"""
+    print("🧪 Тест 2: Конкуренты и перенос состояния")
+    history = RankHistory(":memory:")
+    history.import_state(BUNDLE, {
+        "gb|video translator": {"initial_rank": 4, "last_rank": 1, "last_change_time": "11 Jun 11:58"},
+        "us|photo translator": {"initial_rank": None, "last_rank": None, "last_change_time": None}
+    })
+    history.record_state(BUNDLE, RankState.from_dict({
+        "us|photo translator": {"last_rank": 7, "competitors": {"com.rival": 2}}
+    }))
+
+    state = history.load_state(BUNDLE)
+    assert state.get("gb", "video translator").initial_rank == 4
+    assert state.get("gb", "video translator").last_rank == 1
+    assert format_timestamp(state.get("gb", "video translator").last_change_ts) == "11 Jun 11:58"
+    assert state.get("us", "photo translator").last_rank == 7
+    assert state.get("us", "photo translator").competitors == {"com.rival": 2}
+    print("✅ Состояние перенесено")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов истории позиций")
+    print("=" * 50)
+
+    test_state_view_matches_rank_state_update()
+    test_competitors_and_import()
+
+    print("\n✅ Все тесты завершены!")
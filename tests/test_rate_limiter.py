@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты ограничителей темпа запросов (сеть не нужна)
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.utils.rate_limiter import TokenBucket, AdaptiveThrottle, throttled_call
+
+class FakeHTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+def test_token_bucket_rate():
+    """Token bucket не пропускает больше rate запросов в секунду"""
+    print("🧪 Тест 1: Token bucket")
+    bucket = TokenBucket(rate=20, capacity=1)
+    started = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    # Первый токен сразу, остальные 5 — по 50 мс
+    assert elapsed >= 0.2, elapsed
+    print(f"✅ 6 запросов за {elapsed:.2f} с")
+
+def test_throttle_adapts_rate():
+    """Темп растет на успехах и падает вдвое на 429"""
+    print("🧪 Тест 2: Адаптивный темп")
+    throttle = AdaptiveThrottle(rate=2.0, min_rate=0.5, max_rate=2.5, increase=0.25, backoff_base=0.01)
+    throttle.on_success()
+    throttle.on_success()
+    throttle.on_success()
+    assert throttle.current_rate == 2.5
+    throttle.on_failure(429)
+    assert throttle.current_rate == 1.25
+    throttle.on_failure(429)
+    throttle.on_failure(429)
+    assert throttle.current_rate == 0.5
+    print("✅ Темп меняется корректно")
+
+def test_throttled_call_retries():
+    """429 повторяется, 404 пробрасывается сразу"""
+    print("🧪 Тест 3: Повторы запросов")
+    throttle = AdaptiveThrottle(rate=100, max_rate=100, backoff_base=0.01)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeHTTPError(429)
+        return "ok"
+
+    assert throttled_call(flaky, throttle=throttle) == "ok"
+    assert len(calls) == 3
+
+    def missing():
+        calls.append(1)
+        raise FakeHTTPError(404)
+
+    calls.clear()
+    try:
+        throttled_call(missing, throttle=throttle)
+        assert False, "ожидалась ошибка"
+    except FakeHTTPError:
+        pass
+    assert len(calls) == 1
+    print("✅ Повторы работают")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов ограничителей темпа")
+    print("=" * 50)
+
+    test_token_bucket_rate()
+    test_throttle_adapts_rate()
+    test_throttled_call_retries()
+
+    print("\n✅ Все тесты завершены!")
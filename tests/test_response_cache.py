@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты дискового кэша ответов
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.utils.response_cache import ResponseCache, MISS
+
+def test_roundtrip_and_ttl():
+    """Запись читается до истечения TTL и пропадает после"""
+    print("🧪 Тест 1: TTL")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(directory, ttls={"search": 60})
+        params = {"term": "camera", "country": "us", "num": 50}
+        assert cache.get("search", params) is MISS
+
+        cache.set("search", params, [1, 2, 3])
+        assert cache.get("search", params) == [1, 2, 3]
+        assert cache.get("search", dict(params, country="gb")) is MISS
+
+        # Состариваем запись
+        path = cache._path(cache.make_key("search", params))
+        old = time.time() - 120
+        os.utime(path, (old, old))
+        assert cache.get("search", params) is MISS
+
+        # TTL 0 — кэш эндпоинта отключен (проверки по расписанию)
+        cache.ttls["search"] = 0
+        cache.set("search", dict(params, term="fresh"), [4])
+        assert not os.path.exists(cache._path(cache.make_key("search", dict(params, term="fresh"))))
+        assert cache.get("search", dict(params, term="fresh")) is MISS
+    print("✅ TTL работает")
+
+def test_lru_eviction():
+    """При превышении размера удаляются давно не читанные записи"""
+    print("🧪 Тест 2: LRU вытеснение")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(directory, max_bytes=10 ** 9)
+        payload = [os.urandom(16).hex() for _ in range(200)]
+        for i in range(3):
+            cache.set("list", {"i": i}, payload)
+            path = cache._path(cache.make_key("list", {"i": i}))
+            os.utime(path, (time.time() - 100 + i, time.time()))
+
+        # Читаем самую старую запись — она становится самой свежей
+        assert cache.get("list", {"i": 0}) == payload
+
+        entry_size = os.path.getsize(cache._path(cache.make_key("list", {"i": 0})))
+        cache.max_bytes = entry_size * 2
+        cache.evict()
+
+        assert cache.get("list", {"i": 0}) == payload
+        assert cache.get("list", {"i": 1}) is MISS
+        assert cache.get("list", {"i": 2}) == payload
+    print("✅ Вытеснение работает")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов кэша ответов")
+    print("=" * 50)
+
+    test_roundtrip_and_ttl()
+    test_lru_eviction()
+
+    print("\n✅ Все тесты завершены!")
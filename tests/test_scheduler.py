@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты адаптивного расписания проверок
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.scrapers.scheduler import CheckScheduler, KeywordsWatcher, fit_intervals, pair_weight, rank_volatility, group_pairs
+
+def test_volatile_pairs_checked_more_often():
+    """Изменчивые пары получают меньший интервал, бюджет соблюдается"""
+    print("🧪 Тест 1: Интервалы по изменчивости")
+    assert rank_volatility([5, 5, 5], 250) == 0
+    assert rank_volatility([5, None], 250) == 246
+
+    weights = {
+        "stable": pair_weight([30, 30, 30, 30], 250),
+        "volatile": pair_weight([30, 12, 40, 8], 250),
+        "missing": pair_weight([None, None], 250)
+    }
+    intervals = fit_intervals(weights, 600, 6 * 3600, requests_per_hour=3)
+    assert intervals["volatile"] < intervals["stable"] < intervals["missing"]
+    assert sum(3600 / interval for interval in intervals.values()) <= 3 + 1e-6
+    # Бюджет используется почти полностью
+    assert sum(3600 / interval for interval in intervals.values()) > 2.9
+
+    # Большой бюджет — все на нижней границе
+    assert set(fit_intervals(weights, 600, 6 * 3600, requests_per_hour=100).values()) == {600}
+    print("✅ Интервалы:", {key: round(value) for key, value in intervals.items()})
+
+def test_scheduler_queue():
+    """Очередь выдает пары по сроку и возвращает их после проверки"""
+    print("🧪 Тест 2: Очередь проверок")
+    scheduler = CheckScheduler(250, min_interval=600, max_interval=6 * 3600, requests_per_hour=4)
+    scheduler.add(("a", "us"), due=0)
+    scheduler.add(("b", "us"), due=0, ranks=[3, 20, 5])
+    scheduler.add(("c", "gb"), due=1000)
+
+    due = scheduler.pop_due(now=0, window=0)
+    assert sorted(due) == [("a", "us"), ("b", "us")]
+    assert scheduler.next_due() == 1000
+
+    scheduler.observe(("a", "us"), 40, ts=10)
+    scheduler.observe(("b", "us"), 4, ts=10)
+    # Ошибка запроса не считается изменением позиции
+    scheduler.observe(("b", "us"), None, ts=10, failed=True)
+    assert list(scheduler._ranks[("b", "us")]) == [3, 20, 5, 4]
+    scheduler.replan()
+    assert scheduler.interval(("b", "us")) < scheduler.interval(("a", "us"))
+    assert scheduler.next_due() == 1000
+    assert scheduler.pop_due(now=1000, window=0) == [("c", "gb")]
+    assert scheduler.pop_due(now=10 + scheduler.interval(("b", "us")), window=0) == [("b", "us")]
+
+    # Не проверенная пара (ошибка очереди) возвращается в расписание
+    assert scheduler.pop_due(now=10 ** 6, window=0) == [("a", "us")]
+    scheduler.requeue([("a", "us")], due=10 ** 6 + 600)
+    assert scheduler.pop_due(now=10 ** 6, window=0) == []
+    assert scheduler.pop_due(now=10 ** 6 + 600, window=0) == [("a", "us")]
+
+    scheduler.remove(("a", "us"))
+    assert ("a", "us") not in scheduler
+    assert scheduler.pop_due(now=10 ** 9) == []
+    assert group_pairs([("a", "us"), ("a", "gb"), ("b", "us")]) == {"a": ["us", "gb"], "b": ["us"]}
+    print("✅ Очередь работает")
+
+def test_keywords_reload():
+    """Изменение keywords.json добавляет и удаляет только измененные пары"""
+    print("🧪 Тест 3: Перечитывание keywords.json")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keywords.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"a": ["us", "gb"], "b": ["us"]}, f)
+        watcher = KeywordsWatcher(path)
+        assert watcher.poll() is None
+
+        scheduler = CheckScheduler(250)
+        for pair in [("a", "us"), ("a", "gb"), ("b", "us")]:
+            scheduler.add(pair, due=0)
+        scheduler.pop_due(now=0)
+        for pair in [("a", "us"), ("a", "gb"), ("b", "us")]:
+            scheduler.observe(pair, 5, ts=0)
+        scheduler.replan()
+        kept_due = scheduler.next_due()
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"a": ["us"], "b": ["us", "de"]}, f)
+        os.utime(path, ns=(0, 10 ** 18))
+        search_terms = watcher.poll()
+        assert search_terms == {"a": ["us"], "b": ["us", "de"]}
+        assert watcher.poll() is None
+
+        added, removed = scheduler.sync_pairs(search_terms, now=50)
+        assert added == [("b", "de")]
+        assert removed == [("a", "gb")]
+        assert sorted(scheduler.pairs()) == [("a", "us"), ("b", "de"), ("b", "us")]
+        # Новая пара — сразу, остальные — по прежнему расписанию
+        assert scheduler.pop_due(now=50, window=0) == [("b", "de")]
+        assert scheduler.next_due() == kept_due
+    print("✅ Добавлено:", added, "удалено:", removed)
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов расписания проверок")
+    print("=" * 50)
+
+    test_volatile_pairs_checked_more_often()
+    test_scheduler_queue()
+    test_keywords_reload()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты модели состояния и миграции схемы
+"""
+
+import sys
+import os
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.utils.state_model import RankState, migrate_state, parse_time_str, STATE_SCHEMA_VERSION, SCHEMA_KEY
+
+def test_migrate_legacy_state():
+    """Старый формат без версии схемы приводится к текущей один раз"""
+    print("🧪 Тест 1: Миграция старого состояния")
+    legacy = {
+        "gb|video translator": {"initial_rank": 4, "last_rank": 1, "last_change_time": "11 Jun 11:58"},
+        "us|photo translator": 4
+    }
+    migrated = migrate_state(legacy)
+    assert migrated[SCHEMA_KEY] == STATE_SCHEMA_VERSION
+    assert migrated["gb|video translator"]["last_change_ts"] == parse_time_str("11 Jun 11:58")
+    assert migrated["us|photo translator"] == {"initial_rank": 4, "last_rank": 4, "last_change_ts": None}
+
+    # Данные текущей версии возвращаются без изменений
+    state = RankState.from_dict(migrated)
+    saved = state.to_dict()
+    assert migrate_state(saved) is saved
+    assert RankState.from_dict(saved).get("US", "photo translator").last_rank == 4
+    print("✅ Состояние мигрировано:", saved[SCHEMA_KEY])
+
+def test_unknown_schema_version():
+    """Состояние из более новой версии не читается молча"""
+    print("🧪 Тест 2: Неизвестная версия схемы")
+    try:
+        migrate_state({SCHEMA_KEY: STATE_SCHEMA_VERSION + 1})
+        assert False, "ожидалась ошибка"
+    except ValueError:
+        print("✅ Ошибка получена")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов модели состояния")
+    print("=" * 50)
+
+    test_migrate_legacy_state()
+    test_unknown_schema_version()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты краулера поисковых подсказок (без доступа к сети)
+"""
+
+import sys
+import os
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.scrapers.charts_scraper as charts_scraper
+
+def test_crawl_deduplicates_requests():
+    """Одинаковые термины и страны одной витрины запрашиваются один раз"""
+    print("🧪 Тест 1: Дедупликация запросов подсказок")
+    calls = []
+
+    def fake_call_node(method, opts=None, timeout=None):
+        calls.append((opts["term"], opts["country"]))
+        return [{"term": f"{opts['term']} app"}]
+
+    original = charts_scraper.call_node
+    charts_scraper.call_node = fake_call_node
+    charts_scraper._suggestions_memo.clear()
+    try:
+        results = charts_scraper.crawl_suggestions(["Translator", " translator "], ["us", "US", "de"], country_rate=100)
+        assert sorted(results.keys()) == ["US", "de", "us"]
+        assert results["de"][" translator "] == [{"term": "translator app"}]
+        assert len(calls) == 2, calls
+
+        # Повторный обход берет подсказки из памяти
+        charts_scraper.crawl_suggestions(["translator"], ["de"], country_rate=100)
+        assert len(calls) == 2
+        print("✅ Выполнено запросов:", len(calls))
+    finally:
+        charts_scraper.call_node = original
+        charts_scraper._suggestions_memo.clear()
+
+def test_iter_suggestions_streams_results():
+    """Ответ отдается всем парам своего запроса и без memoize не запоминается"""
+    print("🧪 Тест 2: Поток подсказок")
+    calls = []
+
+    def fake_call_node(method, opts=None, timeout=None):
+        calls.append((opts["term"], opts["country"]))
+        return [{"term": f"{opts['term']} app"}]
+
+    original = charts_scraper.call_node
+    charts_scraper.call_node = fake_call_node
+    charts_scraper._suggestions_memo.clear()
+    try:
+        rows = list(charts_scraper.iter_suggestions(["Translator", "translator", "camera"], ["us", "de"], country_rate=100, memoize=False))
+        assert len(rows) == 6
+        assert ("de", "Translator", [{"term": "translator app"}]) in rows
+        assert len(calls) == 4, calls
+        assert not charts_scraper._suggestions_memo
+        print("✅ Пар получено:", len(rows))
+    finally:
+        charts_scraper.call_node = original
+        charts_scraper._suggestions_memo.clear()
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов краулера подсказок")
+    print("=" * 50)
+
+    test_crawl_deduplicates_requests()
+    test_iter_suggestions_streams_results()
+
+    print("\n✅ Все тесты завершены!")
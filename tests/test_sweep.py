@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты параллельной проверки позиций (get_rank подменяется, сеть не нужна)
+"""
+
+import sys
+import os
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.scrapers.sweep as sweep
+from src.utils.state_model import RankState, parse_time_str
+
+SEARCH_TERMS = {
+    "video translator": ["gb"],
+    "photo translator": ["us", "gb"],
+    "camera translator": ["us"]
+}
+
+RANKS = {
+    ("video translator", "gb"): 1,
+    ("photo translator", "us"): None,
+    ("photo translator", "gb"): 7,
+    ("camera translator", "us"): 3
+}
+
+COMPETITOR_RANKS = {
+    ("photo translator", "us"): 2,
+    ("photo translator", "gb"): None
+}
+
+def fake_get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+    # Разное время ответа, чтобы порядок завершения отличался от порядка запуска
+    time.sleep(0.05 * (len(term) % 3))
+    ranks = {bundle_ids[0]: RANKS[(term, country)]}
+    for competitor_id in bundle_ids[1:]:
+        ranks[competitor_id] = COMPETITOR_RANKS[(term, country)]
+    return ranks
+
+def sweep_all(search_terms, prev_state, **kwargs):
+    """Проверка всех пар через stream_sweep: (новое состояние, таблицы по странам)"""
+    current_state = RankState()
+    grouped = dict(sweep.stream_sweep("com.test", search_terms, 250, prev_state, 1700000000, current_state, **kwargs))
+    return current_state, grouped
+
+def test_stream_sweep_matches_serial_output():
+    """Результат совпадает с последовательной проверкой"""
+    print("🧪 Тест 1: Формат и порядок результатов")
+    original = sweep.get_ranks
+    sweep.get_ranks = fake_get_ranks
+    try:
+        prev_state = RankState.from_dict({
+            "gb|video translator": {"initial_rank": 4, "last_rank": 1, "last_change_time": "11 Jun 11:58"},
+            "us|photo translator": 4
+        })
+        current_state, grouped = sweep_all(SEARCH_TERMS, prev_state, concurrency=4, country_rate=100)
+    finally:
+        sweep.get_ranks = original
+
+    assert sorted(f"{country}|{term}" for (country, term), _ in current_state.items()) == ["gb|photo translator", "gb|video translator", "us|camera translator", "us|photo translator"]
+    assert current_state.get("gb", "video translator").last_change_ts == parse_time_str("11 Jun 11:58")
+    assert current_state.get("us", "photo translator").initial_rank == 4
+    assert current_state.get("us", "photo translator").last_change_ts == 1700000000
+    assert [row["KW"] for row in grouped["GB"]] == ["video translator", "photo translator"]
+    assert [row["Now"] for row in grouped["US"]] == ["#4 → x", "x → #3"]
+    assert grouped["GB"][0]["UpdKW"] == "11 Jun 11:58"
+    assert all(record.competitors is None for _, record in current_state.items())
+    print("✅ Состояние и таблицы совпадают")
+
+def test_stream_sweep_competitors():
+    """Позиции конкурентов берутся из того же запроса и попадают в состояние"""
+    print("🧪 Тест 2: Матрица конкурентов")
+    calls = []
+
+    def counting_get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+        calls.append((term, country))
+        return fake_get_ranks(term, bundle_ids, country, limit, backend)
+
+    original = sweep.get_ranks
+    sweep.get_ranks = counting_get_ranks
+    try:
+        competitors = {"photo translator": {"Rival": "com.rival"}}
+        terms = {"photo translator": ["us", "gb"]}
+        current_state, grouped = sweep_all(terms, RankState(), country_rate=100, competitors=competitors)
+    finally:
+        sweep.get_ranks = original
+
+    assert len(calls) == 2
+    assert current_state.get("us", "photo translator").competitors == {"com.rival": 2}
+    assert current_state.get("gb", "photo translator").competitors == {"com.rival": None}
+    assert grouped["US"][0]["Rival"] == "#2"
+    assert grouped["GB"][0]["Rival"] == "x"
+    print("✅ Конкуренты учтены без дополнительных запросов")
+
+def test_stream_sweep_interleaves_countries():
+    """Пары разных стран проверяются параллельно, а не по одной стране"""
+    print("🧪 Тест 3: Чередование стран")
+    started = []
+
+    def recording_get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+        started.append(country)
+        return {bundle_ids[0]: 1}
+
+    original = sweep.get_ranks
+    sweep.get_ranks = recording_get_ranks
+    try:
+        terms = {"a": ["us", "gb"], "b": ["us", "gb"], "c": ["us", "gb"]}
+        list(sweep.stream_sweep("com.test", terms, 250, RankState(), 1700000000, RankState(),
+                                concurrency=1, country_rate=100))
+    finally:
+        sweep.get_ranks = original
+
+    assert started == ["us", "gb", "us", "gb", "us", "gb"]
+    print("✅ Порядок запросов:", started)
+
+def test_stream_sweep_yields_countries():
+    """Страна отдается сразу после проверки всех ее пар"""
+    print("🧪 Тест 4: Потоковая проверка по странам")
+    original = sweep.get_ranks
+    sweep.get_ranks = fake_get_ranks
+    try:
+        current_state = RankState()
+        stream = sweep.stream_sweep("com.test", SEARCH_TERMS, 250, RankState(), 1700000000, current_state,
+                                    concurrency=1, country_rate=100)
+        first_country, first_rows = next(stream)
+        # При одном потоке страны чередуются: GB готова до последней пары US
+        assert first_country == "GB"
+        assert [row["KW"] for row in first_rows] == ["video translator", "photo translator"]
+        assert current_state.get("us", "camera translator") is None
+        rest = list(stream)
+    finally:
+        sweep.get_ranks = original
+
+    assert [country for country, _ in rest] == ["US"]
+    assert len(current_state) == 4
+    print("✅ Таблица GB готова до конца проверки US")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов параллельной проверки")
+    print("=" * 50)
+
+    test_stream_sweep_matches_serial_output()
+    test_stream_sweep_competitors()
+    test_stream_sweep_interleaves_countries()
+    test_stream_sweep_yields_countries()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты клиента Telegram на локальном HTTP сервере-заглушке
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.utils.telegram_utils import TelegramClient
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        data = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8"))
+        server.calls.append((self.path.rsplit("/", 1)[-1], data["chat_id"][0]))
+
+        if server.throttle_left > 0:
+            server.throttle_left -= 1
+            status, payload = 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 1}}
+        else:
+            status, payload = 200, {"ok": True, "result": {"message_id": len(server.calls)}}
+
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server(throttle=0):
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    server.calls = []
+    server.throttle_left = throttle
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_retry_after():
+    """На 429 клиент ждет retry_after и повторяет запрос"""
+    print("🧪 Тест 1: retry_after")
+    server = start_server(throttle=1)
+    try:
+        client = TelegramClient("TOKEN", "42", api_url=f"http://127.0.0.1:{server.server_port}")
+        started = time.monotonic()
+        assert client.send_message("hello") == 2
+        assert time.monotonic() - started >= 1
+        assert server.calls == [("sendMessage", "42"), ("sendMessage", "42")]
+        print("✅ Запрос повторен после паузы")
+    finally:
+        server.shutdown()
+
+def test_background_queue():
+    """submit не блокирует вызывающий поток, задачи выполняются по порядку"""
+    print("🧪 Тест 2: Фоновая очередь")
+    server = start_server()
+    try:
+        client = TelegramClient("TOKEN", "42", api_url=f"http://127.0.0.1:{server.server_port}", chat_rate=20)
+        started = time.monotonic()
+        futures = [client.submit(client.send_message, f"msg {i}") for i in range(3)]
+        assert time.monotonic() - started < 0.5
+        client.flush()
+        assert [f.result() for f in futures] == [1, 2, 3]
+        print("✅ Сообщения отправлены в фоне")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов клиента Telegram")
+    print("=" * 50)
+
+    test_retry_after()
+    test_background_queue()
+
+    print("\n✅ Все тесты завершены!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты обновления сообщений Telegram по изменениям таблиц (без доступа к сети)
+"""
+
+import sys
+import os
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.utils.telegram_utils as telegram_utils
+
+def run_with_fake_api(edit_ok, fn):
+    calls = []
+
+    def fake_update(message_id, text):
+        calls.append(("edit", message_id))
+        return edit_ok
+
+    def fake_send(text, country=None, message_id=None):
+        calls.append(("send", country))
+        return 500
+
+    originals = telegram_utils.update_message, telegram_utils.send_to_telegram
+    telegram_utils.update_message, telegram_utils.send_to_telegram = fake_update, fake_send
+    try:
+        fn()
+    finally:
+        telegram_utils.update_message, telegram_utils.send_to_telegram = originals
+    return calls
+
+def test_skip_and_edit():
+    """Неизмененная таблица пропускается, измененная редактируется"""
+    print("🧪 Тест 1: Пропуск и редактирование")
+    message_ids = {"US": 100}
+    message_hashes = {"US": telegram_utils.table_hash("table v1")}
+    statuses = []
+
+    def scenario():
+        statuses.append(telegram_utils.notify_country("US", "США", "table v1", "01 Jan 00:00", message_ids, message_hashes))
+        statuses.append(telegram_utils.notify_country("US", "США", "table v2", "01 Jan 01:00", message_ids, message_hashes))
+
+    calls = run_with_fake_api(True, scenario)
+    assert statuses == ["skipped", "edited"]
+    assert calls == [("edit", 100)]
+    assert message_hashes["US"] == telegram_utils.table_hash("table v2")
+    print("✅ Запросов к API:", len(calls))
+
+def test_send_when_edit_fails():
+    """Если редактирование не удалось или сообщения нет — отправляется новое"""
+    print("🧪 Тест 2: Отправка нового сообщения")
+    message_ids = {"US": 100}
+    message_hashes = {}
+    statuses = []
+
+    def scenario():
+        statuses.append(telegram_utils.notify_country("US", "США", "table", "01 Jan 00:00", message_ids, message_hashes))
+        statuses.append(telegram_utils.notify_country("GB", "Великобритания", "table", "01 Jan 00:00", message_ids, message_hashes))
+
+    calls = run_with_fake_api(False, scenario)
+    assert statuses == ["sent", "sent"]
+    assert calls == [("edit", 100), ("send", "US"), ("send", "GB")]
+    assert message_ids == {"US": 500, "GB": 500}
+    print("✅ Новые сообщения отправлены")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов уведомлений Telegram")
+    print("=" * 50)
+
+    test_skip_and_edit()
+    test_send_when_edit_fails()
+
+    print("\n✅ Все тесты завершены!")
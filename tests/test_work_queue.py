@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Тесты очереди аренд и распределенной проверки
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Добавляем путь к корневой папке проекта
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import src.scrapers.sweep as sweep
+from src.scrapers.worker import run_worker, process_lease, queue_fetcher, queue_ranks
+from src.utils.rate_limiter import KeyedRateLimiter
+from src.utils.state_model import RankState
+from src.utils.work_queue import WorkQueue, chunk_pairs
+
+PAIRS = [("a", "us"), ("b", "us"), ("c", "us"), ("a", "gb"), ("b", "gb")]
+
+def test_lease_expiry():
+    """Просроченная аренда переходит к другому воркеру, старый владелец теряет ее"""
+    print("🧪 Тест 1: Аренды и их истечение")
+    assert chunk_pairs(PAIRS, 2) == [[("a", "us"), ("b", "us")], [("c", "us")], [("a", "gb"), ("b", "gb")]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = WorkQueue(os.path.join(tmp, "queue.db"))
+        run_id = queue.create_run("com.test", 250, PAIRS, lease_size=10, hints={("a", "us"): 7})
+
+        first = queue.claim("w1", lease_seconds=10, now=100)
+        assert first["pairs"][0] == ("a", "us", 7)
+        second = queue.claim("w2", lease_seconds=10, now=101)
+        assert second["id"] != first["id"]
+        assert queue.claim("w3", lease_seconds=10, now=105) is None
+
+        # w1 пропал: аренда истекла и досталась w3
+        reclaimed = queue.claim("w3", lease_seconds=10, now=111)
+        assert reclaimed["id"] == first["id"]
+        assert not queue.heartbeat(first["id"], "w1", now=112)
+        assert not queue.complete(first["id"], "w1", [("a", "us", {"com.test": 1})])
+        assert queue.complete(first["id"], "w3", [("a", "us", {"com.test": 2})])
+        assert [(term, ranks) for _, term, _, ranks in queue.fetch_results(run_id)] == [("a", {"com.test": 2})]
+        queue.close()
+    print("✅ Результат принят только от владельца аренды")
+
+def test_workers_share_sweep():
+    """Два воркера проверяют все пары без повторных запросов"""
+    print("🧪 Тест 2: Проверка через воркеров")
+    calls = []
+
+    def fake_get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+        calls.append((term, country))
+        return {bundle_id: len(term) + len(calls) for bundle_id in bundle_ids}
+
+    original = sweep.get_ranks
+    sweep.get_ranks = fake_get_ranks
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue.db")
+            workers = [
+                threading.Thread(target=run_worker, kwargs={"queue_path": path, "country_rate": 100, "poll_interval": 0.05, "max_idle": 1})
+                for _ in range(2)
+            ]
+            for worker in workers:
+                worker.start()
+
+            queue = WorkQueue(path)
+            search_terms = {"a": ["us", "gb"], "b": ["us", "gb"], "c": ["us"]}
+            current_state = RankState()
+            fetch = queue_fetcher(queue, "com.test", 250, lease_size=2, poll_interval=0.05)
+            countries = [country for country, _ in sweep.stream_sweep(
+                "com.test", search_terms, 250, RankState(), 1700000000, current_state, fetch=fetch
+            )]
+            for worker in workers:
+                worker.join()
+            queue.close()
+    finally:
+        sweep.get_ranks = original
+
+    assert sorted(countries) == ["GB", "US"]
+    assert sorted(calls) == sorted(PAIRS)
+    assert len(current_state) == 5
+    print("✅ Пар проверено:", len(calls))
+
+def test_duplicate_pairs_and_timeout():
+    """Повторяющаяся пара проверяется один раз, без воркеров ожидание ограничено"""
+    print("🧪 Тест 3: Повторы пар и отсутствие воркеров")
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = WorkQueue(os.path.join(tmp, "queue.db"))
+        pairs = [("a", "us"), ("a", "us"), ("b", "us")]
+        results = queue_ranks(queue, "com.test", pairs, 250, poll_interval=0.01, timeout=5)
+
+        # Координатор — в отдельном потоке, роль воркера выполняет этот поток
+        results_list = []
+        run = threading.Thread(target=lambda: results_list.extend(results))
+        run.start()
+        lease = None
+        while lease is None:
+            lease = queue.claim("w1")
+        assert [pair[:2] for pair in lease["pairs"]] == [("a", "us"), ("b", "us")]
+        assert queue.complete(lease["id"], "w1", [("a", "us", {"com.test": 1}), ("b", "us", {"com.test": 2})])
+        run.join()
+        assert sorted(index for index, _ in results_list) == [0, 1, 2]
+
+        try:
+            list(queue_ranks(queue, "com.test", pairs, 250, poll_interval=0.01, timeout=0.05))
+            assert False, "ожидался TimeoutError"
+        except TimeoutError:
+            pass
+        queue.close()
+    print("✅ Повторы отданы по всем индексам, ожидание без воркеров прервано")
+
+def test_lease_renewed_during_slow_pair():
+    """Аренда продлевается, пока одна пара проверяется дольше срока аренды"""
+    print("🧪 Тест 4: Продление аренды во время долгой пары")
+
+    def slow_get_ranks(term, bundle_ids, country, limit, backend=None, last_rank=None, raise_errors=False):
+        time.sleep(0.8)
+        return {bundle_ids[0]: 1}
+
+    original = sweep.get_ranks
+    sweep.get_ranks = slow_get_ranks
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = WorkQueue(os.path.join(tmp, "queue.db"))
+            run_id = queue.create_run("com.test", 250, [("a", "us")])
+            lease = queue.claim("w1", lease_seconds=0.3)
+
+            # Второй воркер пытается забрать аренду, пока первый проверяет пару
+            stolen = []
+
+            def try_claim():
+                for _ in range(6):
+                    stolen.append(queue.claim("w2", lease_seconds=0.3))
+                    time.sleep(0.1)
+
+            thief = threading.Thread(target=try_claim)
+            thief.start()
+            assert process_lease(queue, lease, "w1", limiter=KeyedRateLimiter(100), lease_seconds=0.3)
+            thief.join()
+
+            assert stolen == [None] * 6
+            assert len(queue.fetch_results(run_id)) == 1
+            queue.close()
+    finally:
+        sweep.get_ranks = original
+    print("✅ Аренда не истекла")
+
+if __name__ == "__main__":
+    print("🚀 Запуск тестов очереди воркеров")
+    print("=" * 50)
+
+    test_lease_expiry()
+    test_workers_share_sweep()
+    test_duplicate_pairs_and_timeout()
+    test_lease_renewed_during_slow_pair()
+
+    print("\n✅ Все тесты завершены!")
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import time
 import sys
 import os
 
@@ -28,7 +27,6 @@ def main():
         result = get_app_charts(BUNDLE_ID, country, CHART_TYPE)
         pos = result["position"] if result and result["position"] else "-"
         results.append((country.upper(), country_name, pos))
-        time.sleep(3)
     # Выводим таблицу
     print("\nРезультаты:")
     print(f"{'Страна':<8} {'Название':<25} {'Позиция':<8}")
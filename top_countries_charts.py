@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import time
 from charts_scraper import get_app_charts
 from country_utils import get_country_name
 
@@ -22,7 +21,6 @@ def main():
         result = get_app_charts(BUNDLE_ID, country, CHART_TYPE)
         pos = result["position"] if result and result["position"] else "-"
         results.append((country.upper(), country_name, pos))
-        time.sleep(3)
     # Выводим таблицу
     print("\nРезультаты:")
     print(f"{'Страна':<8} {'Название':<25} {'Позиция':<8}")